@@ -0,0 +1,356 @@
+import asyncio
+import logging
+from inspect import isawaitable
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Mapping,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+import aiohttp
+
+from .config.config import get_config_value
+from .config.structures import Credentials, SearchType, StatusType, TypeReport
+from .exceptions import (
+    CantGetData,
+    ConnectionsFailed,
+    CrmUnavailable,
+    InvalidDate,
+)
+from .naumen_api import Client
+from .parser.issues import Issue
+from .parser.search_result_issues import SearchIssueResult
+from .transceiver.async_crm import (
+    DOMAIN,
+    AsyncActiveConnect,
+    close_session,
+    get_session,
+)
+from .transceiver.async_reports import (
+    get_report,
+    iter_issues,
+    sweep_reports,
+    wait_deletions,
+)
+from .transceiver.async_search import iter_search, search
+from .transceiver.async_session_pool import AsyncSessionPool
+from .transceiver.response_creator import (
+    FORMATTED_RESPONSE,
+    ResponseTemplate,
+    make_response,
+)
+
+log = logging.getLogger(__name__)
+
+
+async def _resolve(
+    response: Union[FORMATTED_RESPONSE, Awaitable[FORMATTED_RESPONSE]],
+) -> FORMATTED_RESPONSE:
+    if isawaitable(response):
+        return await response  # type: ignore
+    return response  # type: ignore
+
+
+class AsyncClient(Client):
+
+    """Асинхронный клиент для взаимодействия с системой Naumen.
+    Повторяет интерфейс Client: методы являются корутинами, а потоковые
+    методы iter_search_issue и iter_issues - асинхронными генераторами.
+    Требует установленного пакета aiohttp.
+    """
+
+    _session: Union[AsyncActiveConnect, AsyncSessionPool, None]  # type: ignore
+
+    async def connect(  # type: ignore
+        self,
+        *,
+        username: str = "",
+        password: str = "",
+        domain: DOMAIN = "",
+        pool_size: int = 0,
+    ) -> FORMATTED_RESPONSE:
+
+        """Метод для соединение с системой NAUMEN.
+           Принимает именнованные аргументы.
+
+        Kwargs:
+            username (str, optional): Логин в системе. По умолчанию ''.
+            password (str, optional): Пароль в системе. По умолчанию ''.
+            domain (DOMAIN, optional): Домен. По умолчанию ''.
+            pool_size (int, optional): количество сессий в пуле. По умолчанию
+            из конфигурации, 1 - одна сессия без пула.
+
+        Returns:
+            FORMATTED_RESPONSE: отформатированный ответ
+
+        """
+
+        log.debug("Создание асинхронного соединения с CRM NAUMEN.")
+        local_credentials = all([username, password, domain])
+        self_credentials = all([self.username, self.password, self.domain])
+        error_response = ResponseTemplate(StatusType._UNAUTHORIZED, ())
+
+        if not any([local_credentials, self_credentials]):
+            log.error("Не передано данных для соединения с CRM NAUMEN.")
+            return make_response(error_response, self.formatter)
+
+        if local_credentials:
+            self.username = username
+            self.password = password
+            self.domain = domain
+        try:
+            await self.close()
+            pool_size = pool_size or get_config_value(
+                "session_pool",
+                "size",
+                default=1,
+            )
+            if pool_size > 1:
+                credentials = Credentials(self.username, self.password, self.domain)
+                self._session = await AsyncSessionPool.create(
+                    [credentials] * pool_size,
+                )
+            else:
+                self._session = await get_session(
+                    self.username,
+                    self.password,
+                    self.domain,
+                )
+            log.info("Соединение с CRM NAUMEN успешно установлено.")
+            if get_config_value("janitor", "sweep_on_connect", default=True):
+                await sweep_reports(self._session)
+            success_response = ResponseTemplate(StatusType._SUCCESS, ())
+            return make_response(success_response, self.formatter)
+
+        except ConnectionsFailed:
+            log.exception("Ошибка соединения с CRM NAUMEN.")
+            return make_response(error_response, self.formatter)
+
+    async def close(self) -> None:  # type: ignore
+        """Метод для закрытия асинхронной сессии с CRM NAUMEN.
+        Удаления отчётов этой сессии завершаются до закрытия сессии.
+        """
+
+        if self._session is not None:
+            await wait_deletions(self._session)
+            if isinstance(self._session, AsyncSessionPool):
+                await self._session.close()
+            else:
+                await close_session(self._session)
+            self._session = None
+
+    async def search_issue(  # type: ignore
+        self,
+        *args: Sequence,
+        **kwargs: Any,
+    ) -> FORMATTED_RESPONSE:
+        """Асинхронная версия Client.search_issue."""
+        return await _resolve(super().search_issue(*args, **kwargs))
+
+    async def iter_search_issue(  # type: ignore
+        self,
+        *args: Sequence,
+        number: Union[str, int] = "",
+        name_contragent: str = "",
+        number_contragent: Union[str, int] = "",
+        **kwargs: Mapping,
+    ) -> AsyncIterator[SearchIssueResult]:
+        """Асинхронная версия Client.iter_search_issue.
+
+        Args:
+            number (int): номер обращения.
+            name_contragent (str): имя контрагента.
+            number_contragent (int): номер контрагента.
+            *args: не используются и не пробрасываются.
+            **kwargs: другие именнованные аргументы.
+
+        Yields:
+            SearchIssueResult: очередной результат поиска.
+
+        Raises:
+            ConnectionsFailed: если соединение с CRM не установлено.
+            CantGetData: если не удалось получить данные из CRM.
+        """
+        if not self._session:
+            log.error("Ошибка соединения с CRM NAUMEN.")
+            raise ConnectionsFailed
+
+        _ = {
+            "byNumber": number,
+            "byCntrTitle": name_contragent,
+            "byCntrNumber": number_contragent,
+        }
+        async for result in iter_search(
+            self._session,
+            SearchType.ISSUES_SEARCH,
+            mod_data=tuple(_.items()),
+            mod_params=(),
+        ):
+            yield result
+
+    async def iter_issues(  # type: ignore
+        self,
+        *args: Sequence,
+        is_vip: bool = False,
+        parse_issue_card: bool = False,
+        **kwargs: Mapping,
+    ) -> AsyncIterator[Issue]:
+        """Асинхронная версия Client.iter_issues.
+
+        Args:
+            is_vip: флаг указывающий на то, тикеты какой линии получить.
+            parse_issue_card (bool): собирать ли информацию с карточки обращения
+            *args: не используются и не пробрасываются.
+            **kwargs: другие именнованные аргументы.
+
+        Yields:
+            Issue: очередное обращение.
+
+        Raises:
+            ConnectionsFailed: если соединение с CRM не установлено.
+            CantGetData: если не удалось получить данные из CRM.
+        """
+        if not self._session:
+            log.error("Ошибка соединения с CRM NAUMEN.")
+            raise ConnectionsFailed
+
+        report = TypeReport.ISSUES_VIP_LINE if is_vip else TypeReport.ISSUES_FIRST_LINE
+        async for issue in iter_issues(
+            self._session,
+            report,
+            mod_params=(),
+            mod_data=(),
+            parse_issue_card=parse_issue_card,
+        ):
+            yield issue
+
+    async def get_issues(  # type: ignore
+        self,
+        *args: Sequence,
+        **kwargs: Any,
+    ) -> FORMATTED_RESPONSE:
+        """Асинхронная версия Client.get_issues."""
+        return await _resolve(super().get_issues(*args, **kwargs))
+
+    async def get_issue_card(  # type: ignore
+        self,
+        naumen_uuid: str,
+        *args: Sequence,
+        **kwargs: Any,
+    ) -> FORMATTED_RESPONSE:
+        """Асинхронная версия Client.get_issue_card."""
+        return await _resolve(super().get_issue_card(naumen_uuid, *args, **kwargs))
+
+    async def get_sl_report(  # type: ignore
+        self,
+        *args: Any,
+        **kwargs: Any,
+    ) -> FORMATTED_RESPONSE:
+        """Асинхронная версия Client.get_sl_report."""
+        return await _resolve(super().get_sl_report(*args, **kwargs))
+
+    async def get_mttr_report(  # type: ignore
+        self,
+        *args: Any,
+        **kwargs: Any,
+    ) -> FORMATTED_RESPONSE:
+        """Асинхронная версия Client.get_mttr_report."""
+        return await _resolve(super().get_mttr_report(*args, **kwargs))
+
+    async def get_flr_report(  # type: ignore
+        self,
+        *args: Any,
+        **kwargs: Any,
+    ) -> FORMATTED_RESPONSE:
+        """Асинхронная версия Client.get_flr_report."""
+        return await _resolve(super().get_flr_report(*args, **kwargs))
+
+    async def get_aht_report(  # type: ignore
+        self,
+        *args: Any,
+        **kwargs: Any,
+    ) -> FORMATTED_RESPONSE:
+        """Асинхронная версия Client.get_aht_report."""
+        return await _resolve(super().get_aht_report(*args, **kwargs))
+
+    async def _get_response(  # type: ignore
+        self,
+        report: Union[TypeReport, SearchType],
+        mod_params: Union[Tuple[Tuple[str, Any]], Tuple] = (),
+        mod_data: Union[Tuple[Tuple[str, Any]], Tuple] = (),
+        *args: Sequence,
+        **kwargs: Mapping,
+    ) -> FORMATTED_RESPONSE:
+
+        """Шаблонный метод для асинхронного получения ответа от CRM NAUMEN.
+
+        Args:
+            report (Union[TypeReport, SearchType]): необходимый отчёт.
+            mod_params: (Union[Tuple[Tuple[str, Any]], Tuple]):
+            модифицированные параметры запроса
+            mod_data: (Union[Tuple[Tuple[str, Any]], Tuple]):
+            модифицированный данные запроса
+            *args: прокинутые позиционные аргументы.
+            **kwargs: прокинутые именнованные аргументы.
+
+        Returns:
+            FORMATTED_RESPONSE: отформатированный ответ
+        """
+
+        if not self._session:
+            log.error("Ошибка соединения с CRM NAUMEN.")
+            error_response = ResponseTemplate(StatusType._UNAUTHORIZED, ())
+            error_response.status.description = (
+                "You are not authorized " "to get report."
+            )
+            return make_response(error_response, self.formatter)
+
+        try:
+            if report in TypeReport:
+                call_func = get_report
+            elif report in SearchType:
+                call_func = search  # type: ignore
+
+            content = await call_func(
+                self._session,
+                report,  # type: ignore
+                *args,
+                mod_params=mod_params,
+                mod_data=mod_data,
+                **kwargs,  # type: ignore
+            )
+            api_response = ResponseTemplate(StatusType._SUCCESS, content)
+            log.debug("Ответ на запрос получен.")
+            return make_response(api_response, self.formatter, report.name)
+
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            log.exception("Ошибка соединения с CRM NAUMEN.")
+            error_response = ResponseTemplate(StatusType._GATEWAY_TIMEOUT, ())
+            return make_response(error_response, self.formatter)
+
+        except CrmUnavailable as exc:
+            log.error(exc.message)
+            error_response = ResponseTemplate(StatusType._CRM_UNAVAILABLE, ())
+            return make_response(error_response, self.formatter)
+
+        except CantGetData:
+            log.exception("Ошибка получения данных из CRM NAUMEN.")
+            error_response = ResponseTemplate(StatusType._BAD_REQUEST, ())
+            return make_response(error_response, self.formatter)
+
+        except InvalidDate:
+            log.exception("Передан не верный формат дыты из CRM NAUMEN.")
+            error_response = ResponseTemplate(StatusType._BAD_REQUEST, ())
+            error_response.status.description = (
+                "Invalid date format. " "Allowed date format: " "%d.%m.%Y"
+            )
+            return make_response(error_response, self.formatter)
+
+        except ConnectionsFailed:
+            log.exception("Ошибка соединения с CRM NAUMEN.")
+            error_response = ResponseTemplate(StatusType._UNAUTHORIZED, ())
+            return make_response(error_response, self.formatter)
@@ -3,6 +3,7 @@ from json import load
 from logging import getLogger
 from pathlib import PurePath
 from random import randint
+from time import time
 from typing import Any, Literal, Mapping, Sequence, Tuple, Union
 
 from ..exceptions import CantGetData, InvalidDate
@@ -59,6 +60,27 @@ class AppConfig:
             self.config = load(file)
 
 
+def get_config_value(*keys: str, default: Any = None) -> Any:
+    """Функция получения значения необязательного параметра конфигурации.
+
+    Args:
+        *keys: путь до параметра в конфигурации.
+        default: значение по умолчанию, если параметр не найден.
+
+    Returns:
+        Any: значение параметра.
+    """
+
+    value: Any = CONFIG.config
+    for key in keys:
+        if not isinstance(value, Mapping) or key not in value:
+            return default
+        value = value[key]
+    if isinstance(value, Mapping) and "value" in value:
+        return value["value"]
+    return value
+
+
 def _validate_date(check_date: str) -> str:
     """Функция проверки формата даты.
 
@@ -100,6 +122,8 @@ def _params_erector(
 
 def get_report_name() -> str:
     """Функция получения уникального названия для отчета.
+    В названии хранится время создания отчёта, по нему очистка
+    отличает брошенные отчёты от формируемых другими клиентами.
 
     Args:
 
@@ -107,7 +131,7 @@ def get_report_name() -> str:
         Строку названия.
     """
 
-    return f"ID{randint(1000000,9999999)}"
+    return f"ID{randint(1000000,9999999)}-{int(time())}"
 
 
 def get_search_create_report_params(
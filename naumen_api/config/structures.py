@@ -1,12 +1,57 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
+from threading import Event, Lock, Thread
+from time import monotonic
 from typing import Any, Mapping, NamedTuple, Union
+from uuid import uuid4
 
 from requests import Session
 
 from ..exceptions import CantGetData
 
 
+@dataclass(frozen=True)
+class Credentials:
+
+    """Класс данных для хранения учетных данных пользователя CRM Naumen.
+
+    Attributes:
+        username: имя пользователя.
+        password: пароль пользователя.
+        domain: домен учетной записи.
+    """
+
+    username: str
+    password: str = field(repr=False)
+    domain: str
+
+
+@dataclass
+class SessionState:
+
+    """Класс данных для хранения состояния сессии с CRM Naumen.
+
+    Attributes:
+        lock: блокировка повторного входа.
+        generation: количество входов в CRM за время жизни сессии.
+        last_used: время monotonic последнего запроса.
+        closed: событие закрытия сессии.
+        keep_alive: поток поддержания сессии.
+        healthy: удался ли последний вход в CRM.
+        failed_at: время monotonic последнего неудачного входа.
+        token: случайный идентификатор сессии для ключей кэша.
+    """
+
+    lock: Lock = field(default_factory=Lock)
+    generation: int = 0
+    last_used: float = field(default_factory=monotonic)
+    closed: Event = field(default_factory=Event)
+    keep_alive: Union[Thread, None] = None
+    healthy: bool = True
+    failed_at: float = 0.0
+    token: str = field(default_factory=lambda: uuid4().hex)
+
+
 @dataclass(frozen=True)
 class ActiveConnect:
 
@@ -14,9 +59,17 @@ class ActiveConnect:
 
     Attributes:
         session: активное соединение с crm системой.
+        credentials: учетные данные для повторного входа.
+        state: состояние сессии.
     """
 
     session: Session
+    credentials: Union[Credentials, None] = field(default=None, compare=False)
+    state: SessionState = field(
+        default_factory=SessionState,
+        compare=False,
+        repr=False,
+    )
 
 
 class NaumenRequest(NamedTuple):
@@ -47,6 +100,7 @@ class StatusType(Enum):
         _BAD_REQUEST: ответ при ошибке запроса
         _UNAUTHORIZED: ответ при проблемах с авторизацией
         _GATEWAY_TIMEOUT: при проблемах с Naumen
+        _CRM_UNAVAILABLE: при приостановке запросов к Naumen
 
     """
 
@@ -72,6 +126,11 @@ class StatusType(Enum):
         "message": "Naumen Does Not Answer",
         "description": "Remote end closed " "connection without response",
     }
+    _CRM_UNAVAILABLE = {
+        "code": 504,
+        "message": "Naumen Does Not Answer",
+        "description": "Naumen is temporarily unavailable.",
+    }
 
     def __init__(self, status_content: Mapping):
         self.code = status_content["code"]
@@ -41,3 +41,21 @@ class InvalidDate(Exception):
     ) -> None:
         self.message = message
         super().__init__(self.message)
+
+
+class CrmUnavailable(CantGetData):
+
+    """Исключение возвращяемое, когда запрос к CRM не отправлен, чтобы не
+    перегружать её: цепь запросов разомкнута после серии ошибок или
+    ожидание очереди запросов слишком долгое.
+
+    Attributes:
+        message: объяснение ошибки.
+    """
+
+    def __init__(
+        self,
+        message: str = "CRM Naumen временно недоступна, запрос не отправлен.",
+    ) -> None:
+        self.message = message
+        super().__init__(self.message)
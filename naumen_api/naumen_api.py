@@ -1,12 +1,27 @@
 import logging
-from typing import Any, Mapping, Sequence, Tuple, Type, Union
+from typing import Any, Dict, Iterator, Mapping, Sequence, Tuple, Type, Union
 
 from requests import exceptions
 
-from .config.structures import ActiveConnect, SearchType, StatusType, TypeReport
-from .exceptions import CantGetData, ConnectionsFailed, InvalidDate
-from .transceiver.crm import DOMAIN, get_session
-from .transceiver.reports import get_report
+from .config.config import get_config_value
+from .config.structures import (
+    ActiveConnect,
+    Credentials,
+    SearchType,
+    StatusType,
+    TypeReport,
+)
+from .exceptions import (
+    CantGetData,
+    ConnectionsFailed,
+    CrmUnavailable,
+    InvalidDate,
+)
+from .parser.issues import Issue
+from .parser.search_result_issues import SearchIssueResult
+from .transceiver.crm import DOMAIN, close_session, get_session
+from .transceiver.instrumentation import TIMING_STATS, Stage, StageStats
+from .transceiver.reports import REPORT_JANITOR, get_report, iter_issues
 from .transceiver.response_creator import (
     FORMATTED_RESPONSE,
     JSONResponseFormatter,
@@ -14,7 +29,8 @@ from .transceiver.response_creator import (
     ResponseTemplate,
     make_response,
 )
-from .transceiver.search import search
+from .transceiver.search import iter_search, search
+from .transceiver.session_pool import PoolMetrics, SessionPool, SessionPoolBase
 
 log = logging.getLogger(__name__)
 
@@ -22,7 +38,8 @@ log = logging.getLogger(__name__)
 class Client:
 
     """Класс для взаимодействия с системой Naumen.
-    Возвращает ответы JSON строками.
+    Возвращает ответы JSON строками, с formatter=NativeResponseFormatter -
+    объектами ResponseTemplate без сериализации.
     """
 
     def __init__(
@@ -40,6 +57,7 @@ class Client:
             username (str): Логин в системе. По умолчанию ''.
             password (str): Пароль в системе. По умолчанию ''.
             domain (DOMAIN): Домен. По умолчанию ''.
+            formatter (Type[ResponseFormatter]): класс форматирования ответов.
         """
         log.debug("Инициализация клиента API.")
         log.debug(
@@ -50,7 +68,7 @@ class Client:
         self.password = password
         self.domain = domain
         self.formatter = formatter
-        self._session: Union[ActiveConnect, None] = None
+        self._session: Union[ActiveConnect, SessionPool, None] = None
 
     def connect(
         self,
@@ -58,6 +76,7 @@ class Client:
         username: str = "",
         password: str = "",
         domain: DOMAIN = "",
+        pool_size: int = 0,
     ) -> FORMATTED_RESPONSE:
 
         """Метод для соединение с системой NAUMEN.
@@ -67,6 +86,8 @@ class Client:
             username (str, optional): Логин в системе. По умолчанию ''.
             password (str, optional): Пароль в системе. По умолчанию ''.
             domain (DOMAIN, optional): Домен. По умолчанию ''.
+            pool_size (int, optional): количество сессий в пуле. По умолчанию
+            из конфигурации, 1 - одна сессия без пула.
 
         Returns:
             FORMATTED_RESPONSE: отформатированный ответ
@@ -91,8 +112,20 @@ class Client:
             self.password = password
             self.domain = domain
         try:
-            self._session = get_session(self.username, self.password, self.domain)
+            self.close()
+            pool_size = pool_size or get_config_value(
+                "session_pool",
+                "size",
+                default=1,
+            )
+            if pool_size > 1:
+                credentials = Credentials(self.username, self.password, self.domain)
+                self._session = SessionPool.create([credentials] * pool_size)
+            else:
+                self._session = get_session(self.username, self.password, self.domain)
             log.info("Соединение с CRM NAUMEN успешно установлено.")
+            if get_config_value("janitor", "sweep_on_connect", default=True):
+                REPORT_JANITOR.sweep(self._session)
             success_response = ResponseTemplate(StatusType._SUCCESS, ())
             return make_response(success_response, self.formatter)
 
@@ -100,6 +133,48 @@ class Client:
             logging.exception("Ошибка соединения с CRM NAUMEN.")
             return make_response(error_response, self.formatter)
 
+    def close(self) -> None:
+        """Метод для закрытия сессии с CRM NAUMEN.
+        Отчёты этой сессии из очереди удаления удаляются до закрытия сессии.
+        """
+
+        if self._session is not None:
+            REPORT_JANITOR.flush(self._session)
+            if isinstance(self._session, SessionPool):
+                self._session.close()
+            else:
+                close_session(self._session)
+            self._session = None
+
+    def pool_metrics(self) -> Union[PoolMetrics, None]:
+        """Метод получения метрик пула сессий.
+
+        Returns:
+            Union[PoolMetrics, None]: метрики или None, если пул не создан.
+        """
+
+        if isinstance(self._session, SessionPoolBase):
+            return self._session.metrics()
+        return None
+
+    def timing_stats(
+        self,
+        report: Union[TypeReport, SearchType, None] = None,
+    ) -> Dict[Stage, StageStats]:
+
+        """Метод получения статистики времени этапов получения отчётов:
+        перцентилей p50, p95 и p99 по каждому этапу. Статистика общая для
+        всех клиентов процесса.
+
+        Args:
+            report: тип отчёта или поиска, None - все отчёты.
+
+        Returns:
+            Dict[Stage, StageStats]: статистика этапов.
+        """
+
+        return TIMING_STATS.stats(report.name if report is not None else None)
+
     def search_issue(
         self,
         *args: Sequence,
@@ -142,7 +217,7 @@ class Client:
         }
         add_kwarg: Mapping = {
             "parse_issue_history": parse_issue_history,
-            "parse_issue_cards": parse_issue_card,
+            "parse_issue_card": parse_issue_card,
         }
         report_kwargs = tuple(_.items())
         return self._get_response(
@@ -152,6 +227,47 @@ class Client:
             **add_kwarg,
         )
 
+    def iter_search_issue(
+        self,
+        *args: Sequence,
+        number: Union[str, int] = "",
+        name_contragent: str = "",
+        number_contragent: Union[str, int] = "",
+        **kwargs: Mapping,
+    ) -> Iterator[SearchIssueResult]:
+        """Метод для поиска обращений, отдающий результаты по мере получения
+        страниц из CRM. Результаты не форматируются.
+
+        Args:
+            number (int): номер обращения.
+            name_contragent (str): имя контрагента.
+            number_contragent (int): номер контрагента.
+            *args: не используются и не пробрасываются.
+            **kwargs: другие именнованные аргументы.
+
+        Yields:
+            SearchIssueResult: очередной результат поиска.
+
+        Raises:
+            ConnectionsFailed: если соединение с CRM не установлено.
+            CantGetData: если не удалось получить данные из CRM.
+        """
+        if not self._session:
+            log.error("Ошибка соединения с CRM NAUMEN.")
+            raise ConnectionsFailed
+
+        _ = {
+            "byNumber": number,
+            "byCntrTitle": name_contragent,
+            "byCntrNumber": number_contragent,
+        }
+        yield from iter_search(
+            self._session,
+            SearchType.ISSUES_SEARCH,
+            mod_data=tuple(_.items()),
+            mod_params=(),
+        )
+
     def get_issues(
         self,
         *args: Sequence,
@@ -182,10 +298,47 @@ class Client:
 
         report_kwargs: Mapping = {
             "parse_issue_history": parse_issue_history,
-            "parse_issue_cards": parse_issue_card,
+            "parse_issue_card": parse_issue_card,
         }
         return self._get_response(report, mod_params=(), mod_data=(), **report_kwargs)
 
+    def iter_issues(
+        self,
+        *args: Sequence,
+        is_vip: bool = False,
+        parse_issue_card: bool = False,
+        **kwargs: Mapping,
+    ) -> Iterator[Issue]:
+        """Метод для получения обращений на линии ТП, отдающий обращения
+        по одному. При parse_issue_card обращение отдается, как только
+        получена его карточка. Результаты не форматируются.
+
+        Args:
+            is_vip: флаг указывающий на то, тикеты какой линии получить.
+            parse_issue_card (bool): собирать ли информацию с карточки обращения
+            *args: не используются и не пробрасываются.
+            **kwargs: другие именнованные аргументы.
+
+        Yields:
+            Issue: очередное обращение.
+
+        Raises:
+            ConnectionsFailed: если соединение с CRM не установлено.
+            CantGetData: если не удалось получить данные из CRM.
+        """
+        if not self._session:
+            log.error("Ошибка соединения с CRM NAUMEN.")
+            raise ConnectionsFailed
+
+        report = TypeReport.ISSUES_VIP_LINE if is_vip else TypeReport.ISSUES_FIRST_LINE
+        yield from iter_issues(
+            self._session,
+            report,
+            mod_params=(),
+            mod_data=(),
+            parse_issue_card=parse_issue_card,
+        )
+
     def get_issue_card(
         self,
         naumen_uuid: str,
@@ -448,13 +601,18 @@ class Client:
             )
             api_response = ResponseTemplate(StatusType._SUCCESS, content)
             log.debug("Ответ на запрос получен.")
-            return make_response(api_response, self.formatter)
+            return make_response(api_response, self.formatter, report.name)
 
-        except exceptions.ConnectionError:
+        except (exceptions.ConnectionError, exceptions.Timeout):
             log.exception("Ошибка соединения с CRM NAUMEN.")
             error_response = ResponseTemplate(StatusType._GATEWAY_TIMEOUT, ())
             return make_response(error_response, self.formatter)
 
+        except CrmUnavailable as exc:
+            log.error(exc.message)
+            error_response = ResponseTemplate(StatusType._CRM_UNAVAILABLE, ())
+            return make_response(error_response, self.formatter)
+
         except CantGetData:
             log.exception("Ошибка получения данных из CRM NAUMEN.")
             error_response = ResponseTemplate(StatusType._BAD_REQUEST, ())
@@ -3,14 +3,13 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import Dict, Mapping, Sequence, Union
 
-from bs4 import BeautifulSoup
-
 from .parser_base import (
     PageType,
     _forming_days_collecion,
     _forming_days_dict,
     _get_columns_name,
     _get_date_range,
+    _make_soup,
     _parse_date_report,
     _validate_text_for_parsing,
 )
@@ -58,7 +57,7 @@ def parse(
     log.debug("Запуск парсинг отчёта AHT")
 
     _validate_text_for_parsing(text)
-    soup = BeautifulSoup(text, "html.parser")
+    soup = _make_soup(text)
     start_date, end_date = _parse_date_report(
         soup,
         "Дата перевода, с",
@@ -167,3 +166,36 @@ def _formating_aht_data(days: Mapping[int, Sequence]) -> Sequence[Sequence[Aht]]
         collection.append(day_collection)
 
     return collection
+
+
+def _merged_data_completion(
+    dates: Sequence[str],
+    collection: Sequence[Sequence[Aht]],
+) -> Sequence[Sequence[Aht]]:
+
+    """Функция для дополнения отчёта AHT, собранного из нескольких отчётов.
+        Каждый отчёт заполняет пустые дни только своими сегментами, поэтому
+        после объединения пустые дни заполняются всеми сегментами периода.
+
+    Args:
+        dates: даты дней коллекции в формате %d.%m.%Y.
+        collection: коллекция дней объединённого отчёта.
+
+    Returns:
+        Sequence[Sequence[Aht]]: дополненная коллекция.
+    """
+
+    segments: Dict[str, None] = {}
+    for day_content in collection:
+        for aht in day_content:
+            segments.setdefault(aht.segment)
+
+    completed = []
+    for date, day_content in zip(dates, collection):
+        empty_day = all(
+            aht.aht_level == 0 and aht.issues_received == 0 for aht in day_content
+        )
+        if empty_day:
+            day_content = [Aht(date, segment, 0.0, 0) for segment in segments]
+        completed.append(day_content)
+    return tuple(completed)
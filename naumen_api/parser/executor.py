@@ -0,0 +1,224 @@
+import logging
+from concurrent.futures import Future, ProcessPoolExecutor
+from threading import Lock
+from typing import Any, Callable, List, Mapping, Sequence, Tuple, Union
+
+from ..config.config import CONFIG, get_config_value
+from ..config.structures import PageType
+from .parser_base import get_html_backend, set_html_backend
+
+log = logging.getLogger(__name__)
+
+PARSE_TASK = Tuple[str, Union[PageType, None], str]
+
+
+def _parse_batch(
+    parse_func: Callable[..., Sequence],
+    html_backend: str,
+    config: Mapping,
+    tasks: Sequence[PARSE_TASK],
+    return_exceptions: bool = False,
+) -> List[Any]:
+
+    """Функция парсинга пачки страниц в дочернем процессе.
+    Конфигурация передается вместе с задачей: запущенный через spawn
+    процесс загружает конфигурацию по умолчанию, а процесс, запущенный
+    через fork, не видит изменений после своего запуска.
+
+    Args:
+        parse_func: функция парсинга одной страницы.
+        html_backend: HTML бэкенд основного процесса.
+        config: конфигурация основного процесса.
+        tasks: страницы, их типы и имена отчётов.
+        return_exceptions: вернуть ошибку парсинга страницы вместо
+        результата, не прерывая парсинг остальных.
+
+    Returns:
+        List[Any]: результаты парсинга в порядке страниц.
+    """
+
+    CONFIG.config = config
+    set_html_backend(html_backend)
+    return _parse_tasks(parse_func, tasks, return_exceptions)
+
+
+def _parse_tasks(
+    parse_func: Callable[..., Sequence],
+    tasks: Sequence[PARSE_TASK],
+    return_exceptions: bool,
+) -> List[Any]:
+    results: List[Any] = []
+    for task in tasks:
+        try:
+            results.append(parse_func(*task))
+        except Exception as exc:
+            if not return_exceptions:
+                raise
+            results.append(exc)
+    return results
+
+
+class ParsingExecutor:
+
+    """Класс для парсинга страниц в пуле процессов.
+    Парсинг страниц выполняется на чистом Python и не масштабируется
+    потоками, поэтому большие страницы отправляются в дочерние процессы.
+    Страницы меньше порога разбираются в текущем процессе, а при пакетном
+    парсинге отправляются в процессы пачками, чтобы окупить передачу данных.
+    По умолчанию пул выключен, включается параметром parsing.processes.
+
+    Attributes:
+        parse_func: функция парсинга одной страницы, должна быть доступна
+        на уровне модуля, чтобы её можно было передать в процесс.
+        processes: количество процессов, 0 - парсинг в текущем процессе.
+        min_page_size: минимальный размер страницы для отправки в процесс.
+        batch_size: количество маленьких страниц в одной задаче.
+    """
+
+    def __init__(
+        self,
+        parse_func: Callable[..., Sequence],
+        processes: Union[int, None] = None,
+        min_page_size: Union[int, None] = None,
+        batch_size: Union[int, None] = None,
+    ) -> None:
+        self.parse_func = parse_func
+        self._processes = processes
+        self._min_page_size = min_page_size
+        self._batch_size = batch_size
+        self._pool: Union[ProcessPoolExecutor, None] = None
+        self._lock = Lock()
+
+    @property
+    def processes(self) -> int:
+        if self._processes is not None:
+            return self._processes
+        return get_config_value("parsing", "processes", default=0)
+
+    @property
+    def min_page_size(self) -> int:
+        if self._min_page_size is not None:
+            return self._min_page_size
+        return get_config_value("parsing", "min_page_size", default=100000)
+
+    @property
+    def batch_size(self) -> int:
+        if self._batch_size is not None:
+            return self._batch_size
+        return get_config_value("parsing", "batch_size", default=8)
+
+    def configure(self, **kwargs: Any) -> None:
+
+        """Метод изменения настроек пула. Запущенный пул будет остановлен.
+
+        Kwargs:
+            processes, min_page_size, batch_size: новые значения настроек.
+        """
+
+        self.shutdown()
+        for name in ("processes", "min_page_size", "batch_size"):
+            if name in kwargs:
+                setattr(self, f"_{name}", kwargs[name])
+
+    def parse(
+        self,
+        page: str,
+        type_page: Union[PageType, None],
+        name_report: str = "",
+    ) -> Sequence:
+
+        """Метод парсинга одной страницы.
+
+        Args:
+            page: страница которую требуется распарсить.
+            type_page: тип страницы.
+            name_report: уникальное имя сформированного отчёта.
+
+        Returns:
+            Sequence: результат парсинга страницы.
+        """
+
+        pool = self._get_pool()
+        if pool is None or len(page) < self.min_page_size:
+            return self.parse_func(page, type_page, name_report)
+        return self._submit(pool, [(page, type_page, name_report)]).result()[0]
+
+    def parse_many(
+        self,
+        tasks: Sequence[PARSE_TASK],
+        return_exceptions: bool = False,
+    ) -> List[Any]:
+
+        """Метод парсинга нескольких страниц. Большие страницы отправляются
+        в процессы по одной, маленькие - пачками по batch_size.
+
+        Args:
+            tasks: страницы, их типы и имена отчётов.
+            return_exceptions: вернуть ошибку парсинга страницы вместо
+            результата, не прерывая парсинг остальных.
+
+        Returns:
+            List[Any]: результаты парсинга в порядке страниц.
+        """
+
+        pool = self._get_pool()
+        if pool is None:
+            return _parse_tasks(self.parse_func, tasks, return_exceptions)
+
+        batches: List[List[int]] = []
+        small: List[int] = []
+        for num, (page, _, _) in enumerate(tasks):
+            if len(page) >= self.min_page_size:
+                batches.append([num])
+                continue
+            small.append(num)
+            if len(small) >= self.batch_size:
+                batches.append(small)
+                small = []
+        if small:
+            batches.append(small)
+
+        futures = [
+            (
+                batch,
+                self._submit(pool, [tasks[num] for num in batch], return_exceptions),
+            )
+            for batch in batches
+        ]
+        results: List[Any] = [()] * len(tasks)
+        for batch, future in futures:
+            for num, result in zip(batch, future.result()):
+                results[num] = result
+        return results
+
+    def shutdown(self) -> None:
+        """Метод остановки пула процессов."""
+
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def _submit(
+        self,
+        pool: ProcessPoolExecutor,
+        tasks: Sequence[PARSE_TASK],
+        return_exceptions: bool = False,
+    ) -> "Future[List[Any]]":
+        return pool.submit(
+            _parse_batch,
+            self.parse_func,
+            get_html_backend(),
+            CONFIG.config,
+            tasks,
+            return_exceptions,
+        )
+
+    def _get_pool(self) -> Union[ProcessPoolExecutor, None]:
+        if self.processes <= 0:
+            return None
+        with self._lock:
+            if self._pool is None:
+                log.debug(f"Запуск пула парсинга из {self.processes} процессов.")
+                self._pool = ProcessPoolExecutor(max_workers=self.processes)
+            return self._pool
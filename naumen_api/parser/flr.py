@@ -3,14 +3,13 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import Dict, Mapping, Sequence, Union
 
-from bs4 import BeautifulSoup
-
 from .parser_base import (
     PageType,
     _forming_days_collecion,
     _forming_days_dict,
     _get_columns_name,
     _get_date_range,
+    _make_soup,
     _parse_date_report,
     _validate_text_for_parsing,
 )
@@ -58,7 +57,7 @@ def parse(
     log.debug("Запуск парсинг отчёта FLR")
 
     _validate_text_for_parsing(text)
-    soup = BeautifulSoup(text, "html.parser")
+    soup = _make_soup(text)
     start_date, end_date = _parse_date_report(
         soup,
         "Дата перевода, с",
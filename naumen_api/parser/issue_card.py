@@ -1,15 +1,17 @@
 import logging
 import re
 from datetime import datetime
-from typing import Any, Iterable, List, Sequence, Tuple, Union
+from typing import Any, Dict, Iterable, List, Sequence, Tuple, Union
 
 from bs4 import BeautifulSoup
+from bs4.element import Tag
 
 from ..exceptions import CantGetData
 from .issues import Issue
 from .parser_base import (
     _get_columns_name,
     _get_url_param_value,
+    _make_soup,
     _validate_text_for_parsing,
 )
 
@@ -38,29 +40,74 @@ def parse(
     if not issue:
         issue = Issue()
     _validate_text_for_parsing(text)
-    soup = BeautifulSoup(text, "html.parser")
+    soup = _make_soup(text)
     if not soup:
         raise CantGetData
-    issue.number = _get_number(soup)
-    issue.name = _get_title(soup)
-    issue.step = _get_step(soup)
-    issue.issue_type = _get_issue_type(soup)
-    issue.uuid_responsible, issue.responsible = _get_responsible(soup)
-    issue.name_contragent, issue.uuid_contragent = _get_contragent_params(soup)
-    issue.description = _get_description(soup)
-    issue.creation_date = _get_creation_date(soup)
-    issue.name_service, issue.uuid_service = _get_service_params(soup)
-    issue.info_service = _get_service_info(soup)
-    issue.return_to_work_time = _get_return_to_work_time(soup)
-    issue.diagnostics = _get_diagnostics(soup)
-    issue.required_date = _get_required_date(soup)
-    issue.close_date = _get_close_date(soup)
-    issue.client_requisite = _get_client_requisite(soup)
-    issue.contragent_category = _get_contragent_category(soup)
-    issue.contact = _get_contact(soup)
+    index = _IdIndex(soup)
+    issue.number = _get_number(index)
+    issue.name = _get_title(index)
+    issue.step = _get_step(index)
+    issue.issue_type = _get_issue_type(index)
+    issue.uuid_responsible, issue.responsible = _get_responsible(index)
+    issue.name_contragent, issue.uuid_contragent = _get_contragent_params(index)
+    issue.description = _get_description(index)
+    issue.creation_date = _get_creation_date(index)
+    issue.name_service, issue.uuid_service = _get_service_params(index)
+    issue.info_service = _get_service_info(index)
+    issue.return_to_work_time = _get_return_to_work_time(index)
+    issue.diagnostics = _get_diagnostics(index)
+    issue.required_date = _get_required_date(index)
+    issue.close_date = _get_close_date(index)
+    issue.client_requisite = _get_client_requisite(index)
+    issue.contragent_category = _get_contragent_category(index)
+    issue.contact = _get_contact(index)
     return (issue,)
 
 
+class _IdIndex:
+
+    """Индекс элементов страницы по id, собираемый за один проход по дереву.
+    Поиск по id выполняется по словарю, остальные запросы передаются в soup.
+    Позволяет разобрать карточку за один обход вместо обхода на каждое поле.
+
+    Attributes:
+        soup: подготовленная для парсинга HTML страница.
+    """
+
+    def __init__(self, soup: BeautifulSoup) -> None:
+        self.soup = soup
+        self._tags: Dict[str, Tag] = {}
+        for tag in soup.find_all(id=True):
+            self._tags.setdefault(tag["id"], tag)
+
+    def find(
+        self,
+        name: Union[str, None] = None,
+        attrs: Union[Dict[str, str], None] = None,
+        **kwargs: str,
+    ) -> Union[Tag, None]:
+
+        """Метод поиска первого элемента, повторяет BeautifulSoup.find.
+
+        Args:
+            name: имя тега.
+            attrs: атрибуты тега.
+            **kwargs: атрибуты тега.
+
+        Returns:
+            Union[Tag, None]: найденный элемент или None.
+        """
+
+        attrs = {**(attrs or {}), **kwargs}
+        if set(attrs) != {"id"}:
+            return self.soup.find(name, attrs)
+        tag = self._tags.get(attrs["id"])
+        if tag is None or name is None or tag.name == name:
+            return tag
+        # первый элемент с таким id другого типа, ищем нужный тег по дереву.
+        return self.soup.find(name, attrs)
+
+
 def _return_defalut_time() -> datetime:
     """
     Функция возвращает время возврата в работу по умолчанию
@@ -77,12 +124,12 @@ def _return_defalut_time() -> datetime:
     return return_to_work_time
 
 
-def _get_return_to_work_time(soup: BeautifulSoup) -> datetime:
+def _get_return_to_work_time(soup: "_IdIndex") -> datetime:
 
     """Функция парсинга данных времени возврата в работу.
 
     Args:
-        soup (BeautifulSoup): подготовленная для парсинга HTML страница.
+        soup (_IdIndex): индекс элементов подготовленной HTML страницы.
 
     Returns:
         datetime: время возврата в работу
@@ -149,12 +196,12 @@ def _get_return_to_work_time(soup: BeautifulSoup) -> datetime:
     return return_to_work_time
 
 
-def _get_service_params(soup: BeautifulSoup) -> Iterable[Union[Tuple, str]]:
+def _get_service_params(soup: "_IdIndex") -> Iterable[Union[Tuple, str]]:
 
     """Функция парсинга данных услуги.
 
     Args:
-        soup (BeautifulSoup): подготовленная для парсинга HTML страница.
+        soup (_IdIndex): индекс элементов подготовленной HTML страницы.
 
     Returns:
         Iterable[str]: коллекцию с параметрами.
@@ -175,12 +222,12 @@ def _get_service_params(soup: BeautifulSoup) -> Iterable[Union[Tuple, str]]:
     return (tuple(names), tuple(uuids))
 
 
-def _get_description(soup: BeautifulSoup) -> str:
+def _get_description(soup: "_IdIndex") -> str:
 
     """Функция парсинга данных описания обращения.
 
     Args:
-        soup (BeautifulSoup): подготовленная для парсинга HTML страница.
+        soup (_IdIndex): индекс элементов подготовленной HTML страницы.
 
     Returns:
         str: Описание обращения.
@@ -195,12 +242,12 @@ def _get_description(soup: BeautifulSoup) -> str:
     return ""
 
 
-def _get_creation_date(soup: BeautifulSoup) -> datetime:
+def _get_creation_date(soup: "_IdIndex") -> datetime:
 
     """Функция парсинга даты создания обращения.
 
     Args:
-        soup (BeautifulSoup): подготовленная для парсинга HTML страница.
+        soup (_IdIndex): индекс элементов подготовленной HTML страницы.
 
     Returns:
         datetime: дата создания обращения.
@@ -222,12 +269,12 @@ def _get_creation_date(soup: BeautifulSoup) -> datetime:
     return datetime.now()
 
 
-def _get_contragent_params(soup: BeautifulSoup) -> Iterable[str]:
+def _get_contragent_params(soup: "_IdIndex") -> Iterable[str]:
 
     """Функция парсинга данных контрагента.
 
     Args:
-        soup (BeautifulSoup): подготовленная для парсинга HTML страница.
+        soup (_IdIndex): индекс элементов подготовленной HTML страницы.
 
     Returns:
         Iterable[str]: Коллекцию с параметрами контрагента.
@@ -248,11 +295,11 @@ def _get_contragent_params(soup: BeautifulSoup) -> Iterable[str]:
     return ("", "")
 
 
-def _get_number(soup: BeautifulSoup) -> str:
+def _get_number(soup: "_IdIndex") -> str:
     """Функция парсинга номера обращения.
 
     Args:
-        soup (BeautifulSoup): подготовленная для парсинга HTML страница.
+        soup (_IdIndex): индекс элементов подготовленной HTML страницы.
 
     Returns:
         str
@@ -265,11 +312,11 @@ def _get_number(soup: BeautifulSoup) -> str:
     return number
 
 
-def _get_responsible(soup: BeautifulSoup) -> tuple["str", "str"]:
+def _get_responsible(soup: "_IdIndex") -> tuple["str", "str"]:
     """Функция парсинга ответсвенного за состояние.
 
     Args:
-        soup (BeautifulSoup): подготовленная для парсинга HTML страница.
+        soup (_IdIndex): индекс элементов подготовленной HTML страницы.
 
     Returns:
         str
@@ -294,11 +341,11 @@ def _get_responsible(soup: BeautifulSoup) -> tuple["str", "str"]:
     return uuid_responsible, name_responsible
 
 
-def _get_title(soup: BeautifulSoup) -> str:
+def _get_title(soup: "_IdIndex") -> str:
     """Функция парсинга названия обращения.
 
     Args:
-        soup (BeautifulSoup): подготовленная для парсинга HTML страница.
+        soup (_IdIndex): индекс элементов подготовленной HTML страницы.
 
     Returns:
         str
@@ -313,11 +360,11 @@ def _get_title(soup: BeautifulSoup) -> str:
     return ""
 
 
-def _get_step(soup: BeautifulSoup) -> str:
+def _get_step(soup: "_IdIndex") -> str:
     """Функция парсинга названия обращения.
 
     Args:
-        soup (BeautifulSoup): подготовленная для парсинга HTML страница.
+        soup (_IdIndex): индекс элементов подготовленной HTML страницы.
 
     Returns:
         str
@@ -332,11 +379,11 @@ def _get_step(soup: BeautifulSoup) -> str:
     return ""
 
 
-def _get_issue_type(soup: BeautifulSoup) -> str:
+def _get_issue_type(soup: "_IdIndex") -> str:
     """Функция парсинга названия обращения.
 
     Args:
-        soup (BeautifulSoup): подготовленная для парсинга HTML страница.
+        soup (_IdIndex): индекс элементов подготовленной HTML страницы.
 
     Returns:
         str
@@ -355,11 +402,11 @@ def _get_issue_type(soup: BeautifulSoup) -> str:
     return ""
 
 
-def _get_service_info(soup: BeautifulSoup) -> Union[Sequence[Sequence[Any]], Sequence]:
+def _get_service_info(soup: "_IdIndex") -> Union[Sequence[Sequence[Any]], Sequence]:
     """Функция парсинга информации по услугам.
 
     Args:
-        soup (BeautifulSoup): подготовленная для парсинга HTML страница.
+        soup (_IdIndex): индекс элементов подготовленной HTML страницы.
 
     Returns:
         Union[Sequence[Sequence[Any]], Sequence]: коллекция информации
@@ -396,11 +443,11 @@ def _get_service_info(soup: BeautifulSoup) -> Union[Sequence[Sequence[Any]], Seq
     return ()
 
 
-def _get_diagnostics(soup: BeautifulSoup) -> Union[Sequence[Sequence[Any]], Sequence]:
+def _get_diagnostics(soup: "_IdIndex") -> Union[Sequence[Sequence[Any]], Sequence]:
     """Функция парсинга диагностики.
 
     Args:
-        soup (BeautifulSoup): подготовленная для парсинга HTML страница.
+        soup (_IdIndex): индекс элементов подготовленной HTML страницы.
 
     Returns:
         Union[Sequence[Sequence[Any]], Sequence]: коллекция диагностики
@@ -439,11 +486,11 @@ def _get_diagnostics(soup: BeautifulSoup) -> Union[Sequence[Sequence[Any]], Sequ
     return ()
 
 
-def _get_required_date(soup: BeautifulSoup) -> Union[datetime, None]:
+def _get_required_date(soup: "_IdIndex") -> Union[datetime, None]:
     """Функция парсинга даты отработки по умолчанию.
 
     Args:
-        soup (BeautifulSoup): подготовленная для парсинга HTML страница.
+        soup (_IdIndex): индекс элементов подготовленной HTML страницы.
 
     Returns:
         Union[datetime, None]: обьект даты отработки заявки или None
@@ -459,11 +506,11 @@ def _get_required_date(soup: BeautifulSoup) -> Union[datetime, None]:
     return None
 
 
-def _get_close_date(soup: BeautifulSoup) -> Union[datetime, None]:
+def _get_close_date(soup: "_IdIndex") -> Union[datetime, None]:
     """Функция парсинга даты закрытия заявки.
 
     Args:
-        soup (BeautifulSoup): подготовленная для парсинга HTML страница.
+        soup (_IdIndex): индекс элементов подготовленной HTML страницы.
 
     Returns:
         Union[datetime, None]: обьект даты закрытия заявки или None
@@ -479,11 +526,11 @@ def _get_close_date(soup: BeautifulSoup) -> Union[datetime, None]:
     return None
 
 
-def _get_client_requisite(soup: BeautifulSoup) -> Union[Sequence[str], Sequence]:
+def _get_client_requisite(soup: "_IdIndex") -> Union[Sequence[str], Sequence]:
     """Функция парсинга реквизиты клиентов.
 
     Args:
-        soup (BeautifulSoup): подготовленная для парсинга HTML страница.
+        soup (_IdIndex): индекс элементов подготовленной HTML страницы.
 
     Returns:
         Union[Sequence[str], Sequence]: коллекция реквизитов клиента
@@ -537,11 +584,11 @@ def _get_client_requisite(soup: BeautifulSoup) -> Union[Sequence[str], Sequence]
     return ()
 
 
-def _get_contragent_category(soup: BeautifulSoup) -> str:
+def _get_contragent_category(soup: "_IdIndex") -> str:
     """Функция парсинга категории контрагента.
 
     Args:
-        soup (BeautifulSoup): подготовленная для парсинга HTML страница.
+        soup (_IdIndex): индекс элементов подготовленной HTML страницы.
 
     Returns:
         str: категория контрагента
@@ -556,11 +603,11 @@ def _get_contragent_category(soup: BeautifulSoup) -> str:
     return ""
 
 
-def _get_contact(soup: BeautifulSoup) -> Union[Sequence[str], Sequence]:
+def _get_contact(soup: "_IdIndex") -> Union[Sequence[str], Sequence]:
     """Функция парсинга контактов.
 
     Args:
-        soup (BeautifulSoup): подготовленная для парсинга HTML страница.
+        soup (_IdIndex): индекс элементов подготовленной HTML страницы.
 
     Returns:
         Union[Sequence[str], Sequence]: коллекция контактов
@@ -569,7 +616,7 @@ def _get_contact(soup: BeautifulSoup) -> Union[Sequence[str], Sequence]:
 
     """
     collection: List = []
-    category = _get_columns_name(soup)
+    category = _get_columns_name(soup.soup)
     result_table = soup.find(
         name="table",
         attrs={"id": "Request.ListsParent.ListsParent2.ContactPersonsList"},
@@ -4,11 +4,12 @@ from datetime import datetime, timedelta
 from re import findall
 from typing import Any, Iterable, Mapping, Sequence, Tuple, Union
 
-from bs4 import BeautifulSoup, element
+from bs4 import element
 
 from .parser_base import (
     _get_columns_name,
     _get_url_param_value,
+    _make_soup,
     _validate_text_for_parsing,
 )
 
@@ -44,6 +45,7 @@ class Issue:
         close_date: дата закрытия обращения
         client_requisite: реквизиты клиента
         contact: контакты клиента
+        card_error: ошибка получения карточки обращения, если она была
     """
 
     uuid: str = ""
@@ -70,6 +72,7 @@ class Issue:
     close_date: Union[datetime, None] = None
     client_requisite: Sequence = ()
     contact: Sequence = ()
+    card_error: str = ""
 
 
 def parse(
@@ -91,7 +94,7 @@ def parse(
     """
 
     _validate_text_for_parsing(text)
-    soup = BeautifulSoup(text, "html.parser")
+    soup = _make_soup(text)
     category = _get_columns_name(soup)
     rows = soup.select(".supp tr")[7:-1]
     if len(rows) < 1:
@@ -2,9 +2,7 @@ import logging
 from dataclasses import dataclass
 from typing import Mapping, Sequence
 
-from bs4 import BeautifulSoup
-
-from .parser_base import _validate_text_for_parsing
+from .parser_base import _make_soup, _validate_text_for_parsing
 
 log = logging.getLogger(__name__)
 
@@ -40,7 +38,7 @@ def parse(text: str, *args: Sequence, **kwargs: Mapping) -> int:
     """
 
     _validate_text_for_parsing(text)
-    soup = BeautifulSoup(text, "html.parser")
+    soup = _make_soup(text)
     i = 1
     raw_page_collection = []
     while i > 0:
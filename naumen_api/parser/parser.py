@@ -1,5 +1,5 @@
 import logging
-from typing import Callable, Mapping, Sequence, Union
+from typing import Any, Callable, List, Mapping, Sequence, Union
 
 from ..exceptions import CantGetData
 from . import (
@@ -13,18 +13,19 @@ from . import (
     search_result_issues,
     service_level,
 )
+from .executor import ParsingExecutor
 from .parser_base import PageType
 
 log = logging.getLogger(__name__)
 
 
-def parse_naumen_page(
+def _parse_naumen_page(
     page: str,
     type_page: Union[PageType, None],
     name_report: str = "",
 ) -> Sequence:
 
-    """Функция парсинга страниц из crm Naumen, входной интерфейс подмодуля.
+    """Функция парсинга страницы в текущем процессе.
 
     Args:
         page (str): страница которую требуется распарсить.
@@ -65,3 +66,65 @@ def parse_naumen_page(
     log.debug(f"Получен парсер: {parser.__name__} для страницы: {type_page}")
     parsed_collections = parser(page, name_report)
     return parsed_collections
+
+
+PARSING_EXECUTOR = ParsingExecutor(_parse_naumen_page)
+
+
+def parse_naumen_page(
+    page: str,
+    type_page: Union[PageType, None],
+    name_report: str = "",
+) -> Sequence:
+
+    """Функция парсинга страниц из crm Naumen, входной интерфейс подмодуля.
+    Если включён пул процессов, большие страницы разбираются в нём.
+
+    Args:
+        page (str): страница которую требуется распарсить.
+        type_page (Union[PageType, None]): тип страницы
+        name_report (str): уникальное имя сформированное отчёта.
+        По умолчанию ''
+
+    Returns:
+        Sequence: Результат парсинга страницы, коллекция распаршенных элементов
+
+    Raises:
+        CantGetData: в неправильном сценарии работы функции.
+
+    """
+
+    return PARSING_EXECUTOR.parse(page, type_page, name_report)
+
+
+def parse_naumen_pages(
+    pages: Sequence[str],
+    type_page: Union[PageType, None],
+    name_report: str = "",
+    return_exceptions: bool = False,
+) -> List[Any]:
+
+    """Функция парсинга нескольких страниц одного типа.
+    Если включён пул процессов, страницы разбираются параллельно,
+    маленькие страницы отправляются в процессы пачками.
+
+    Args:
+        pages (Sequence[str]): страницы которые требуется распарсить.
+        type_page (Union[PageType, None]): тип страниц
+        name_report (str): уникальное имя сформированное отчёта.
+        По умолчанию ''
+        return_exceptions (bool): вернуть ошибку парсинга страницы вместо
+        результата, не прерывая парсинг остальных. По умолчанию False
+
+    Returns:
+        List[Any]: Результаты парсинга в порядке страниц.
+
+    Raises:
+        CantGetData: в неправильном сценарии работы функции.
+
+    """
+
+    return PARSING_EXECUTOR.parse_many(
+        [(page, type_page, name_report) for page in pages],
+        return_exceptions,
+    )
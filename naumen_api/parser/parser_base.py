@@ -1,15 +1,71 @@
 import logging
+from collections import defaultdict
 from datetime import datetime, timedelta
-from typing import Dict, Iterable, List, Sequence, Union
+from typing import DefaultDict, Dict, Iterable, List, Sequence, Tuple, Union
 from urllib import parse
 
 from bs4 import BeautifulSoup
+from bs4.builder import builder_registry
 
+from ..config.config import get_config_value
 from ..config.structures import PageType
 from ..exceptions import CantGetData
 
 log = logging.getLogger(__name__)
 
+HTML_BACKENDS = ("html.parser", "lxml", "html5lib")
+_html_backend: Union[str, None] = None
+
+
+def set_html_backend(name: Union[str, None]) -> None:
+
+    """Функция выбора HTML бэкенда для всех парсеров.
+
+    Args:
+        name: html.parser, lxml, html5lib или auto - самый быстрый
+        из установленных. None - вернуть значение из конфигурации.
+
+    Raises:
+        ValueError: если бэкенд не поддерживается.
+    """
+
+    global _html_backend
+    if name is not None and name != "auto" and name not in HTML_BACKENDS:
+        raise ValueError(f"Unsupported html backend: {name}")
+    _html_backend = name
+
+
+def get_html_backend() -> str:
+
+    """Функция получения HTML бэкенда, которым будут разбираться страницы.
+    Если выбранный бэкенд не установлен, используется html.parser.
+
+    Returns:
+        str: название бэкенда для BeautifulSoup.
+    """
+
+    name = _html_backend or get_config_value("html_backend", default="html.parser")
+    if name == "auto":
+        name = "lxml" if builder_registry.lookup("lxml") else "html.parser"
+    if name not in HTML_BACKENDS or not builder_registry.lookup(name):
+        log.warning(f"HTML бэкенд {name} недоступен, используется html.parser")
+        name = "html.parser"
+    return name
+
+
+def _make_soup(text: str) -> BeautifulSoup:
+
+    """Функция подготовки HTML страницы к парсингу выбранным бэкендом.
+
+    Args:
+        text: сырой текст страницы.
+
+    Returns:
+        BeautifulSoup: подготовленная для парсинга HTML страница.
+    """
+
+    return BeautifulSoup(text, get_html_backend())
+
 
 def _get_date_range(
     date_first: Union[str, datetime],
@@ -52,32 +108,34 @@ def _forming_days_dict(
 ) -> Dict:
 
     """Функция для преобразование сырых спаршенных данных к словарю с
-    ключем по дню.
+    ключем по дню. Для FLR и AHT день определяется парой (День, Месяц).
 
     Args:
         date_range (Sequence[datetime]): последовательность дней.
         day_collection (Sequence): сырые данные из CRM.
+        report_type (PageType): тип отчёта.
 
     Returns:
         Mapping: словарю с ключем по дню.
     """
 
-    days: Dict = {}
-    if (
-        report_type == PageType.FLR_LEVEL_REPORT_PAGE
-        or report_type == PageType.AHT_LEVEL_REPORT_PAGE
-    ):
-
-        for day in date_range:
-            days[day.strftime("%d.%m.%Y")] = [
-                _
-                for _ in day_collection
-                if _["День"] == str(day.day) and _["Месяц"] == str(day.month)
-            ]
-        return days
+    with_month = report_type in (
+        PageType.FLR_LEVEL_REPORT_PAGE,
+        PageType.AHT_LEVEL_REPORT_PAGE,
+    )
+    # строки раскладываются по дням за один проход по отчёту.
+    rows_by_day: DefaultDict[Tuple, List] = defaultdict(list)
+    for row in day_collection:
+        key = (row.get("День"), row.get("Месяц")) if with_month else (row.get("День"),)
+        rows_by_day[key].append(row)
 
+    days: Dict = {}
     for day in date_range:
-        days[str(day.day)] = [_ for _ in day_collection if _["День"] == str(day.day)]
+        if with_month:
+            key = (str(day.day), str(day.month))
+            days[day.strftime("%d.%m.%Y")] = list(rows_by_day.get(key, ()))
+        else:
+            days[str(day.day)] = list(rows_by_day.get((str(day.day),), ()))
     return days
 
 
@@ -224,7 +282,11 @@ def _get_url_param_value(url: str, needed_param: str) -> str:
     if not url:
         log.error(f"Передан несуществующий URL: {url}")
         raise CantGetData
-    param_value = parse.parse_qs(parse.urlparse(url).query)[needed_param][0]
+    try:
+        param_value = parse.parse_qs(parse.urlparse(url).query)[needed_param][0]
+    except (KeyError, IndexError):
+        log.error(f"В URL: {url} нет параметра: {needed_param}")
+        raise CantGetData
     return param_value
 
 
@@ -1,12 +1,14 @@
 import logging
-from typing import Sequence, Union
+import re
+from typing import Sequence, Tuple, Union
 
-from bs4 import BeautifulSoup
-
-from .parser_base import _get_url_param_value, _validate_text_for_parsing
+from ..exceptions import CantGetData
+from .parser_base import _get_url_param_value, _make_soup, _validate_text_for_parsing
 
 log = logging.getLogger(__name__)
 
+GENERATED_REPORT_NAME = re.compile(r"^ID\d{7}-(\d+)$")
+
 
 def parse(text: str, name: str) -> Union[Sequence[str], None]:
 
@@ -25,7 +27,7 @@ def parse(text: str, name: str) -> Union[Sequence[str], None]:
 
     log.debug(f"Поиск отчета с именем: {name}")
     _validate_text_for_parsing(text)
-    soup = BeautifulSoup(text, "html.parser")
+    soup = _make_soup(text)
     report_tag = soup.select(f'[title="{name}"]')
     if report_tag:
         log.debug(f"Отчет с именем {name} найден.")
@@ -33,3 +35,40 @@ def parse(text: str, name: str) -> Union[Sequence[str], None]:
         return (str(_get_url_param_value(url, "uuid")),)
     log.debug(f"Отчет с именем {name} не найден.")
     return None
+
+
+def find_generated_reports(
+    text: str,
+    created_before: float,
+) -> Sequence[Tuple[str, str]]:
+
+    """Функция поиска на странице со списком отчётов всех отчётов,
+    созданных клиентом раньше created_before, по шаблону имени
+    get_report_name().
+
+    Args:
+        text: сырой текст страницы.
+        created_before: время создания отчёта в секундах epoch, начиная
+        с которого отчёты не возвращаются.
+
+    Returns:
+        Sequence[Tuple[str, str]]: имена и UUID найденных отчётов.
+
+    Raises:
+
+    """
+
+    _validate_text_for_parsing(text)
+    soup = _make_soup(text)
+    reports = []
+    for report_tag in soup.find_all(title=GENERATED_REPORT_NAME, href=True):
+        created = GENERATED_REPORT_NAME.match(report_tag["title"])
+        if created is None or int(created.group(1)) >= created_before:
+            continue
+        try:
+            uuid = _get_url_param_value(report_tag["href"], "uuid")
+        except CantGetData:
+            continue
+        reports.append((report_tag["title"], str(uuid)))
+    log.debug(f"Найдено созданных клиентом отчетов: {len(reports)}")
+    return tuple(reports)
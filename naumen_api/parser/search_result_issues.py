@@ -7,6 +7,7 @@ from bs4 import BeautifulSoup
 from .parser_base import (
     _get_columns_name,
     _get_url_param_value,
+    _make_soup,
     _validate_text_for_parsing,
 )
 
@@ -62,7 +63,7 @@ def parse(
         CantGetData: Если не удалось найти данные.
     """
     _validate_text_for_parsing(text)
-    soup = BeautifulSoup(text, "html.parser")
+    soup = _make_soup(text)
     category = _get_columns_name(soup)
     collection = _parse_result_table(soup, category)
     return collection
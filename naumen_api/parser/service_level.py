@@ -3,16 +3,14 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import Dict, Mapping, Sequence, Union
 
-from bs4 import BeautifulSoup
-
 from ..config.config import CONFIG
-from ..exceptions import CantGetData
 from .parser_base import (
     PageType,
     _forming_days_collecion,
     _forming_days_dict,
     _get_columns_name,
     _get_date_range,
+    _make_soup,
     _parse_date_report,
     _validate_text_for_parsing,
 )
@@ -66,7 +64,7 @@ def parse(
     support_group_count = 2
     log.debug("Запуск парсинг отчёта SL")
     _validate_text_for_parsing(text)
-    soup = BeautifulSoup(text, "html.parser")
+    soup = _make_soup(text)
     start_date, end_date = _parse_date_report(
         soup,
         "Дата перевода, с",
@@ -94,8 +92,8 @@ def parse(
     group = set([_["Группа"] for _ in day_collection])
 
     if not len(group):
-        log.error("Количество групп ТП равно нулю.")
-        raise CantGetData
+        # за период без обращений отчёт содержит только итоговые строки.
+        log.warning("Количество групп ТП равно нулю.")
 
     if len(group) == support_group_count / 2:
         log.warning(
@@ -110,8 +108,7 @@ def parse(
         log.warning(group)
 
         if len(group) != support_group_count:
-            log.error("Дефолтные значения не подходят.")
-            raise CantGetData
+            log.warning("Дефолтные значения не подходят, используются найденные.")
 
     days = _service_lavel_data_completion(days, tuple(group), label)
     collection = _formating_service_level_data(days)
@@ -229,3 +226,40 @@ def _formating_service_level_data(
         day_collection.append(sl)
         collection.append(day_collection)
     return tuple(collection)
+
+
+def _merged_data_completion(
+    collection: Sequence[Sequence[ServiceLevel]],
+) -> Sequence[Sequence[ServiceLevel]]:
+
+    """Функция для дополнения отчёта Service Level, собранного из нескольких
+        отчётов. Отчёт за день без обращений одной или всех групп содержит
+        только найденные группы, поэтому после объединения в каждый день
+        добавляются недостающие группы периода.
+
+    Args:
+        collection: коллекция дней объединённого отчёта.
+
+    Returns:
+        Sequence[Sequence[ServiceLevel]]: дополненная коллекция.
+    """
+
+    groups: Dict[str, None] = {}
+    for day_content in collection:
+        for sl in day_content:
+            if sl.group != "Итог":
+                groups.setdefault(sl.group)
+
+    today = datetime.now().day
+    completed = []
+    for day_content in collection:
+        *day_groups, total = day_content
+        found = {sl.group for sl in day_groups}
+        service_level = 100.0 if today >= int(total.day) else 0.0
+        missing = [
+            ServiceLevel(total.day, group, 0, 0, 0, 0, service_level)
+            for group in groups
+            if group not in found
+        ]
+        completed.append([*day_groups, *missing, total])
+    return tuple(completed)
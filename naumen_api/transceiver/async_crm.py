@@ -0,0 +1,323 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from time import monotonic
+from typing import Any, Literal, Mapping, Sequence, Tuple, Union
+from uuid import uuid4
+
+import aiohttp
+
+from ..config.config import CONFIG, create_naumen_request, get_config_value
+from ..config.structures import Credentials, NaumenRequestType, SearchType, TypeReport
+from ..exceptions import CantGetData, ConnectionsFailed
+from .crm import _is_login_response
+from .throttle import CRM_THROTTLE
+from .transport import get_accept_encoding, get_timeout
+
+log = logging.getLogger(__name__)
+DOMAIN = str
+
+
+@dataclass
+class AsyncSessionState:
+
+    """Класс данных для хранения состояния асинхронной сессии с CRM Naumen.
+
+    Attributes:
+        lock: блокировка повторного входа.
+        generation: количество входов в CRM за время жизни сессии.
+        last_used: время monotonic последнего запроса.
+        keep_alive: задача поддержания сессии.
+        healthy: удался ли последний вход в CRM.
+        failed_at: время monotonic последнего неудачного входа.
+        token: случайный идентификатор сессии для ключей кэша.
+    """
+
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    generation: int = 0
+    last_used: float = field(default_factory=monotonic)
+    keep_alive: Union["asyncio.Task[None]", None] = None
+    healthy: bool = True
+    failed_at: float = 0.0
+    token: str = field(default_factory=lambda: uuid4().hex)
+
+
+@dataclass(frozen=True)
+class AsyncActiveConnect:
+
+    """Класс данных для хранения асинхронной сессии c CRM Naumen.
+
+    Attributes:
+        session: активное асинхронное соединение с crm системой.
+        credentials: учетные данные для повторного входа.
+        state: состояние сессии.
+    """
+
+    session: aiohttp.ClientSession
+    credentials: Union[Credentials, None] = field(default=None, compare=False)
+    state: AsyncSessionState = field(
+        default_factory=AsyncSessionState,
+        compare=False,
+        repr=False,
+    )
+
+
+async def get_session(
+    username: str,
+    password: str,
+    domain: DOMAIN,
+) -> AsyncActiveConnect:
+    """Функция для создания асинхронной сессии с CRM системой.
+    Учетные данные сохраняются в сессии для повторного входа, если сессия
+    в CRM истечет. Если в конфигурации задан keep_alive_interval, сессия
+    поддерживается фоновой задачей.
+
+    Args:
+        username: имя пользователя в Naumen
+        password: пароль пользователя
+        domain: домен учетной записи
+
+    Returns:
+        AsyncActiveConnect: обьект сессии с CRM системой.
+
+    Raises:
+        ConnectionsFailed: если не удалось подключиться к CRM системе.
+
+    """
+
+    url = CONFIG.config["url"]["login"]
+    if not all([username, password, domain, url]):
+        raise ConnectionsFailed
+
+    connector = aiohttp.TCPConnector(
+        limit_per_host=get_config_value("transport", "pool_maxsize", default=10),
+        ssl=False,
+    )
+    session = aiohttp.ClientSession(
+        connector=connector,
+        cookie_jar=aiohttp.CookieJar(unsafe=True),
+        headers={"Accept-Encoding": get_accept_encoding()},
+        timeout=_client_timeout(None),
+    )
+    credentials = Credentials(username, password, domain)
+    try:
+        await _login(session, credentials)
+    except ConnectionsFailed:
+        await session.close()
+        raise
+
+    crm = AsyncActiveConnect(session, credentials)
+    interval = float(get_config_value("session", "keep_alive_interval", default=0))
+    if interval > 0:
+        crm.state.keep_alive = asyncio.ensure_future(_keep_alive(crm, interval))
+    return crm
+
+
+async def close_session(crm: AsyncActiveConnect) -> None:
+    """Функция закрытия асинхронной сессии с CRM системой.
+
+    Args:
+        crm: асинхронная сессия с CRM Naumen.
+    """
+
+    if crm.state.keep_alive is not None:
+        crm.state.keep_alive.cancel()
+    await crm.session.close()
+
+
+async def relogin(
+    crm: AsyncActiveConnect,
+    generation: Union[int, None] = None,
+) -> bool:
+    """Функция повторного входа в CRM с сохраненными учетными данными.
+    Если несколько задач одновременно обнаружили истекшую сессию, вход
+    выполняет только первая из них.
+
+    Args:
+        crm: асинхронная сессия с CRM Naumen.
+        generation: номер входа, при котором сессия оказалась истекшей.
+
+    Returns:
+        bool: True, если сессию можно использовать дальше.
+    """
+
+    if crm.credentials is None:
+        return False
+    if not get_config_value("session", "relogin", default=True):
+        return False
+    async with crm.state.lock:
+        if generation is not None and generation != crm.state.generation:
+            return True
+        try:
+            await _login(crm.session, crm.credentials)
+        except ConnectionsFailed:
+            log.error("Не удалось повторно войти в CRM Naumen.")
+            crm.state.healthy, crm.state.failed_at = False, monotonic()
+            return False
+        crm.state.generation += 1
+        crm.state.healthy = True
+    log.info("Выполнен повторный вход в CRM Naumen.")
+    return True
+
+
+async def ping(crm: AsyncActiveConnect) -> bool:
+    """Функция проверки сессии запросом к главной странице CRM.
+    Истекшая сессия обновляется повторным входом.
+
+    Args:
+        crm: асинхронная сессия с CRM Naumen.
+
+    Returns:
+        bool: True, если сессию можно использовать.
+    """
+
+    url = get_config_value("session", "keep_alive_url", default="")
+    url = url or CONFIG.config["url"]["main"]
+    generation = crm.state.generation
+    try:
+        async with crm.session.get(
+            url,
+            headers=CONFIG.config["headers"],
+            timeout=_client_timeout(None),
+        ) as response:
+            text = await response.text()
+            expired = _is_login_response(
+                response.status,
+                str(response.url),
+                bool(response.history),
+                text,
+            )
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as exc:
+        log.warning(f"Ошибка проверки сессии с CRM Naumen: {exc!r}")
+        return False
+    finally:
+        crm.state.last_used = monotonic()
+    if expired:
+        log.info("Сессия с CRM Naumen истекла, выполняется повторный вход.")
+        return await relogin(crm, generation)
+    return True
+
+
+async def get_crm_response(
+    crm: AsyncActiveConnect,
+    obj: Union[TypeReport, SearchType],
+    request_type: NaumenRequestType,
+    *args: Sequence,
+    mod_params: Union[Tuple[Tuple[str, Any]], Tuple] = (),
+    mod_data: Union[Tuple[Tuple[str, Any]], Tuple] = (),
+    method: Literal["GET", "POST"] = "POST",
+    **kwargs: Mapping,
+) -> str:
+    """Функция для получения ответа из CRM системы без блокировки цикла событий.
+
+    Args:
+        crm: асинхронная сессия с CRM Naumen или пул сессий.
+        obj (Union[TypeReport, SearchType]): обьект которого строится запрос.
+        mod_params (Union[Tuple[Tuple[str, Any]], Tuple]): модифицированные
+        параметры запроса
+        mod_data (Union[Tuple[Tuple[str, Any]], Tuple]): модифицированные
+        данные запроса
+        method: HTTP метод.
+
+    Returns:
+        str: текст ответа сервера CRM системы Naumen
+
+    Raises:
+        CantGetData: если не удалось получить ответ.
+        CrmUnavailable: если запрос не отправлен ограничителем нагрузки.
+
+    """
+    lease = getattr(crm, "lease", None)
+    if lease is not None:
+        # передан пул сессий, запрос выполняется в выданной сессии.
+        async with lease() as connect:
+            return await get_crm_response(
+                connect,
+                obj,
+                request_type,
+                *args,
+                mod_params=mod_params,
+                mod_data=mod_data,
+                method=method,
+                **kwargs,
+            )
+
+    rq = create_naumen_request(obj, request_type, mod_params, mod_data, *args, **kwargs)
+    request_kwargs: Mapping[str, Any] = {
+        "headers": rq.headers,
+        "params": rq.params,
+        "ssl": bool(rq.verify),
+        "timeout": _client_timeout(request_type),
+    }
+    for attempt in range(2):
+        generation = crm.state.generation
+        delay = CRM_THROTTLE.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if method == "POST":
+            request = crm.session.post(rq.url, data=rq.data, **request_kwargs)
+        else:
+            request = crm.session.get(rq.url, **request_kwargs)
+
+        try:
+            async with request as _response:
+                status = _response.status
+                text = await _response.text() if status == 200 else ""
+                expired = _is_login_response(
+                    status,
+                    str(_response.url),
+                    bool(_response.history),
+                    text,
+                )
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            CRM_THROTTLE.record(False)
+            raise
+        CRM_THROTTLE.record(status < 500)
+        if not expired:
+            break
+        log.warning("Сессия с CRM Naumen истекла.")
+        if attempt or not await relogin(crm, generation):
+            raise CantGetData
+    crm.state.last_used = monotonic()
+    if status != 200:
+        raise CantGetData
+    return text
+
+
+def _client_timeout(
+    request_type: Union[NaumenRequestType, None],
+) -> aiohttp.ClientTimeout:
+    connect, read = get_timeout(request_type)
+    return aiohttp.ClientTimeout(sock_connect=connect, sock_read=read)
+
+
+async def _login(session: aiohttp.ClientSession, credentials: Credentials) -> None:
+    data = {
+        "login": credentials.username,
+        "password": credentials.password,
+        "domain": credentials.domain,
+    }
+    try:
+        async with session.post(CONFIG.config["url"]["login"], data=data) as response:
+            if response.status != 200:
+                raise ConnectionsFailed
+            await response.read()
+    except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+        raise ConnectionsFailed from exc
+
+
+async def _keep_alive(crm: AsyncActiveConnect, interval: float) -> None:
+
+    """Корутина поддержания сессии с CRM.
+    Если сессия не использовалась interval секунд, она проверяется функцией
+    ping. Работает до закрытия сессии.
+
+    Args:
+        crm: асинхронная сессия с CRM Naumen.
+        interval: интервал запросов, сек.
+    """
+
+    while not crm.session.closed:
+        await asyncio.sleep(max(0.0, interval - (monotonic() - crm.state.last_used)))
+        if monotonic() - crm.state.last_used >= interval:
+            await ping(crm)
@@ -0,0 +1,692 @@
+import asyncio
+import logging
+from time import monotonic, time
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    List,
+    Mapping,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+import aiohttp
+
+from ..config.config import (
+    get_config_value,
+    get_report_name,
+    get_search_create_report_params,
+)
+from ..config.structures import NaumenRequestType, SearchOptions, TypeReport
+from ..exceptions import CantGetData
+from ..parser.issues import Issue
+from ..parser.parser import parse_naumen_page
+from ..parser.parser_base import PageType
+from ..parser.report_page import find_generated_reports, parse as parse_report_list
+from .async_crm import AsyncActiveConnect, get_crm_response
+from .async_session_pool import leased
+from .cache import ISSUE_CARD_CACHE
+from .coalescing import REPORT_COALESCER, make_report_key
+from .instrumentation import INSTRUMENTATION, Stage
+from .janitor import owns, sweep_targets
+from .polling import POLLING_STRATEGY
+from .report_cache import REPORT_CACHE, account_key
+from .segments import SEGMENT_STORE
+from .reports import (
+    REPORT_JANITOR,
+    _apply_issue_cards,
+    _check_issues_report_keys,
+    _parse_issue_cards,
+)
+
+log = logging.getLogger(__name__)
+
+_DELETE_TASKS: Dict["asyncio.Task[None]", AsyncActiveConnect] = {}
+_DELAYED_TASKS: Set["asyncio.Task[None]"] = set()
+# отложенные удаления, задержку которых прервал wait_deletions.
+_FLUSHED_TASKS: Set["asyncio.Task[None]"] = set()
+# ошибки получения карточки, при которых обращение отдается без неё.
+_CARD_ERRORS = (CantGetData, aiohttp.ClientError, AttributeError, ValueError)
+
+
+async def get_report(
+    crm: AsyncActiveConnect,
+    report: TypeReport,
+    *args: Sequence,
+    naumen_uuid: str = "",
+    mod_params: Union[Tuple[Tuple[str, Any]], Tuple] = (),
+    mod_data: Union[Tuple[Tuple[str, Any]], Tuple] = (),
+    **kwargs: Mapping,
+) -> Sequence:
+    """Асинхронная функция для получения отчёта из CRM.
+    Отчёты SL, MTTR, FLR и AHT берутся из кэша отчётов, если такой отчёт
+    уже был получен, иначе собираются по дням: из CRM запрашиваются только
+    дни, которых нет в хранилище. Одновременные одинаковые запросы
+    формируют отчёт один раз.
+
+    Args:
+        crm (AsyncActiveConnect): асинхронное соединение с CRM.
+        report (TypeReport): отчёт, который необходимо получить.
+        *args (Sequence): позиционные аргументы(не используются)
+
+    Kwargs:
+        naumen_uuid (str): uuid уже созданного отчёта.
+        mod_params (Union[Tuple[Tuple[str, Any]], Tuple]): обновленные
+        параметры
+        mod_data (Union[Tuple[Tuple[str, Any]], Tuple]): обновленные
+        данные запроса
+        **kwargs: именнованные аргументы для создания отчёта.
+
+    Returns:
+        Sequence: коллекция обьектов необходимого отчёта.
+    Raises:
+        CantGetData: в случае невозможности вернуть коллекцию.
+    """
+
+    if naumen_uuid:
+        return await _build_report(
+            crm,
+            report,
+            *args,
+            naumen_uuid=naumen_uuid,
+            mod_params=mod_params,
+            mod_data=mod_data,
+            **kwargs,
+        )
+
+    account = account_key(crm)
+    collect = REPORT_CACHE.get(report, mod_data, mod_params, account=account)
+    if collect is not None:
+        return collect
+
+    async def _collect() -> Sequence:
+        collect = await SEGMENT_STORE.assemble_async(
+            report,
+            mod_data,
+            mod_params,
+            lambda data: _build_report(
+                crm,
+                report,
+                *args,
+                mod_params=mod_params,
+                mod_data=data,
+                **kwargs,
+            ),
+            account=account,
+        )
+        REPORT_CACHE.put(report, mod_data, collect, mod_params, account=account)
+        return collect
+
+    return await REPORT_COALESCER.run_async(
+        make_report_key(crm, report, mod_data, mod_params, kwargs),
+        _collect,
+    )
+
+
+async def _build_report(
+    crm: AsyncActiveConnect,
+    report: TypeReport,
+    *args: Sequence,
+    naumen_uuid: str = "",
+    mod_params: Union[Tuple[Tuple[str, Any]], Tuple] = (),
+    mod_data: Union[Tuple[Tuple[str, Any]], Tuple] = (),
+    **kwargs: Mapping,
+) -> Sequence:
+    """Асинхронная функция формирования отчёта в CRM, его получения и разбора.
+    Если такой же отчёт был недавно сформирован, открывается он.
+
+    Args:
+        crm (AsyncActiveConnect): асинхронное соединение с CRM.
+        report (TypeReport): отчёт, который необходимо получить.
+        *args (Sequence): позиционные аргументы(не используются)
+
+    Kwargs:
+        naumen_uuid (str): uuid уже созданного отчёта.
+        mod_params (Union[Tuple[Tuple[str, Any]], Tuple]): обновленные
+        параметры
+        mod_data (Union[Tuple[Tuple[str, Any]], Tuple]): обновленные
+        данные запроса
+        **kwargs: именнованные аргументы для создания отчёта.
+
+    Returns:
+        Sequence: коллекция обьектов необходимого отчёта.
+    Raises:
+        CantGetData: в случае невозможности вернуть коллекцию.
+    """
+
+    need_delete_report = not naumen_uuid
+    reuse_key = make_report_key(crm, report, mod_data, mod_params, kwargs)
+    if need_delete_report:
+        reused_uuid = REPORT_COALESCER.recall(reuse_key)
+        if reused_uuid:
+            try:
+                return await _build_report(
+                    crm,
+                    report,
+                    *args,
+                    naumen_uuid=reused_uuid,
+                    mod_params=mod_params,
+                    mod_data=mod_data,
+                    **kwargs,
+                )
+            except CantGetData:
+                log.debug(f"Отчёт {reused_uuid} недоступен, формируется новый.")
+                REPORT_COALESCER.forget(reuse_key)
+
+    is_vip_issues = report == TypeReport.ISSUES_VIP_LINE
+    parse_issue_history, parse_issue_card = False, False
+    report_name = get_report_name()
+
+    if report in [TypeReport.ISSUES_FIRST_LINE, TypeReport.ISSUES_VIP_LINE]:
+        parse_issue_history, parse_issue_card, kwargs = _check_issues_report_keys(
+            **kwargs,
+        )
+
+    # отчёт формируется, ищется и открывается в одной сессии пула.
+    async with leased(crm) as connect:
+        delete_delay = None
+        try:
+            if need_delete_report:
+                _: Mapping[str, Any] = dict(mod_data)
+                _.update({"title": report_name})
+                mod_data = tuple(_.items())
+
+                with INSTRUMENTATION.measure(Stage.CREATE, report.name):
+                    await get_crm_response(
+                        connect,
+                        report,
+                        NaumenRequestType.CREATE_REPORT,
+                        *args,
+                        mod_params=mod_params,
+                        mod_data=mod_data,
+                        method="POST",
+                        **kwargs,
+                    )
+                params_for_search_report = get_search_create_report_params(
+                    report,
+                    report_name,
+                )
+                naumen_uuid = await _find_report_uuid(
+                    connect,
+                    params_for_search_report,
+                    report,
+                )
+
+            log.debug(f"Найден UUID сформированного отчёта : {naumen_uuid}")
+
+            with INSTRUMENTATION.measure(Stage.DOWNLOAD, report.name) as counters:
+                report_page = await get_crm_response(
+                    connect,
+                    report,
+                    NaumenRequestType.SEARCH_REPORT,
+                    mod_params=tuple({"uuid": naumen_uuid}.items()),
+                    method="GET",
+                )
+                counters.bytes = len(report_page.encode())
+            if need_delete_report:
+                delete_delay = REPORT_COALESCER.remember(reuse_key, naumen_uuid)
+        finally:
+            # без uuid отчёт ищется для удаления по названию.
+            if need_delete_report and naumen_uuid:
+                _schedule_delete(connect, report, naumen_uuid, delete_delay)
+            elif need_delete_report:
+                _schedule_delete(
+                    connect,
+                    report,
+                    "",
+                    REPORT_JANITOR.retry_delay,
+                    name=report_name,
+                )
+    with INSTRUMENTATION.measure(Stage.PARSE, report.name) as counters:
+        collect = await _parse_page(report_page, report.page)
+        counters.rows = len(collect)
+
+    if is_vip_issues:
+        for vip_issue in collect:
+            if vip_issue:
+                vip_issue.vip_contragent = True
+
+    if parse_issue_card:
+        log.debug("Парсинг карточек обращений.")
+        collect = await _enrich_issue_cards(crm, collect)
+
+    if parse_issue_history:
+        log.debug("Парсинг истории обращений.")
+        raise NotImplementedError
+
+    return collect
+
+
+async def _parse_page(
+    page: str,
+    type_page: Union[PageType, None],
+    name_report: str = "",
+) -> Sequence:
+
+    """Функция парсинга страницы в пуле потоков, чтобы не блокировать
+    цикл событий.
+
+    Args:
+        page (str): страница которую требуется распарсить.
+        type_page (Union[PageType, None]): тип страницы
+        name_report (str): уникальное имя сформированное отчёта.
+
+    Returns:
+        Sequence: Результат парсинга страницы.
+    """
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        None,
+        parse_naumen_page,
+        page,
+        type_page,
+        name_report,
+    )
+
+
+async def iter_issues(
+    crm: AsyncActiveConnect,
+    report: TypeReport,
+    *args: Sequence,
+    mod_params: Union[Tuple[Tuple[str, Any]], Tuple] = (),
+    mod_data: Union[Tuple[Tuple[str, Any]], Tuple] = (),
+    **kwargs: Mapping,
+) -> AsyncIterator[Issue]:
+    """Асинхронный генератор обращений из таблицы обращений на линии.
+    Если нужно парсить карточки, обращения отдаются по одному, как только
+    готова карточка очередного обращения.
+
+    Args:
+        crm (AsyncActiveConnect): асинхронное соединение с CRM.
+        report (TypeReport): таблица обращений первой или vip линии.
+        *args (Sequence): позиционные аргументы(не используются)
+
+    Kwargs:
+        mod_params (Union[Tuple[Tuple[str, Any]], Tuple]): обновленные
+        параметры
+        mod_data (Union[Tuple[Tuple[str, Any]], Tuple]): обновленные
+        данные запроса
+        **kwargs: именнованные аргументы для создания отчёта.
+
+    Yields:
+        Issue: очередное обращение.
+
+    Raises:
+        CantGetData: в случае невозможности получить таблицу обращений.
+    """
+
+    parse_issue_history, parse_issue_card, kwargs = _check_issues_report_keys(**kwargs)
+    issues = await get_report(
+        crm,
+        report,
+        *args,
+        mod_params=mod_params,
+        mod_data=mod_data,
+        parse_issue_history=parse_issue_history,
+        **kwargs,
+    )
+    if not parse_issue_card:
+        for issue in issues:
+            yield issue
+        return
+    async for issue in _iter_enriched_issues(crm, issues):
+        yield issue
+
+
+async def _enrich_issue_cards(
+    crm: AsyncActiveConnect,
+    issues: Sequence[Issue],
+) -> List[Issue]:
+
+    """Функция для дополнения обращений данными с их карточек.
+
+    Args:
+        crm (AsyncActiveConnect): асинхронное соединение с CRM.
+        issues (Sequence[Issue]): обращения, которые необходимо дополнить.
+
+    Returns:
+        List[Issue]: обращения в исходном порядке.
+    """
+
+    return [issue async for issue in _iter_enriched_issues(crm, issues)]
+
+
+async def _iter_enriched_issues(
+    crm: AsyncActiveConnect,
+    issues: Sequence[Issue],
+) -> AsyncIterator[Issue]:
+
+    """Асинхронный генератор обращений, дополненных данными с их карточек.
+    Карточки запрашиваются одновременно, но не более issue_card_workers
+    запросов сразу, и разбираются пачками по issue_card_workers функцией
+    parse_naumen_pages. Не изменившиеся карточки берутся из кэша. Ошибка
+    получения одной карточки не прерывает сбор остальных, причина
+    записывается в атрибут card_error.
+
+    Args:
+        crm (AsyncActiveConnect): асинхронное соединение с CRM.
+        issues (Sequence[Issue]): обращения, которые необходимо дополнить.
+
+    Yields:
+        Issue: обращения в исходном порядке.
+    """
+
+    workers = max(1, get_config_value("issue_card_workers", default=8))
+    semaphore = asyncio.Semaphore(workers)
+
+    async def _load_issue_card(issue: Issue) -> Union[Issue, str]:
+        cached_card = ISSUE_CARD_CACHE.get(issue)
+        if cached_card is not None:
+            return cached_card
+        async with semaphore:
+            return await _get_issue_card_page(crm, issue.uuid)
+
+    loop = asyncio.get_running_loop()
+    tasks = [asyncio.ensure_future(_load_issue_card(issue)) for issue in issues]
+    try:
+        for start in range(0, len(issues), workers):
+            window = issues[start:start + workers]
+            loaded: List[Any] = []
+            for task in tasks[start:start + workers]:
+                try:
+                    loaded.append(await task)
+                except _CARD_ERRORS as exc:
+                    loaded.append(exc)
+            cards = await loop.run_in_executor(
+                None,
+                _parse_issue_cards,
+                window,
+                loaded,
+            )
+            for issue in _apply_issue_cards(window, cards, _CARD_ERRORS):
+                yield issue
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def _get_issue_card_page(crm: AsyncActiveConnect, naumen_uuid: str) -> str:
+
+    """Асинхронная версия функции reports._get_issue_card_page.
+
+    Args:
+        crm (AsyncActiveConnect): асинхронное соединение с CRM.
+        naumen_uuid (str): uuid обращения в CRM NAUMEN.
+
+    Returns:
+        str: страница карточки.
+
+    Raises:
+        CantGetData: в случае невозможности получить карточку.
+    """
+
+    report = TypeReport.ISSUE_CARD
+    with INSTRUMENTATION.measure(Stage.DOWNLOAD, report.name) as counters:
+        page = await get_crm_response(
+            crm,
+            report,
+            NaumenRequestType.SEARCH_REPORT,
+            mod_params=(("uuid", naumen_uuid),),
+            method="GET",
+        )
+        counters.bytes = len(page.encode())
+    return page
+
+
+async def _delete_report(
+    crm: AsyncActiveConnect,
+    report: TypeReport,
+    uuid: str,
+) -> bool:
+    """Функция удаления созданного отчета в CRM Naumen.
+
+    Args:
+        crm (AsyncActiveConnect): асинхронное соединение с CRM.
+        report (TypeReport): тип отчёта.
+        uuid (str): uuid отчёта.
+
+    Raises:
+        CantGetData: если не удалось получить ответ.
+
+    Returns:
+        bool: статус True или False, в случае успеха или неудачи.
+    """
+
+    log.debug(f"Удаление созданного отчета в CRM Наумен: {uuid}")
+    with INSTRUMENTATION.measure(Stage.DELETE, report.name):
+        await get_crm_response(
+            crm,
+            report,
+            NaumenRequestType.DELETE_REPORT,
+            mod_params=tuple({"uuid": uuid}.items()),
+            method="GET",
+        )
+    log.debug("Отчет в CRM Наумен удален.")
+    return True
+
+
+def _schedule_delete(
+    crm: AsyncActiveConnect,
+    report: TypeReport,
+    uuid: str,
+    delay: Union[float, None] = None,
+    *,
+    name: str = "",
+) -> None:
+
+    """Функция запуска фонового удаления отчёта в CRM Naumen.
+    Ответ на запрос не ждёт удаления, неудачное удаление повторяется
+    с параметрами REPORT_JANITOR.
+
+    Args:
+        crm (AsyncActiveConnect): асинхронное соединение с CRM.
+        report (TypeReport): тип отчёта.
+        uuid (str): uuid отчёта, пустой - отчёт ищется по названию.
+        delay (Union[float, None]): задержка удаления, сек.
+
+    Kwargs:
+        name (str): название отчёта с неизвестным uuid.
+    """
+
+    task = asyncio.ensure_future(
+        _delete_with_retries(crm, report, uuid, delay, name=name),
+    )
+    _DELETE_TASKS[task] = crm
+    task.add_done_callback(lambda done: _DELETE_TASKS.pop(done, None))
+    if delay:
+        _DELAYED_TASKS.add(task)
+        task.add_done_callback(_DELAYED_TASKS.discard)
+        task.add_done_callback(_FLUSHED_TASKS.discard)
+
+
+async def _delete_with_retries(
+    crm: AsyncActiveConnect,
+    report: TypeReport,
+    uuid: str,
+    delay: Union[float, None] = None,
+    *,
+    name: str = "",
+) -> None:
+    if delay:
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            # задержку прерывает wait_deletions, отчёт удаляется сразу.
+            # Прочие отмены (например, остановка цикла) не подавляются,
+            # отчёт удалит очистка при следующем подключении.
+            if asyncio.current_task() not in _FLUSHED_TASKS:
+                raise
+        _FLUSHED_TASKS.discard(asyncio.current_task())  # type: ignore
+        _DELAYED_TASKS.discard(asyncio.current_task())  # type: ignore
+    attempts = 0
+    while True:
+        try:
+            if not uuid:
+                uuid = await _find_report_by_name(crm, report, name)
+            await _delete_report(crm, report, uuid)
+            return
+        except (CantGetData, aiohttp.ClientError, asyncio.TimeoutError) as exc:
+            attempts += 1
+            log.warning(f"Ошибка удаления отчёта {uuid or name}: {exc!r}")
+            if attempts > REPORT_JANITOR.max_retries or crm.session.closed:
+                log.error(f"Отчёт {uuid or name} не удален из CRM Naumen.")
+                return
+            await asyncio.sleep(REPORT_JANITOR.retry_delay * 2 ** (attempts - 1))
+
+
+async def _find_report_by_name(
+    crm: AsyncActiveConnect,
+    report: TypeReport,
+    name: str,
+) -> str:
+
+    """Асинхронная версия функции janitor.find_report_by_name.
+
+    Args:
+        crm (AsyncActiveConnect): асинхронное соединение с CRM.
+        report (TypeReport): тип отчёта.
+        name (str): название отчёта.
+
+    Returns:
+        str: uuid отчёта.
+
+    Raises:
+        CantGetData: если отчёт не найден в списке отчётов.
+    """
+
+    list_uuid = get_config_value(report.value, "uuid", default="")
+    response = await get_crm_response(
+        crm,
+        report,
+        NaumenRequestType.SEARCH_REPORT,
+        mod_params=(("uuid", list_uuid),),
+        method="GET",
+    )
+    found = parse_report_list(response, name)
+    if not found:
+        raise CantGetData
+    return found[0]
+
+
+async def wait_deletions(crm: Any = None) -> None:
+
+    """Функция ожидания завершения фоновых удалений отчётов.
+    Вызывается перед закрытием асинхронной сессии, отложенные удаления
+    выполняются сразу.
+
+    Args:
+        crm (Any): сессия или пул сессий, удаления которых ожидаются.
+        По умолчанию ожидаются все удаления.
+    """
+
+    # только что созданные задачи должны начаться, чтобы обработать отмену.
+    await asyncio.sleep(0)
+    tasks = [
+        task
+        for task, connect in list(_DELETE_TASKS.items())
+        if crm is None or owns(crm, connect)
+    ]
+    for task in tasks:
+        if task in _DELAYED_TASKS:
+            _FLUSHED_TASKS.add(task)
+            task.cancel()
+    if tasks:
+        log.debug(f"Ожидание удаления {len(tasks)} отчётов.")
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def sweep_reports(crm: Any) -> int:
+
+    """Асинхронная версия метода ReportJanitor.sweep.
+    Найденные отчёты удаляются фоновыми задачами.
+
+    Args:
+        crm (Any): асинхронная сессия или пул сессий с CRM.
+
+    Returns:
+        int: количество найденных отчётов.
+    """
+
+    found = 0
+    created_before = time() - REPORT_JANITOR.sweep_min_age
+    async with leased(crm) as connect:
+        for report, list_uuid in sweep_targets():
+            try:
+                response = await get_crm_response(
+                    connect,
+                    report,
+                    NaumenRequestType.SEARCH_REPORT,
+                    mod_params=(("uuid", list_uuid),),
+                    method="GET",
+                )
+                generated_reports = find_generated_reports(response, created_before)
+            except (CantGetData, aiohttp.ClientError, asyncio.TimeoutError):
+                log.warning(f"Не удалось получить список отчётов {report}.")
+                continue
+            for name, uuid in generated_reports:
+                log.info(f"Найден неудаленный отчёт {name}: {uuid}")
+                _schedule_delete(connect, report, uuid)
+                found += 1
+    return found
+
+
+async def _find_report_uuid(
+    crm: AsyncActiveConnect,
+    options: SearchOptions,
+    report: TypeReport,
+) -> str:
+    """Асинхронная функция поиска сформированного отчета в CRM Naumen.
+    Использует ту же стратегию ожидания, что и reports._find_report_uuid.
+
+    Args:
+        crm: асинхронное соединение с CRM Naumen.
+        options: параметры для поиска отчета в CRM Naumen.
+        report: тип отчета который необходимо найти
+
+    Returns:
+        str: строчный идентификатор обьекта в CRM Naumen.
+
+    Raises:
+        CantGetData: если отчёт не найден за отведенное время.
+    """
+
+    mod_params = tuple({"uuid": options.uuid}.items())
+    deadline = get_config_value("polling", "deadline", default=0) or (
+        options.delay_attems * (options.num_attems + 1)
+    )
+    started = monotonic()
+    missed_at = 0.0
+    parsed_collection = None
+
+    with INSTRUMENTATION.measure(Stage.POLL, report.name) as counters:
+        for attempt, delay in enumerate(POLLING_STRATEGY.delays(report, deadline)):
+            counters.retries = attempt
+            await asyncio.sleep(delay)
+            probed_at = monotonic() - started
+            page_text = await get_crm_response(
+                crm,
+                report,
+                NaumenRequestType.SEARCH_REPORT,
+                mod_params=mod_params,
+                method="GET",
+            )
+            counters.bytes += len(page_text.encode())
+            parsed_collection = await _parse_page(
+                page_text,
+                PageType.REPORT_LIST_PAGE,
+                options.name,
+            )
+            if parsed_collection is not None:
+                POLLING_STRATEGY.record(report, probed_at, missed_at)
+                break
+            missed_at = probed_at
+
+        if parsed_collection is None or len(parsed_collection) != 1:
+            log.error(f"Не удалось найти отчёт: {options.name}")
+            raise CantGetData
+
+    return str(parsed_collection[0])
@@ -0,0 +1,191 @@
+import asyncio
+import logging
+from collections import deque
+from typing import (
+    Any,
+    AsyncIterator,
+    Deque,
+    Iterable,
+    Mapping,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from ..config.config import get_config_value
+from ..config.structures import NaumenRequestType, PageType, SearchType, TypeReport
+from ..parser.parser import parse_naumen_pages
+from .async_crm import AsyncActiveConnect, get_crm_response
+from .async_reports import _parse_page
+from .async_session_pool import leased
+from .reports import _check_issues_report_keys
+
+log = logging.getLogger(__name__)
+
+
+async def search(
+    crm: AsyncActiveConnect,
+    report: SearchType,
+    *args: Sequence,
+    mod_params: Union[Tuple[Tuple[str, Any]], Tuple] = (),
+    mod_data: Union[Tuple[Tuple[str, Any]], Tuple] = (),
+    **kwargs: Mapping,
+) -> Iterable:
+    """Асинхронная функция для поиска в CRM.
+    Страницы пагинации запрашиваются одновременно, но не более
+    search_workers запросов сразу.
+
+    Args:
+        crm: асинхронное соединение с CRM.
+        report: отчёт, который необходимо получить.
+        *args: позиционные аргументы(не используются)
+
+    Kwargs:
+        **kwargs: именнованные аргументы для создания отчёта.
+
+    Returns:
+        Itrrable: коллекция обьектов необходимого отчёта.
+    Raises:
+        CantGetData: в случае невозможности вернуть коллекцию.
+    """
+    return [
+        result
+        async for result in iter_search(
+            crm,
+            report,
+            *args,
+            mod_params=mod_params,
+            mod_data=mod_data,
+            **kwargs,
+        )
+    ]
+
+
+async def iter_search(
+    crm: AsyncActiveConnect,
+    report: SearchType,
+    *args: Sequence,
+    mod_params: Union[Tuple[Tuple[str, Any]], Tuple] = (),
+    mod_data: Union[Tuple[Tuple[str, Any]], Tuple] = (),
+    **kwargs: Mapping,
+) -> AsyncIterator:
+    """Асинхронный генератор результатов поиска в CRM, страница за страницей.
+    Результаты первой страницы отдаются сразу после первого ответа CRM.
+    Следующие страницы запрашиваются задачами с окном search_workers,
+    загруженное окно разбирается пачкой функцией parse_naumen_pages, поэтому
+    в памяти одновременно находится не больше двух окон страниц.
+    Если генератор закрыт раньше времени, запросы страниц отменяются.
+    Все запросы поиска идут через одну сессию пула, так как CRM хранит
+    состояние поиска в сессии.
+
+    Args:
+        crm: асинхронное соединение с CRM.
+        report: вид поиска.
+        *args: позиционные аргументы(не используются)
+
+    Kwargs:
+        mod_params (Union[Tuple[Tuple[str, Any]], Tuple]): параметры поиска.
+        mod_data (Union[Tuple[Tuple[str, Any]], Tuple]): данные поиска.
+        **kwargs: именнованные аргументы для создания отчёта.
+
+    Yields:
+        Any: очередной результат поиска в порядке страниц.
+    Raises:
+        CantGetData: в случае невозможности получить результаты.
+    """
+    if report not in [SearchType.ISSUES_SEARCH]:
+        return
+
+    parse_issue_history, parse_issue_card, kwargs = _check_issues_report_keys(**kwargs)
+    async with leased(crm) as connect:
+        await get_crm_response(
+            connect,
+            TypeReport.CONTROL_ENABLE_SEARCH,
+            NaumenRequestType.CONTROL,
+        )
+        await asyncio.sleep(1)
+        await get_crm_response(
+            connect,
+            TypeReport.CONTROL_SELECT_SEARCH,
+            NaumenRequestType.CONTROL,
+        )
+        await asyncio.sleep(2)
+        page_text = await get_crm_response(
+            connect,
+            report,
+            NaumenRequestType.SEARCH_REPORT,
+            *args,
+            mod_params=mod_params,
+            mod_data=mod_data,
+            method="POST",
+            **kwargs,
+        )
+        log.debug("Проверка количества страниц")
+        page_count = await _parse_page(page_text, PageType.PAGINATION_PAGE)
+        log.debug(f"Количество страниц: {page_count}")
+        workers = get_config_value("search_workers", default=4)
+        page_numbers = iter(range(1, page_count))
+        pending: Deque["asyncio.Future[str]"] = deque()
+
+        def _fill_window() -> None:
+            for page_number in page_numbers:
+                pending.append(
+                    asyncio.ensure_future(
+                        _get_search_page(
+                            connect,
+                            report,
+                            page_number,
+                            *args,
+                            mod_params=mod_params,
+                            mod_data=mod_data,
+                            **kwargs,
+                        ),
+                    ),
+                )
+                if len(pending) >= workers:
+                    return
+
+        try:
+            # запуск загрузки следующих страниц до парсинга первой
+            _fill_window()
+            for result in await _parse_page(page_text, report.page):
+                yield result
+            loop = asyncio.get_running_loop()
+            while pending:
+                pages = [await pending.popleft() for _ in range(len(pending))]
+                _fill_window()
+                collects = await loop.run_in_executor(
+                    None,
+                    parse_naumen_pages,
+                    pages,
+                    report.page,
+                )
+                for collect in collects:
+                    for result in collect:
+                        yield result
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+async def _get_search_page(
+    crm: AsyncActiveConnect,
+    report: SearchType,
+    page_number: int,
+    *args: Sequence,
+    mod_params: Union[Tuple[Tuple[str, Any]], Tuple] = (),
+    mod_data: Union[Tuple[Tuple[str, Any]], Tuple] = (),
+    **kwargs: Mapping,
+) -> str:
+    _ = dict(mod_params)
+    _.update({"pagination": str(page_number)})
+    return await get_crm_response(
+        crm,
+        report,
+        NaumenRequestType.CREATE_REPORT,
+        *args,
+        mod_params=tuple(_.items()),
+        mod_data=mod_data,
+        method="GET",
+        **kwargs,
+    )
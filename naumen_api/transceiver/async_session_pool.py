@@ -0,0 +1,195 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from time import monotonic
+from typing import Any, AsyncIterator, Sequence, Union
+
+from ..config.structures import Credentials
+from ..exceptions import CantGetData, ConnectionsFailed
+from .async_crm import AsyncActiveConnect, close_session, get_session, ping, relogin
+from .session_pool import SessionPoolBase
+
+log = logging.getLogger(__name__)
+
+
+class AsyncSessionPool(SessionPoolBase):
+
+    """Пул авторизованных асинхронных сессий с CRM Naumen.
+
+    Асинхронная версия SessionPool, передается в асинхронные функции
+    транспорта вместо AsyncActiveConnect. Задача периодической проверки
+    сессий запускается при создании пула методом create или при первой
+    выдаче сессии.
+    """
+
+    def __init__(self, connects: Sequence[AsyncActiveConnect], **kwargs: Any) -> None:
+        super().__init__(connects, **kwargs)
+        self._condition = asyncio.Condition()
+        self._health_checks: Union["asyncio.Task[None]", None] = None
+
+    @classmethod
+    async def create(
+        cls,
+        credentials: Sequence[Credentials],
+        **kwargs: Any,
+    ) -> "AsyncSessionPool":
+
+        """Метод создания пула с входом в CRM под каждой учетной записью.
+
+        Args:
+            credentials: учетные записи сессий пула.
+            **kwargs: параметры пула.
+
+        Returns:
+            AsyncSessionPool: пул сессий.
+
+        Raises:
+            ConnectionsFailed: если не удалось войти ни в одну сессию.
+        """
+
+        results = await asyncio.gather(
+            *[
+                get_session(account.username, account.password, account.domain)
+                for account in credentials
+            ],
+            return_exceptions=True,
+        )
+        connects = []
+        for account, result in zip(credentials, results):
+            if isinstance(result, ConnectionsFailed):
+                log.error(f"Не удалось создать сессию {account.username}.")
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                connects.append(result)
+        if not connects:
+            raise ConnectionsFailed
+        pool = cls(connects, **kwargs)
+        pool._start_health_checks()
+        return pool
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[AsyncActiveConnect]:
+
+        """Метод выдачи сессии на время операции.
+
+        Yields:
+            AsyncActiveConnect: сессия с CRM.
+
+        Raises:
+            CantGetData: если свободная сессия не появилась за lease_timeout.
+        """
+
+        self._start_health_checks()
+        connect = await self._acquire()
+        try:
+            yield connect
+        finally:
+            async with self._condition:
+                self._in_use[self.connects.index(connect)] -= 1
+                self._condition.notify()
+
+    async def health_check(self) -> int:
+
+        """Метод проверки всех сессий пула с повторным входом в истекшие.
+
+        Returns:
+            int: количество рабочих сессий.
+        """
+
+        results = await asyncio.gather(*[ping(connect) for connect in self.connects])
+        for connect, healthy in zip(self.connects, results):
+            connect.state.healthy = healthy
+            if not healthy:
+                connect.state.failed_at = monotonic()
+        async with self._condition:
+            self._condition.notify_all()
+        return self.metrics().healthy
+
+    async def close(self) -> None:
+        """Метод закрытия всех сессий пула."""
+
+        if self._health_checks is not None:
+            self._health_checks.cancel()
+        async with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        for connect in self.connects:
+            await close_session(connect)
+
+    def _start_health_checks(self) -> None:
+        if self._health_checks is not None or self._closed:
+            return
+        interval = self.health_check_interval
+        if interval > 0:
+            self._health_checks = asyncio.ensure_future(self._check_health(interval))
+
+    async def _check_health(self, interval: float) -> None:
+
+        """Метод периодической проверки сессий пула.
+        Работает до закрытия пула.
+
+        Args:
+            interval: интервал проверки, сек.
+        """
+
+        while not self._closed:
+            await asyncio.sleep(interval)
+            try:
+                healthy = await self.health_check()
+            except Exception as exc:
+                # задача проверки не должна останавливаться из-за ошибки.
+                log.warning(f"Ошибка проверки сессий пула: {exc!r}")
+                continue
+            log.debug(f"Рабочих сессий в пуле: {healthy} из {len(self)}.")
+
+    async def _acquire(self) -> AsyncActiveConnect:
+        started = monotonic()
+        deadline = started + self.lease_timeout
+        while True:
+            async with self._condition:
+                if self._closed:
+                    raise CantGetData
+                index = self._pick()
+                if index is not None:
+                    return self._take(index, started)
+                repair = self._due_for_repair()
+                if not repair:
+                    remaining = deadline - monotonic()
+                    if remaining <= 0:
+                        log.error("Нет свободной сессии с CRM Naumen.")
+                        raise CantGetData
+                    self._waiting += 1
+                    try:
+                        await asyncio.wait_for(
+                            self._condition.wait(),
+                            min(remaining, self.retry_delay),
+                        )
+                    except asyncio.TimeoutError:
+                        pass
+                    finally:
+                        self._waiting -= 1
+                    continue
+            await asyncio.gather(*[relogin(connect) for connect in repair])
+            async with self._condition:
+                self._condition.notify_all()
+
+
+@asynccontextmanager
+async def leased(crm: Any) -> AsyncIterator[Any]:
+
+    """Асинхронная версия функции session_pool.leased.
+
+    Args:
+        crm: пул сессий или сессия с CRM.
+
+    Yields:
+        AsyncActiveConnect: сессия с CRM.
+    """
+
+    lease = getattr(crm, "lease", None)
+    if lease is None:
+        yield crm
+        return
+    async with lease() as connect:
+        yield connect
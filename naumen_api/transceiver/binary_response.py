@@ -0,0 +1,325 @@
+import logging
+from dataclasses import fields, is_dataclass
+from datetime import datetime, timedelta, tzinfo
+from functools import lru_cache
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Mapping,
+    Tuple,
+    Union,
+    get_args,
+    get_type_hints,
+)
+
+from ..config.structures import StatusType
+from ..parser.aht import Aht
+from ..parser.flr import Flr
+from ..parser.issues import Issue
+from ..parser.mttr import Mttr
+from ..parser.search_result_issues import SearchIssueResult
+from ..parser.service_level import ServiceLevel
+from .response_creator import ResponseFormatter, ResponseTemplate
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+log = logging.getLogger(__name__)
+
+# dataclass ответов, восстанавливаемые при декодировании по набору полей.
+RESPONSE_DATACLASSES = (Issue, SearchIssueResult, ServiceLevel, Mttr, Flr, Aht)
+
+
+class MessagePackResponseFormatter(ResponseFormatter):
+
+    """Класс для создания ответов API в формате MessagePack.
+
+    Ответ содержит те же ключи, что и JSON ответ, dataclass кодируются
+    словарем полей, datetime - расширением Timestamp, timedelta - числом
+    секунд. Datetime без часового пояса кодируются как местное время.
+    Требуется пакет msgpack.
+    """
+
+    @classmethod
+    def make(cls, api_response: ResponseTemplate) -> bytes:
+
+        """Метод для форматирования ответа.
+
+        Args:
+            api_response: сырой ответ от API.
+
+        Returns:
+            bytes: ответ в формате MessagePack.
+
+        Raises:
+            ImportError: если пакет msgpack не установлен.
+        """
+
+        _require(msgpack, "msgpack")
+        return msgpack.packb(
+            _response_map(api_response),
+            use_bin_type=True,
+            default=_msgpack_default,
+        )
+
+    @classmethod
+    def decode(cls, data: bytes) -> ResponseTemplate:
+
+        """Метод для восстановления ответа из формата MessagePack.
+
+        Args:
+            data: ответ, созданный методом make.
+
+        Returns:
+            ResponseTemplate: ответ с dataclass отчётов.
+
+        Raises:
+            ImportError: если пакет msgpack не установлен.
+        """
+
+        _require(msgpack, "msgpack")
+        response_map = msgpack.unpackb(data, raw=False, timestamp=3)
+        return _response_template(_restore_tree(response_map))
+
+
+class CBORResponseFormatter(ResponseFormatter):
+
+    """Класс для создания ответов API в формате CBOR.
+
+    Ответ содержит те же ключи, что и JSON ответ, dataclass кодируются
+    словарем полей, datetime - меткой времени (тег 1), timedelta - числом
+    секунд. Datetime без часового пояса кодируются как местное время.
+    Требуется пакет cbor2.
+    """
+
+    @classmethod
+    def make(cls, api_response: ResponseTemplate) -> bytes:
+
+        """Метод для форматирования ответа.
+
+        Args:
+            api_response: сырой ответ от API.
+
+        Returns:
+            bytes: ответ в формате CBOR.
+
+        Raises:
+            ImportError: если пакет cbor2 не установлен.
+        """
+
+        _require(cbor2, "cbor2")
+        return cbor2.dumps(
+            _response_map(api_response),
+            datetime_as_timestamp=True,
+            timezone=_LOCAL_TIMEZONE,
+            default=_cbor_default,
+        )
+
+    @classmethod
+    def decode(cls, data: bytes) -> ResponseTemplate:
+
+        """Метод для восстановления ответа из формата CBOR.
+
+        Args:
+            data: ответ, созданный методом make.
+
+        Returns:
+            ResponseTemplate: ответ с dataclass отчётов.
+
+        Raises:
+            ImportError: если пакет cbor2 не установлен.
+        """
+
+        _require(cbor2, "cbor2")
+        return _response_template(_restore_tree(cbor2.loads(data)))
+
+
+def _require(module: Any, package: str) -> None:
+    if module is None:
+        raise ImportError(f"Для этого формата ответа требуется пакет {package}.")
+
+
+def _response_map(api_response: ResponseTemplate) -> Dict[str, Any]:
+    return {
+        "status_code": api_response.status.code,
+        "status_message": api_response.status.message,
+        "description": api_response.status.description,
+        "content": api_response.content,
+    }
+
+
+def _response_template(response_map: Mapping[str, Any]) -> ResponseTemplate:
+
+    """Функция восстановления ответа из словаря ответа.
+    Статус восстанавливается по коду и описанию.
+
+    Args:
+        response_map: декодированный словарь ответа.
+
+    Returns:
+        ResponseTemplate: ответ.
+    """
+
+    code = response_map["status_code"]
+    statuses = [status for status in StatusType if status.code == code]
+    status = next(
+        (
+            status
+            for status in statuses
+            if status.description == response_map["description"]
+        ),
+        statuses[0],
+    )
+    return ResponseTemplate(status, response_map["content"])
+
+
+def _encode_value(encoding_object: Any) -> Any:
+
+    """Функция приведения значений, которые не поддерживаются форматом
+    напрямую. Dataclass передается кодировщику словарем своих полей без
+    копирования значений, datetime без часового пояса - с местным
+    часовым поясом.
+
+    Args:
+        encoding_object: значение.
+
+    Returns:
+        Any: значение, поддерживаемое кодировщиком.
+
+    Raises:
+        TypeError: если тип значения не поддерживается.
+    """
+
+    if is_dataclass(encoding_object) and not isinstance(encoding_object, type):
+        names = _field_names(type(encoding_object))
+        return {
+            name: _local_datetime(getattr(encoding_object, name)) for name in names
+        }
+    if isinstance(encoding_object, timedelta):
+        return encoding_object.total_seconds()
+    raise TypeError(f"Тип {type(encoding_object)!r} не поддерживается.")
+
+
+def _msgpack_default(encoding_object: Any) -> Any:
+    if isinstance(encoding_object, datetime):
+        return msgpack.Timestamp.from_datetime(_local_datetime(encoding_object))
+    return _encode_value(encoding_object)
+
+
+def _local_datetime(value: Any) -> Any:
+    # время из CRM хранится без часового пояса и считается местным.
+    if isinstance(value, datetime) and value.tzinfo is None:
+        return value.astimezone()
+    return value
+
+
+class _LocalTimezone(tzinfo):
+
+    """Местный часовой пояс с учётом перехода на летнее время.
+    Используется кодировщиком CBOR для datetime без часового пояса.
+    """
+
+    def utcoffset(self, dt: Union[datetime, None]) -> timedelta:
+        if dt is None:
+            return datetime.now().astimezone().utcoffset()  # type: ignore
+        return dt.replace(tzinfo=None).astimezone().utcoffset()  # type: ignore
+
+    def dst(self, dt: Union[datetime, None]) -> None:
+        return None
+
+    def tzname(self, dt: Union[datetime, None]) -> str:
+        moment = datetime.now() if dt is None else dt.replace(tzinfo=None)
+        return moment.astimezone().tzname() or ""
+
+
+_LOCAL_TIMEZONE = _LocalTimezone()
+
+
+def _cbor_default(encoder: Any, encoding_object: Any) -> None:
+    encoder.encode(_encode_value(encoding_object))
+
+
+def _restore_dataclass(value: Dict[str, Any]) -> Any:
+
+    """Функция восстановления dataclass ответа из словаря полей.
+    Словари, набор ключей которых не совпадает с полями dataclass ответов,
+    возвращаются без изменений.
+
+    Args:
+        value: декодированный словарь.
+
+    Returns:
+        Any: dataclass или исходный словарь.
+    """
+
+    cls = _dataclasses_by_fields().get(frozenset(value))
+    if cls is None:
+        return value
+    timedelta_fields = _timedelta_fields(cls)
+    restored = {}
+    for name, field_value in value.items():
+        if name in timedelta_fields and isinstance(field_value, (int, float)):
+            field_value = timedelta(seconds=field_value)
+        restored[name] = _restore_value(field_value)
+    return cls(**restored)
+
+
+def _restore_tree(value: Any) -> Any:
+
+    """Функция восстановления декодированного ответа: dataclass ответов
+    восстанавливаются из словарей полей, datetime приводятся к местному
+    времени без часового пояса в любом месте ответа.
+
+    Args:
+        value: декодированное значение.
+
+    Returns:
+        Any: восстановленное значение.
+    """
+
+    if isinstance(value, datetime):
+        return _restore_value(value)
+    if isinstance(value, dict):
+        return _restore_dataclass(
+            {key: _restore_tree(item) for key, item in value.items()},
+        )
+    if isinstance(value, list):
+        return [_restore_tree(item) for item in value]
+    return value
+
+
+def _restore_value(value: Any) -> Any:
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.astimezone().replace(tzinfo=None)
+    if isinstance(value, list):
+        return tuple(_restore_value(item) for item in value)
+    return value
+
+
+@lru_cache(maxsize=None)
+def _field_names(cls: type) -> Tuple[str, ...]:
+    return tuple(field.name for field in fields(cls))
+
+
+@lru_cache(maxsize=None)
+def _dataclasses_by_fields() -> Dict[FrozenSet[str], Callable[..., Any]]:
+    return {frozenset(_field_names(cls)): cls for cls in RESPONSE_DATACLASSES}
+
+
+@lru_cache(maxsize=None)
+def _timedelta_fields(cls: type) -> FrozenSet[str]:
+    hints = get_type_hints(cls)
+    return frozenset(
+        name
+        for name, hint in hints.items()
+        if hint is timedelta or timedelta in get_args(hint)
+    )
@@ -0,0 +1,179 @@
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from datetime import datetime
+from threading import Lock
+from time import monotonic
+from typing import Any, Tuple, Union
+
+from ..config.config import get_config_value
+from ..parser.issues import Issue
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CardFingerprint:
+
+    """Класс данных для хранения состояния обращения из таблицы обращений,
+    при изменении которого карточка считается устаревшей.
+
+    Attributes:
+        step: шаг на котором находится обращение.
+        responsible: ответственный за последний шаг.
+        last_edit_time: время последнего изменения.
+    """
+
+    step: str = ""
+    responsible: str = ""
+    last_edit_time: Union[datetime, None] = None
+
+    @classmethod
+    def from_issue(cls, issue: Issue) -> "CardFingerprint":
+        return cls(issue.step, issue.responsible, issue.last_edit_time)
+
+    def matches(self, other: "CardFingerprint", tolerance: float) -> bool:
+
+        """Метод сравнения состояний обращения.
+        Время последнего изменения вычисляется из времени решения с точностью
+        до минуты, поэтому сравнивается с допуском.
+
+        Args:
+            other: состояние обращения при следующем запросе.
+            tolerance: допустимое расхождение времени изменения, сек.
+
+        Returns:
+            bool: True, если обращение не менялось.
+        """
+
+        if (self.step, self.responsible) != (other.step, other.responsible):
+            return False
+        if self.last_edit_time is None or other.last_edit_time is None:
+            return self.last_edit_time == other.last_edit_time
+        delta = abs((self.last_edit_time - other.last_edit_time).total_seconds())
+        return delta <= tolerance
+
+
+class IssueCardCache:
+
+    """Кэш карточек обращений в памяти с ограничением размера и времени жизни.
+
+    Карточка хранится по uuid обращения вместе с состоянием обращения из
+    таблицы обращений. Если шаг, ответственный или время последнего изменения
+    обращения изменились, карточка запрашивается заново. При переполнении
+    вытесняется карточка, которая дольше всего не запрашивалась.
+
+    Параметры, не переданные явно, берутся из раздела issue_card_cache
+    конфигурации. Размер 0 выключает кэш.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_size: Union[int, None] = None,
+        ttl: Union[float, None] = None,
+        edit_time_tolerance: Union[float, None] = None,
+    ) -> None:
+        """Создание кэша карточек.
+
+        Kwargs:
+            max_size: максимальное количество карточек.
+            ttl: время жизни карточки, сек.
+            edit_time_tolerance: допуск сравнения времени изменения, сек.
+        """
+        self._options = {
+            "max_size": max_size,
+            "ttl": ttl,
+            "edit_time_tolerance": edit_time_tolerance,
+        }
+        self._cards: "OrderedDict[str, Tuple[CardFingerprint, float, Issue]]" = (
+            OrderedDict()
+        )
+        self._lock = Lock()
+
+    @property
+    def max_size(self) -> int:
+        return int(self._option("max_size", 1000))
+
+    @property
+    def ttl(self) -> float:
+        return float(self._option("ttl", 600))
+
+    @property
+    def edit_time_tolerance(self) -> float:
+        return float(self._option("edit_time_tolerance", 60))
+
+    def get(self, issue: Issue) -> Union[Issue, None]:
+
+        """Метод получения карточки обращения из кэша.
+
+        Args:
+            issue: обращение из таблицы обращений.
+
+        Returns:
+            Union[Issue, None]: копия карточки или None, если карточки нет,
+            она устарела или обращение изменилось.
+        """
+
+        with self._lock:
+            cached = self._cards.get(issue.uuid)
+            if cached is None:
+                return None
+            fingerprint, stored_at, card = cached
+            expired = monotonic() - stored_at > self.ttl
+            changed = not fingerprint.matches(
+                CardFingerprint.from_issue(issue),
+                self.edit_time_tolerance,
+            )
+            if expired or changed:
+                log.debug(f"Карточка обращения {issue.uuid} устарела.")
+                del self._cards[issue.uuid]
+                return None
+            self._cards.move_to_end(issue.uuid)
+            return replace(card)
+
+    def put(self, issue: Issue, card: Issue) -> None:
+
+        """Метод сохранения карточки обращения в кэш.
+
+        Args:
+            issue: обращение из таблицы обращений.
+            card: обращение, полученное с карточки.
+        """
+
+        max_size = self.max_size
+        if max_size <= 0 or not issue.uuid:
+            return
+        with self._lock:
+            self._cards[issue.uuid] = (
+                CardFingerprint.from_issue(issue),
+                monotonic(),
+                replace(card),
+            )
+            self._cards.move_to_end(issue.uuid)
+            while len(self._cards) > max_size:
+                self._cards.popitem(last=False)
+
+    def invalidate(self, naumen_uuid: str) -> None:
+        """Метод удаления карточки обращения из кэша."""
+
+        with self._lock:
+            self._cards.pop(naumen_uuid, None)
+
+    def clear(self) -> None:
+        """Метод очистки кэша."""
+
+        with self._lock:
+            self._cards.clear()
+
+    def __len__(self) -> int:
+        return len(self._cards)
+
+    def _option(self, name: str, default: Any) -> Any:
+        value = self._options[name]
+        if value is None:
+            value = get_config_value("issue_card_cache", name, default=default)
+        return value
+
+
+ISSUE_CARD_CACHE = IssueCardCache()
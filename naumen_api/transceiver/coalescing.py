@@ -0,0 +1,251 @@
+import asyncio
+import logging
+from copy import deepcopy
+from threading import Event, Lock
+from time import monotonic
+from typing import Any, Awaitable, Callable, Dict, Hashable, Mapping, Tuple, Union
+
+from ..config.config import get_config_value
+from ..config.structures import TypeReport
+from .report_cache import _make_key, account_key
+
+log = logging.getLogger(__name__)
+
+# запас времени на получение страницы отчёта после окончания окна повторного
+# использования, отчёт удаляется только после него.
+REUSE_GRACE = 30
+
+
+class _Flight:
+
+    """Выполняемое формирование отчёта, результат которого ждут все
+    одинаковые запросы.
+    """
+
+    def __init__(self) -> None:
+        self.done = Event()
+        self.result: Any = None
+        self.error: Union[BaseException, None] = None
+        self.waiters = 0
+
+
+class ReportCoalescer:
+
+    """Совместное использование формируемых и недавно сформированных отчётов.
+
+    Одновременные запросы одного отчёта с одинаковыми параметрами
+    выполняются один раз: первый запрос формирует, получает и разбирает
+    отчёт, остальные ждут и получают тот же результат или ту же ошибку.
+    Если результат ждали, каждый запрос получает свою копию, поэтому
+    изменение обращений одним запросом не затрагивает остальные.
+
+    UUID сформированного в CRM отчёта хранится reuse_window секунд, и
+    следующий такой же запрос открывает уже сформированный отчёт, не создавая
+    новый. Удаление отчёта откладывается до окончания окна.
+
+    Параметры, не переданные явно, берутся из раздела coalescing
+    конфигурации. Значение reuse_window 0 выключает повторное использование.
+    """
+
+    def __init__(
+        self,
+        *,
+        enabled: Union[bool, None] = None,
+        reuse_window: Union[float, None] = None,
+    ) -> None:
+        """Создание совместного использования отчётов.
+
+        Kwargs:
+            enabled: объединять ли одновременные одинаковые запросы.
+            reuse_window: время повторного использования отчёта в CRM, сек.
+        """
+        self._options = {"enabled": enabled, "reuse_window": reuse_window}
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._async_flights: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self._async_waiters: Dict[Hashable, int] = {}
+        self._reports: Dict[Hashable, Tuple[str, float]] = {}
+        self._lock = Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._option("enabled", True))
+
+    @property
+    def reuse_window(self) -> float:
+        return float(self._option("reuse_window", 15))
+
+    def run(self, key: Hashable, func: Callable[[], Any]) -> Any:
+
+        """Метод выполнения запроса отчёта один раз на все одновременные
+        запросы с тем же ключом.
+
+        Args:
+            key: ключ запроса.
+            func: функция получения отчёта.
+
+        Returns:
+            Any: результат функции.
+        """
+
+        if not self.enabled:
+            return func()
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+            else:
+                flight.waiters += 1
+
+        if not leader:
+            log.debug("Ожидание такого же формируемого отчёта.")
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return deepcopy(flight.result)
+
+        try:
+            flight.result = func()
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        # исходный результат только копируется ожидающими запросами.
+        return deepcopy(flight.result) if flight.waiters else flight.result
+
+    async def run_async(
+        self,
+        key: Hashable,
+        func: Callable[[], Awaitable[Any]],
+    ) -> Any:
+
+        """Асинхронная версия метода run.
+
+        Args:
+            key: ключ запроса.
+            func: корутина получения отчёта.
+
+        Returns:
+            Any: результат корутины.
+        """
+
+        if not self.enabled:
+            return await func()
+
+        future = self._async_flights.get(key)
+        if future is not None:
+            log.debug("Ожидание такого же формируемого отчёта.")
+            self._async_waiters[key] += 1
+            return deepcopy(await asyncio.shield(future))
+
+        future = asyncio.get_running_loop().create_future()
+        # ошибку получают ожидающие запросы, если их нет - она не теряется.
+        future.add_done_callback(lambda _: _.cancelled() or _.exception())
+        self._async_flights[key] = future
+        self._async_waiters[key] = 0
+        try:
+            result = await func()
+            future.set_result(result)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            del self._async_flights[key]
+            waiters = self._async_waiters.pop(key)
+        return deepcopy(result) if waiters else result
+
+    def remember(self, key: Hashable, uuid: str) -> Union[float, None]:
+
+        """Метод сохранения uuid сформированного отчёта для повторного
+        использования.
+
+        Args:
+            key: ключ запроса.
+            uuid: uuid отчёта в CRM.
+
+        Returns:
+            Union[float, None]: задержка удаления отчёта, сек, или None,
+            если повторное использование выключено.
+        """
+
+        reuse_window = self.reuse_window
+        if reuse_window <= 0:
+            return None
+        with self._lock:
+            self._reports[key] = (uuid, monotonic() + reuse_window)
+        return reuse_window + REUSE_GRACE
+
+    def recall(self, key: Hashable) -> str:
+
+        """Метод получения uuid недавно сформированного отчёта.
+
+        Args:
+            key: ключ запроса.
+
+        Returns:
+            str: uuid отчёта или пустая строка, если отчёта нет.
+        """
+
+        with self._lock:
+            uuid, expires_at = self._reports.get(key, ("", 0.0))
+            if uuid and expires_at < monotonic():
+                del self._reports[key]
+                return ""
+        if uuid:
+            log.debug(f"Повторное использование отчёта {uuid}.")
+        return uuid
+
+    def forget(self, key: Hashable) -> None:
+        """Метод удаления uuid отчёта, который нельзя использовать повторно."""
+
+        with self._lock:
+            self._reports.pop(key, None)
+
+    def clear(self) -> None:
+        """Метод очистки сохранённых отчётов."""
+
+        with self._lock:
+            self._reports.clear()
+
+    def _option(self, name: str, default: Any) -> Any:
+        value = self._options[name]
+        if value is None:
+            value = get_config_value("coalescing", name, default=default)
+        return value
+
+
+def make_report_key(
+    crm: Any,
+    report: TypeReport,
+    mod_data: Union[Tuple[Tuple[str, Any]], Tuple],
+    mod_params: Union[Tuple[Tuple[str, Any]], Tuple],
+    kwargs: Mapping,
+) -> Hashable:
+
+    """Функция получения ключа запроса отчёта.
+    Отчёты разных учетных записей не объединяются: у разных пользователей
+    CRM могут быть разные права.
+
+    Args:
+        crm: соединение с CRM.
+        report: тип отчёта.
+        mod_data: данные запроса отчёта.
+        mod_params: параметры запроса отчёта.
+        kwargs: именнованные аргументы запроса отчёта.
+
+    Returns:
+        Hashable: ключ запроса.
+    """
+
+    data = tuple(mod_data) + tuple(kwargs.items())
+    return _make_key(report, data, mod_params, account_key(crm))
+
+
+REPORT_COALESCER = ReportCoalescer()
@@ -0,0 +1,196 @@
+import csv
+import logging
+from array import array
+from dataclasses import fields, is_dataclass
+from datetime import datetime, timedelta
+from functools import lru_cache
+from operator import attrgetter
+from typing import (
+    Any,
+    BinaryIO,
+    Dict,
+    Iterator,
+    List,
+    Sequence,
+    TextIO,
+    Tuple,
+    get_type_hints,
+)
+
+from ..config.config import get_config_value
+from .response_creator import ResponseFormatter, ResponseTemplate
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:
+    pyarrow = None
+
+log = logging.getLogger(__name__)
+
+COLUMNS = Dict[str, Any]
+
+# типы array для числовых полей и соответствующие dtype numpy.
+TYPECODES = {bool: "b", int: "q", float: "d"}
+NUMPY_DTYPES = {"b": "bool", "q": "int64", "d": "float64"}
+
+
+class ColumnarResponseFormatter(ResponseFormatter):
+
+    """Класс для создания ответов API по столбцам.
+
+    Строки отчёта (dataclass на любой глубине вложенности содержания, для
+    SL - по дням и группам) собираются в словарь столбцов по полям
+    dataclass: числовые поля - array.array, или массивы numpy, если
+    columnar.numpy включен и numpy установлен, остальные - списки.
+    Ответ возвращается как ResponseTemplate со словарем столбцов в
+    содержании, столбцы можно выгрузить функциями write_csv и write_arrow.
+    """
+
+    @classmethod
+    def make(cls, api_response: ResponseTemplate) -> ResponseTemplate:
+
+        """Метод для форматирования ответа.
+
+        Args:
+            api_response: сырой ответ от API.
+
+        Returns:
+            ResponseTemplate: ответ со словарем столбцов в содержании.
+        """
+
+        return ResponseTemplate(api_response.status, to_columns(api_response.content))
+
+
+def to_columns(content: Any) -> COLUMNS:
+
+    """Функция разворота строк отчёта в столбцы.
+
+    Args:
+        content: содержание ответа, dataclass одного типа на любой глубине
+        вложенности последовательностей.
+
+    Returns:
+        COLUMNS: столбцы по полям dataclass, пустой словарь для пустого
+        содержания.
+
+    Raises:
+        TypeError: если в содержании dataclass разных типов.
+    """
+
+    rows = list(_iter_rows(content))
+    if not rows:
+        return {}
+    row_type = type(rows[0])
+    if any(type(row) is not row_type for row in rows):
+        raise TypeError("Строки отчёта разных типов нельзя собрать в столбцы.")
+    use_numpy = numpy is not None and bool(
+        get_config_value("columnar", "numpy", default=True),
+    )
+    columns: COLUMNS = {}
+    for name, typecode in _column_types(row_type):
+        values = list(map(attrgetter(name), rows))
+        columns[name] = _make_column(values, typecode, use_numpy)
+    return columns
+
+
+def write_csv(columns: COLUMNS, file: TextIO) -> None:
+
+    """Функция выгрузки столбцов в CSV с заголовком.
+    Datetime пишутся в формате JSON ответа, timedelta - числом секунд.
+
+    Args:
+        columns: столбцы ответа.
+        file: текстовый файл, открытый с newline="".
+    """
+
+    writer = csv.writer(file)
+    writer.writerow(list(columns))
+    for row in zip(*columns.values()):
+        writer.writerow([_csv_value(value) for value in row])
+
+
+def write_arrow(columns: COLUMNS, sink: BinaryIO) -> None:
+
+    """Функция выгрузки столбцов в поток Arrow IPC.
+    Столбцы, которые Arrow не может представить (например, вложенные
+    кортежи разной длины), выгружаются строками.
+
+    Args:
+        columns: столбцы ответа.
+        sink: двоичный файл или буфер.
+
+    Raises:
+        ImportError: если пакет pyarrow не установлен.
+    """
+
+    if pyarrow is None:
+        raise ImportError("Для выгрузки в Arrow требуется пакет pyarrow.")
+    arrays = {}
+    for name, column in columns.items():
+        if isinstance(column, array):
+            column = column.tolist()
+        try:
+            arrays[name] = pyarrow.array(column)
+        except (pyarrow.ArrowException, TypeError, ValueError):
+            log.debug(f"Столбец {name} выгружается строками.")
+            arrays[name] = pyarrow.array([_csv_value(value) for value in column])
+    table = pyarrow.table(arrays)
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
+def _iter_rows(content: Any) -> Iterator[Any]:
+    for item in content:
+        if is_dataclass(item) and not isinstance(item, type):
+            yield item
+        elif isinstance(item, (list, tuple)):
+            yield from _iter_rows(item)
+
+
+@lru_cache(maxsize=None)
+def _column_types(cls: type) -> Tuple[Tuple[str, str], ...]:
+
+    """Функция получения типов столбцов dataclass по аннотациям полей.
+
+    Args:
+        cls: класс dataclass.
+
+    Returns:
+        Tuple[Tuple[str, str], ...]: имя поля и код типа array, пустой для
+        нечисловых полей.
+    """
+
+    hints = get_type_hints(cls)
+    return tuple(
+        (field.name, TYPECODES.get(hints.get(field.name), ""))  # type: ignore
+        for field in fields(cls)
+    )
+
+
+def _make_column(values: List[Any], typecode: str, use_numpy: bool) -> Any:
+    if not typecode:
+        return values
+    try:
+        column = array(typecode, values)
+    except (TypeError, OverflowError):
+        # значение не того типа, например None в числовом поле.
+        return values
+    if use_numpy:
+        return numpy.frombuffer(column, dtype=NUMPY_DTYPES[typecode])
+    return column
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return datetime.strftime(value, "%d.%m.%Y %H:%M:%S")
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, Sequence) and not isinstance(value, str):
+        return str(value)
+    return value
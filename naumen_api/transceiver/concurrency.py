@@ -0,0 +1,47 @@
+import logging
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+from typing import Callable, Deque, Iterable, Iterator, Tuple, TypeVar
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def iter_bounded(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    workers: int,
+) -> Iterator[Tuple[T, "Future[R]"]]:
+    """Генератор для выполнения функции над элементами в пуле потоков.
+    Одновременно выполняется и хранится не более workers результатов,
+    следующие задачи ставятся по мере того, как вызывающий код забирает
+    готовые. Элементы и их futures отдаются в исходном порядке, что позволяет
+    обработать ошибку каждого элемента отдельно.
+
+    Args:
+        func: функция, вызываемая для каждого элемента.
+        items: элементы для обработки.
+        workers: количество потоков и размер окна.
+
+    Yields:
+        Tuple[T, Future]: элемент и future с результатом для него.
+    """
+
+    workers = max(1, workers)
+    items = iter(items)
+    pending: Deque[Tuple[T, "Future[R]"]] = deque()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        try:
+            while True:
+                for item in islice(items, workers - len(pending)):
+                    pending.append((item, executor.submit(func, item)))
+                if not pending:
+                    return
+                yield pending.popleft()
+        finally:
+            for _, future in pending:
+                future.cancel()
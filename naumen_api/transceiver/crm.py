@@ -1,13 +1,24 @@
 import logging
+from threading import Thread
+from time import monotonic
 from typing import Any, Literal, Mapping, Sequence, Tuple, Union
 
 from requests import Response, Session
-from requests.adapters import HTTPAdapter, Retry
+from requests.exceptions import RequestException
 from requests.packages.urllib3 import disable_warnings
 
-from ..config.config import CONFIG, create_naumen_request
-from ..config.structures import ActiveConnect, NaumenRequestType, SearchType, TypeReport
+from ..config.config import CONFIG, create_naumen_request, get_config_value
+from ..config.structures import (
+    ActiveConnect,
+    Credentials,
+    NaumenRequest,
+    NaumenRequestType,
+    SearchType,
+    TypeReport,
+)
 from ..exceptions import CantGetData, ConnectionsFailed
+from .throttle import CRM_THROTTLE
+from .transport import TIMEOUT, get_timeout, mount_adapters
 
 disable_warnings()
 log = logging.getLogger(__name__)
@@ -16,6 +27,9 @@ DOMAIN = str
 
 def get_session(username: str, password: str, domain: DOMAIN) -> ActiveConnect:
     """Функция для создания сессии с CRM системой.
+    Учетные данные сохраняются в сессии для повторного входа, если сессия
+    в CRM истечет. Если в конфигурации задан keep_alive_interval, сессия
+    поддерживается фоновыми запросами.
 
     Args:
         username: имя пользователя в Naumen
@@ -34,20 +48,88 @@ def get_session(username: str, password: str, domain: DOMAIN) -> ActiveConnect:
     if not all([username, password, domain, url]):
         raise ConnectionsFailed
     session = Session()
-    retries = Retry(total=5, backoff_factor=0.5)
-    session.mount("https://", HTTPAdapter(max_retries=retries))
-    session.mount("http://", HTTPAdapter(max_retries=retries))
+    mount_adapters(session)
+
+    credentials = Credentials(username, password, domain)
+    _login(session, credentials)
+    crm = ActiveConnect(session, credentials)
+    _start_keep_alive(crm)
+    return crm
 
-    data = {
-        "login": username,
-        "password": password,
-        "domain": domain,
-    }
-    response = session.post(url=url, data=data, verify=False)
-    if response.status_code != 200:
-        raise ConnectionsFailed
 
-    return ActiveConnect(session)
+def close_session(crm: ActiveConnect) -> None:
+    """Функция закрытия сессии с CRM системой.
+
+    Args:
+        crm: сессия с CRM Naumen.
+    """
+
+    crm.state.closed.set()
+    crm.session.close()
+
+
+def relogin(crm: ActiveConnect, generation: Union[int, None] = None) -> bool:
+    """Функция повторного входа в CRM с сохраненными учетными данными.
+    Если несколько потоков одновременно обнаружили истекшую сессию, вход
+    выполняет только первый из них.
+
+    Args:
+        crm: сессия с CRM Naumen.
+        generation: номер входа, при котором сессия оказалась истекшей.
+
+    Returns:
+        bool: True, если сессию можно использовать дальше.
+    """
+
+    if crm.credentials is None:
+        return False
+    if not get_config_value("session", "relogin", default=True):
+        return False
+    with crm.state.lock:
+        if generation is not None and generation != crm.state.generation:
+            return True
+        try:
+            _login(crm.session, crm.credentials)
+        except ConnectionsFailed:
+            log.error("Не удалось повторно войти в CRM Naumen.")
+            crm.state.healthy, crm.state.failed_at = False, monotonic()
+            return False
+        crm.state.generation += 1
+        crm.state.healthy = True
+    log.info("Выполнен повторный вход в CRM Naumen.")
+    return True
+
+
+def ping(crm: ActiveConnect) -> bool:
+    """Функция проверки сессии запросом к главной странице CRM.
+    Истекшая сессия обновляется повторным входом.
+
+    Args:
+        crm: сессия с CRM Naumen.
+
+    Returns:
+        bool: True, если сессию можно использовать.
+    """
+
+    url = get_config_value("session", "keep_alive_url", default="")
+    url = url or CONFIG.config["url"]["main"]
+    generation = crm.state.generation
+    try:
+        response = crm.session.get(
+            url,
+            headers=CONFIG.config["headers"],
+            verify=False,
+            timeout=get_timeout(),
+        )
+    except RequestException as exc:
+        log.warning(f"Ошибка проверки сессии с CRM Naumen: {exc!r}")
+        return False
+    finally:
+        crm.state.last_used = monotonic()
+    if _is_session_expired(response):
+        log.info("Сессия с CRM Naumen истекла, выполняется повторный вход.")
+        return relogin(crm, generation)
+    return True
 
 
 def get_crm_response(
@@ -63,7 +145,7 @@ def get_crm_response(
     """Функция для получения ответа из CRM системы.
 
     Args:
-        crm: сессия с CRM Naumen.
+        crm: сессия с CRM Naumen или пул сессий.
         obj (Union[TypeReport, SearchType]): обьект которого строится запрос.
         mod_params (Union[Tuple[Tuple[str, Any]], Tuple]): модифицированные
         параметры запроса
@@ -76,25 +158,155 @@ def get_crm_response(
 
     Raises:
         CantGetData: если не удалось получить ответ.
+        CrmUnavailable: если запрос не отправлен ограничителем нагрузки.
+        Timeout: если CRM не ответила за таймаут типа запроса.
 
     """
+    lease = getattr(crm, "lease", None)
+    if lease is not None:
+        # передан пул сессий, запрос выполняется в выданной сессии.
+        with lease() as connect:
+            return get_crm_response(
+                connect,
+                obj,
+                request_type,
+                *args,
+                mod_params=mod_params,
+                mod_data=mod_data,
+                method=method,
+                **kwargs,
+            )
+
     rq = create_naumen_request(obj, request_type, mod_params, mod_data, *args, **kwargs)
-    if method == "POST":
-        _response = crm.session.post(
-            url=rq.url,
-            headers=rq.headers,
-            params=rq.params,
-            data=rq.data,
-            verify=rq.verify,
-        )
-    else:
-        _response = crm.session.get(
-            url=rq.url,
-            headers=rq.headers,
-            params=rq.params,
-            verify=rq.verify,
-        )
+    for attempt in range(2):
+        generation = crm.state.generation
+        _response = _send(crm, rq, method, get_timeout(request_type))
+        if not _is_session_expired(_response):
+            break
+        log.warning("Сессия с CRM Naumen истекла.")
+        if attempt or not relogin(crm, generation):
+            raise CantGetData
+    crm.state.last_used = monotonic()
     if _response.status_code != 200:
         raise CantGetData
 
     return _response
+
+
+def _send(
+    crm: ActiveConnect,
+    rq: NaumenRequest,
+    method: str,
+    timeout: TIMEOUT,
+) -> Response:
+    CRM_THROTTLE.wait()
+    try:
+        if method == "POST":
+            response = crm.session.post(
+                url=rq.url,
+                headers=rq.headers,
+                params=rq.params,
+                data=rq.data,
+                verify=rq.verify,
+                timeout=timeout,
+            )
+        else:
+            response = crm.session.get(
+                url=rq.url,
+                headers=rq.headers,
+                params=rq.params,
+                verify=rq.verify,
+                timeout=timeout,
+            )
+    except RequestException:
+        CRM_THROTTLE.record(False)
+        raise
+    CRM_THROTTLE.record(response.status_code < 500)
+    return response
+
+
+def _login(session: Session, credentials: Credentials) -> None:
+    data = {
+        "login": credentials.username,
+        "password": credentials.password,
+        "domain": credentials.domain,
+    }
+    try:
+        response = session.post(
+            url=CONFIG.config["url"]["login"],
+            data=data,
+            verify=False,
+            timeout=get_timeout(),
+        )
+    except RequestException as exc:
+        raise ConnectionsFailed from exc
+    if response.status_code != 200:
+        raise ConnectionsFailed
+
+
+def _is_session_expired(response: Response) -> bool:
+
+    """Функция проверки, что вместо ответа CRM вернула страницу входа.
+
+    Args:
+        response: ответ сервера CRM системы Naumen.
+
+    Returns:
+        bool: True, если сессия истекла.
+    """
+
+    return _is_login_response(
+        response.status_code,
+        response.url,
+        bool(response.history),
+        response.content,
+    )
+
+
+def _is_login_response(
+    status: int,
+    url: str,
+    redirected: bool,
+    content: Union[str, bytes],
+) -> bool:
+    if status == 401:
+        return True
+    login_url = CONFIG.config["url"]["login"]
+    if redirected and login_url and url.split("?")[0] == login_url.split("?")[0]:
+        return True
+    markers = get_config_value("session", "login_markers", default=[])
+    if isinstance(content, bytes):
+        return any(marker.encode() in content for marker in markers)
+    return any(marker in content for marker in markers)
+
+
+def _start_keep_alive(crm: ActiveConnect) -> None:
+    interval = float(get_config_value("session", "keep_alive_interval", default=0))
+    if interval <= 0:
+        return
+    crm.state.keep_alive = Thread(
+        target=_keep_alive,
+        args=(crm, interval),
+        name="naumen-keep-alive",
+        daemon=True,
+    )
+    crm.state.keep_alive.start()
+
+
+def _keep_alive(crm: ActiveConnect, interval: float) -> None:
+
+    """Функция поддержания сессии с CRM.
+    Если сессия не использовалась interval секунд, она проверяется функцией
+    ping. Работает до закрытия сессии.
+
+    Args:
+        crm: сессия с CRM Naumen.
+        interval: интервал запросов, сек.
+    """
+
+    while True:
+        idle = monotonic() - crm.state.last_used
+        if crm.state.closed.wait(max(0.0, interval - idle)):
+            return
+        if monotonic() - crm.state.last_used >= interval:
+            ping(crm)
@@ -0,0 +1,329 @@
+import logging
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from enum import Enum
+from threading import Lock
+from time import perf_counter
+from typing import Callable, Deque, Dict, Iterator, List, Sequence, Tuple, Union
+
+from ..config.config import get_config_value
+
+log = logging.getLogger(__name__)
+
+
+class Stage(Enum):
+
+    """Класс данных для хранения этапов получения отчёта.
+
+    Attributes:
+        CREATE: создание отчёта в CRM.
+        POLL: ожидание готовности отчёта.
+        DOWNLOAD: получение страницы отчёта или поиска.
+        PARSE: разбор страницы.
+        DELETE: удаление отчёта из CRM.
+        FORMAT: форматирование ответа клиента.
+    """
+
+    CREATE = "create"
+    POLL = "poll"
+    DOWNLOAD = "download"
+    PARSE = "parse"
+    DELETE = "delete"
+    FORMAT = "format"
+
+
+@dataclass(frozen=True)
+class TimingEvent:
+
+    """Класс данных для хранения времени выполнения этапа.
+
+    Attributes:
+        stage: этап.
+        report: имя типа отчёта или поиска, пустое для форматирования
+        ответа без отчёта.
+        duration: время выполнения, сек.
+        bytes: получено байт из CRM.
+        rows: разобрано или отформатировано записей.
+        retries: количество повторов запросов к CRM.
+        error: имя исключения, если этап завершился ошибкой.
+    """
+
+    stage: Stage
+    report: str
+    duration: float
+    bytes: int = 0
+    rows: int = 0
+    retries: int = 0
+    error: str = ""
+
+
+@dataclass
+class StageCounters:
+
+    """Класс данных для хранения счетчиков выполняемого этапа.
+    Заполняется кодом этапа внутри Instrumentation.measure.
+
+    Attributes:
+        bytes: получено байт из CRM.
+        rows: разобрано или отформатировано записей.
+        retries: количество повторов запросов к CRM.
+    """
+
+    bytes: int = 0
+    rows: int = 0
+    retries: int = 0
+
+
+@dataclass(frozen=True)
+class StageStats:
+
+    """Класс данных для хранения статистики этапа.
+
+    Attributes:
+        count: количество выполнений.
+        errors: количество выполнений с ошибкой.
+        p50: медиана времени выполнения, сек.
+        p95: 95-й перцентиль времени выполнения, сек.
+        p99: 99-й перцентиль времени выполнения, сек.
+        max: максимальное время выполнения, сек.
+        bytes: получено байт из CRM.
+        rows: разобрано или отформатировано записей.
+        retries: количество повторов запросов к CRM.
+    """
+
+    count: int
+    errors: int
+    p50: float
+    p95: float
+    p99: float
+    max: float
+    bytes: int
+    rows: int
+    retries: int
+
+
+HOOK = Callable[[TimingEvent], None]
+
+
+class Instrumentation:
+
+    """Измерение времени этапов получения отчётов.
+
+    Код этапа выполняется внутри measure, по завершении этапа событие
+    TimingEvent передается всем подписанным обработчикам. Ошибки
+    обработчиков записываются в лог и не влияют на запрос. Если
+    instrumentation.enabled выключен в конфигурации, события не создаются.
+    """
+
+    def __init__(self) -> None:
+        self._hooks: List[HOOK] = []
+        self._lock = Lock()
+
+    def subscribe(self, hook: HOOK) -> None:
+
+        """Метод подписки обработчика на события.
+
+        Args:
+            hook: функция, принимающая TimingEvent.
+        """
+
+        with self._lock:
+            if hook not in self._hooks:
+                self._hooks = self._hooks + [hook]
+
+    def unsubscribe(self, hook: HOOK) -> None:
+
+        """Метод отписки обработчика от событий.
+
+        Args:
+            hook: ранее подписанная функция.
+        """
+
+        with self._lock:
+            self._hooks = [_ for _ in self._hooks if _ != hook]
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._hooks) and bool(
+            get_config_value("instrumentation", "enabled", default=True),
+        )
+
+    def emit(self, event: TimingEvent) -> None:
+
+        """Метод передачи события обработчикам.
+
+        Args:
+            event: событие.
+        """
+
+        for hook in self._hooks:
+            try:
+                hook(event)
+            except Exception:
+                log.exception(f"Ошибка обработчика событий {hook!r}.")
+
+    @contextmanager
+    def measure(self, stage: Stage, report: str = "") -> Iterator[StageCounters]:
+
+        """Метод измерения времени этапа.
+
+        Args:
+            stage: этап.
+            report: имя типа отчёта или поиска.
+
+        Yields:
+            StageCounters: счетчики этапа, заполняемые его кодом.
+        """
+
+        counters = StageCounters()
+        if not self.enabled:
+            yield counters
+            return
+        error = ""
+        started = perf_counter()
+        try:
+            yield counters
+        except BaseException as exc:
+            error = type(exc).__name__
+            raise
+        finally:
+            self.emit(
+                TimingEvent(
+                    stage=stage,
+                    report=report,
+                    duration=perf_counter() - started,
+                    bytes=counters.bytes,
+                    rows=counters.rows,
+                    retries=counters.retries,
+                    error=error,
+                ),
+            )
+
+
+class TimingAggregator:
+
+    """Обработчик событий, хранящий в памяти последние history_size времен
+    выполнения каждого этапа каждого отчёта и считающий по ним перцентили.
+    """
+
+    def __init__(self, history_size: Union[int, None] = None) -> None:
+        """Создание агрегатора.
+
+        Args:
+            history_size: количество хранимых событий этапа отчёта. По
+            умолчанию из раздела instrumentation конфигурации.
+        """
+        self._history_size = history_size
+        self._events: Dict[Tuple[Stage, str], Deque[TimingEvent]] = {}
+        self._lock = Lock()
+
+    @property
+    def history_size(self) -> int:
+        if self._history_size is not None:
+            return self._history_size
+        return int(get_config_value("instrumentation", "history_size", default=1000))
+
+    def __call__(self, event: TimingEvent) -> None:
+        with self._lock:
+            events = self._events.get((event.stage, event.report))
+            if events is None:
+                events = deque(maxlen=self.history_size)
+                self._events[(event.stage, event.report)] = events
+            events.append(event)
+
+    def stats(self, report: Union[str, None] = None) -> Dict[Stage, StageStats]:
+
+        """Метод получения статистики по этапам.
+
+        Args:
+            report: имя типа отчёта, None - все отчёты.
+
+        Returns:
+            Dict[Stage, StageStats]: статистика этапов, по которым были
+            события.
+        """
+
+        by_stage: Dict[Stage, List[TimingEvent]] = {}
+        with self._lock:
+            for (stage, event_report), events in self._events.items():
+                if report is None or report == event_report:
+                    by_stage.setdefault(stage, []).extend(events)
+        return {stage: _make_stats(events) for stage, events in by_stage.items()}
+
+    def clear(self) -> None:
+        """Метод очистки накопленных событий."""
+
+        with self._lock:
+            self._events.clear()
+
+
+def _make_stats(events: Sequence[TimingEvent]) -> StageStats:
+    durations = sorted(event.duration for event in events)
+    return StageStats(
+        count=len(events),
+        errors=sum(1 for event in events if event.error),
+        p50=_percentile(durations, 50),
+        p95=_percentile(durations, 95),
+        p99=_percentile(durations, 99),
+        max=durations[-1],
+        bytes=sum(event.bytes for event in events),
+        rows=sum(event.rows for event in events),
+        retries=sum(event.retries for event in events),
+    )
+
+
+def _percentile(ordered: Sequence[float], percent: float) -> float:
+
+    """Функция получения перцентиля методом ближайшего ранга.
+
+    Args:
+        ordered: отсортированные значения.
+        percent: перцентиль, от 0 до 100.
+
+    Returns:
+        float: значение перцентиля.
+    """
+
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[int(rank) - 1]
+
+
+def response_size(response: object) -> int:
+
+    """Функция получения размера ответа requests: размер по заголовку
+    Content-Length, то есть сжатый, если он есть, иначе размер тела.
+
+    Args:
+        response: ответ requests.
+
+    Returns:
+        int: размер ответа, байт.
+    """
+
+    headers = getattr(response, "headers", None) or {}
+    length = str(headers.get("Content-Length", ""))
+    if length.isdigit():
+        return int(length)
+    return len(getattr(response, "content", b"") or b"")
+
+
+def count_retries(response: object) -> int:
+
+    """Функция получения количества повторов запроса, выполненных
+    адаптером requests.
+
+    Args:
+        response: ответ requests.
+
+    Returns:
+        int: количество повторов.
+    """
+
+    retries = getattr(getattr(response, "raw", None), "retries", None)
+    return len(getattr(retries, "history", ()) or ())
+
+
+INSTRUMENTATION = Instrumentation()
+TIMING_STATS = TimingAggregator()
+INSTRUMENTATION.subscribe(TIMING_STATS)
@@ -0,0 +1,414 @@
+import atexit
+import heapq
+import logging
+from dataclasses import dataclass, field
+from itertools import count
+from threading import Condition, Thread
+from time import monotonic, time
+from typing import Any, Callable, List, Tuple, Union
+
+from requests.exceptions import RequestException
+
+from ..config.config import get_config_value
+from ..config.structures import ActiveConnect, NaumenRequestType, TypeReport
+from ..exceptions import CantGetData
+from ..parser.report_page import find_generated_reports, parse
+from .concurrency import iter_bounded
+from .crm import get_crm_response
+
+log = logging.getLogger(__name__)
+
+DELETE_FUNC = Callable[[ActiveConnect, TypeReport, str], bool]
+
+
+@dataclass(order=True)
+class DeleteTask:
+
+    """Класс данных для хранения задачи удаления отчёта.
+
+    Attributes:
+        not_before: время monotonic, раньше которого отчёт не удаляется.
+        order: порядковый номер задачи.
+        crm: соединение с CRM, в котором создан отчёт.
+        report: тип отчёта.
+        uuid: uuid отчёта, пустой - ещё не известен.
+        attempts: количество неудачных попыток удаления.
+        name: название отчёта, по которому ищется его uuid.
+    """
+
+    not_before: float
+    order: int
+    crm: ActiveConnect = field(compare=False)
+    report: TypeReport = field(compare=False)
+    uuid: str = field(compare=False)
+    attempts: int = field(default=0, compare=False)
+    name: str = field(default="", compare=False)
+
+
+class ReportJanitor:
+
+    """Фоновое удаление сформированных отчётов из CRM Naumen.
+
+    Отчёты ставятся в очередь и удаляются фоновым потоком пачками, не
+    задерживая ответ на запрос. Неудачные удаления повторяются с растущей
+    задержкой. При завершении программы оставшиеся отчёты удаляются.
+    Отчёты, оставшиеся в CRM после аварийных завершений, находятся по
+    шаблону имени get_report_name() и удаляются методом sweep, если они
+    созданы раньше sweep_min_age секунд назад.
+
+    Параметры, не переданные явно, берутся из раздела janitor конфигурации.
+    """
+
+    def __init__(
+        self,
+        delete_func: DELETE_FUNC,
+        *,
+        batch_size: Union[int, None] = None,
+        workers: Union[int, None] = None,
+        max_retries: Union[int, None] = None,
+        retry_delay: Union[float, None] = None,
+        delete_delay: Union[float, None] = None,
+        sweep_min_age: Union[float, None] = None,
+    ) -> None:
+        """Создание фонового удаления отчётов.
+
+        Args:
+            delete_func: функция удаления одного отчёта.
+
+        Kwargs:
+            batch_size: количество отчётов, удаляемых за один проход.
+            workers: количество одновременных запросов удаления.
+            max_retries: количество повторов неудачного удаления.
+            retry_delay: задержка перед первым повтором, сек.
+            delete_delay: задержка удаления после постановки в очередь, сек.
+            sweep_min_age: возраст отчёта, после которого sweep считает его
+            брошенным, сек.
+        """
+        self.delete_func = delete_func
+        self._options = {
+            "batch_size": batch_size,
+            "workers": workers,
+            "max_retries": max_retries,
+            "retry_delay": retry_delay,
+            "delete_delay": delete_delay,
+            "sweep_min_age": sweep_min_age,
+        }
+        self._tasks: List[DeleteTask] = []
+        self._order = count()
+        self._in_progress = 0
+        self._condition = Condition()
+        self._thread: Union[Thread, None] = None
+        self._atexit_registered = False
+
+    @property
+    def batch_size(self) -> int:
+        return max(1, int(self._option("batch_size", 10)))
+
+    @property
+    def workers(self) -> int:
+        return max(1, int(self._option("workers", 2)))
+
+    @property
+    def max_retries(self) -> int:
+        return int(self._option("max_retries", 3))
+
+    @property
+    def retry_delay(self) -> float:
+        return float(self._option("retry_delay", 5))
+
+    @property
+    def delete_delay(self) -> float:
+        return float(self._option("delete_delay", 0))
+
+    @property
+    def sweep_min_age(self) -> float:
+        return float(self._option("sweep_min_age", 3600))
+
+    def schedule(
+        self,
+        crm: ActiveConnect,
+        report: TypeReport,
+        uuid: str,
+        delay: Union[float, None] = None,
+    ) -> None:
+
+        """Метод постановки отчёта в очередь на удаление.
+
+        Args:
+            crm: соединение с CRM, в котором создан отчёт.
+            report: тип отчёта.
+            uuid: uuid отчёта.
+            delay: задержка удаления, сек. По умолчанию delete_delay.
+        """
+
+        if delay is None:
+            delay = self.delete_delay
+        log.debug(f"Отчёт {uuid} поставлен в очередь на удаление.")
+        with self._condition:
+            heapq.heappush(
+                self._tasks,
+                DeleteTask(monotonic() + delay, next(self._order), crm, report, uuid),
+            )
+            self._start()
+            self._condition.notify()
+
+    def schedule_by_name(
+        self,
+        crm: ActiveConnect,
+        report: TypeReport,
+        name: str,
+        delay: Union[float, None] = None,
+    ) -> None:
+
+        """Метод постановки в очередь на удаление отчёта, uuid которого не
+        известен: отчёт создан, но не найден в списке отчётов. Перед
+        удалением uuid ищется по названию, пока отчёт не найден, удаление
+        повторяется как неудачное.
+
+        Args:
+            crm: соединение с CRM, в котором создан отчёт.
+            report: тип отчёта.
+            name: название отчёта.
+            delay: задержка удаления, сек. По умолчанию retry_delay.
+        """
+
+        if delay is None:
+            delay = self.retry_delay
+        log.debug(f"Отчёт {name} поставлен в очередь на удаление.")
+        with self._condition:
+            heapq.heappush(
+                self._tasks,
+                DeleteTask(
+                    monotonic() + delay,
+                    next(self._order),
+                    crm,
+                    report,
+                    "",
+                    name=name,
+                ),
+            )
+            self._start()
+            self._condition.notify()
+
+    def flush(self, crm: Any = None) -> None:
+
+        """Метод немедленного удаления отчётов из очереди в текущем
+        потоке, без учёта задержек и без повторов.
+
+        Args:
+            crm: соединение или пул сессий, отчёты которого удаляются.
+            По умолчанию удаляются все отчёты очереди.
+        """
+
+        with self._condition:
+            tasks: List[DeleteTask] = []
+            kept: List[DeleteTask] = []
+            for task in self._tasks:
+                if crm is None or owns(crm, task.crm):
+                    tasks.append(task)
+                else:
+                    kept.append(task)
+            heapq.heapify(kept)
+            self._tasks = kept
+            self._in_progress += len(tasks)
+        if tasks:
+            log.debug(f"Удаление {len(tasks)} отчётов из очереди.")
+        for start in range(0, len(tasks), self.batch_size):
+            self._process(tasks[start:start + self.batch_size], retry=False)
+
+    def join(self, timeout: Union[float, None] = None) -> bool:
+
+        """Метод ожидания опустошения очереди.
+
+        Args:
+            timeout: максимальное время ожидания, сек.
+
+        Returns:
+            bool: True, если все отчёты обработаны.
+        """
+
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: not self._tasks and not self._in_progress,
+                timeout,
+            )
+
+    def sweep(self, crm: ActiveConnect) -> int:
+
+        """Метод поиска и удаления отчётов, оставшихся в CRM.
+        Находит в списках отчётов отчёты с именами по шаблону
+        get_report_name(), созданные раньше sweep_min_age секунд назад,
+        и ставит их в очередь на удаление.
+
+        Args:
+            crm: активное соединение с CRM.
+
+        Returns:
+            int: количество найденных отчётов.
+        """
+
+        found = 0
+        created_before = time() - self.sweep_min_age
+        for report, list_uuid in sweep_targets():
+            try:
+                response = get_crm_response(
+                    crm,
+                    report,
+                    NaumenRequestType.SEARCH_REPORT,
+                    mod_params=(("uuid", list_uuid),),
+                    method="GET",
+                )
+                generated_reports = find_generated_reports(
+                    response.text,
+                    created_before,
+                )
+            except (CantGetData, RequestException):
+                log.warning(f"Не удалось получить список отчётов {report}.")
+                continue
+            for name, uuid in generated_reports:
+                log.info(f"Найден неудаленный отчёт {name}: {uuid}")
+                self.schedule(crm, report, uuid, delay=0)
+                found += 1
+        return found
+
+    def __len__(self) -> int:
+        with self._condition:
+            return len(self._tasks) + self._in_progress
+
+    def _start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = Thread(
+                target=self._run,
+                name="naumen-report-janitor",
+                daemon=True,
+            )
+            self._thread.start()
+        if not self._atexit_registered:
+            atexit.register(self.flush)
+            self._atexit_registered = True
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                batch = self._take_due()
+                while not batch:
+                    timeout = None
+                    if self._tasks:
+                        timeout = max(0.0, self._tasks[0].not_before - monotonic())
+                    self._condition.wait(timeout)
+                    batch = self._take_due()
+            self._process(batch, retry=True)
+
+    def _take_due(self) -> List[DeleteTask]:
+        batch: List[DeleteTask] = []
+        now = monotonic()
+        while self._tasks and len(batch) < self.batch_size:
+            if self._tasks[0].not_before > now:
+                break
+            batch.append(heapq.heappop(self._tasks))
+        self._in_progress += len(batch)
+        return batch
+
+    def _process(self, batch: List[DeleteTask], retry: bool) -> None:
+        futures = iter_bounded(self._delete, batch, self.workers)
+        failed = []
+        for task, future in futures:
+            try:
+                deleted = future.result()
+            except Exception as exc:
+                # фоновый поток не должен останавливаться из-за ошибки удаления.
+                log.warning(f"Ошибка удаления отчёта {task.uuid or task.name}: {exc!r}")
+                deleted = False
+            if not deleted:
+                failed.append(task)
+
+        with self._condition:
+            for task in failed:
+                task.attempts += 1
+                if not retry or task.attempts > self.max_retries:
+                    log.error(
+                        f"Отчёт {task.uuid or task.name} не удален из CRM Naumen.",
+                    )
+                    continue
+                task.not_before = monotonic() + self.retry_delay * 2 ** (
+                    task.attempts - 1
+                )
+                heapq.heappush(self._tasks, task)
+            self._in_progress -= len(batch)
+            self._condition.notify_all()
+
+    def _delete(self, task: DeleteTask) -> bool:
+        if not task.uuid:
+            task.uuid = find_report_by_name(task.crm, task.report, task.name)
+            if not task.uuid:
+                log.debug(f"Отчёт {task.name} не найден в списке отчётов.")
+                return False
+        return self.delete_func(task.crm, task.report, task.uuid)
+
+    def _option(self, name: str, default: Any) -> Any:
+        value = self._options[name]
+        if value is None:
+            value = get_config_value("janitor", name, default=default)
+        return value
+
+
+def find_report_by_name(crm: ActiveConnect, report: TypeReport, name: str) -> str:
+
+    """Функция поиска uuid отчёта по названию в списке отчётов.
+
+    Args:
+        crm: соединение с CRM.
+        report: тип отчёта.
+        name: название отчёта.
+
+    Returns:
+        str: uuid отчёта или пустая строка, если отчёт не найден.
+
+    Raises:
+        CantGetData: если не удалось получить список отчётов.
+    """
+
+    list_uuid = get_config_value(report.value, "uuid", default="")
+    response = get_crm_response(
+        crm,
+        report,
+        NaumenRequestType.SEARCH_REPORT,
+        mod_params=(("uuid", list_uuid),),
+        method="GET",
+    )
+    found = parse(response.text, name)
+    return found[0] if found else ""
+
+
+def sweep_targets() -> List[Tuple[TypeReport, str]]:
+
+    """Функция получения списков отчётов, в которых ищутся оставшиеся
+    в CRM отчёты.
+
+    Returns:
+        List[Tuple[TypeReport, str]]: типы отчётов и uuid их списков.
+    """
+
+    targets = []
+    for report in TypeReport:
+        list_uuid = get_config_value(report.value, "uuid", default="")
+        if list_uuid:
+            targets.append((report, list_uuid))
+    return targets
+
+
+def owns(crm: Any, connect: Any) -> bool:
+
+    """Функция проверки, что отчёт создан через соединение crm.
+
+    Args:
+        crm: соединение или пул сессий.
+        connect: соединение, в котором создан отчёт.
+
+    Returns:
+        bool: True, если connect - это crm или одна из сессий пула crm.
+    """
+
+    if connect is crm:
+        return True
+    return any(connect is pooled for pooled in getattr(crm, "connects", ()))
@@ -0,0 +1,147 @@
+import logging
+from collections import deque
+from random import uniform
+from statistics import median
+from threading import Lock
+from time import monotonic
+from typing import Any, Deque, Dict, Iterator, Union
+
+from ..config.config import get_config_value
+from ..config.structures import TypeReport
+
+log = logging.getLogger(__name__)
+
+
+class PollingStrategy:
+
+    """Стратегия ожидания готовности отчёта в CRM Naumen.
+
+    Первая проверка выполняется через короткую задержку, каждая следующая
+    через экспоненциально растущую задержку со случайным разбросом.
+    Ожидание ограничено общим дедлайном. Время формирования отчётов
+    запоминается по каждому типу отчёта, и по нему подбирается задержка
+    перед первой проверкой.
+
+    Параметры, не переданные явно, берутся из раздела polling конфигурации.
+    """
+
+    def __init__(
+        self,
+        *,
+        first_delay: Union[float, None] = None,
+        factor: Union[float, None] = None,
+        max_delay: Union[float, None] = None,
+        jitter: Union[float, None] = None,
+        history_size: int = 20,
+    ) -> None:
+        """Создание стратегии ожидания.
+
+        Kwargs:
+            first_delay: задержка перед первой проверкой, сек.
+            factor: множитель экспоненциального роста задержки.
+            max_delay: максимальная задержка между проверками, сек.
+            jitter: доля случайного разброса задержки.
+            history_size: количество запоминаемых времен формирования.
+        """
+        self._options = {
+            "first_delay": first_delay,
+            "factor": factor,
+            "max_delay": max_delay,
+            "jitter": jitter,
+        }
+        self._history_size = history_size
+        self._build_times: Dict[TypeReport, Deque[float]] = {}
+        self._lock = Lock()
+
+    @property
+    def first_delay(self) -> float:
+        return float(self._option("first_delay", 1.0))
+
+    @property
+    def factor(self) -> float:
+        return float(self._option("factor", 2.0))
+
+    @property
+    def max_delay(self) -> float:
+        return float(self._option("max_delay", 30.0))
+
+    @property
+    def jitter(self) -> float:
+        return float(self._option("jitter", 0.1))
+
+    def initial_delay(self, report: TypeReport) -> float:
+        """Метод для получения задержки перед первой проверкой.
+
+        Args:
+            report: тип отчёта.
+
+        Returns:
+            float: медиана наблюдаемого времени формирования отчёта или
+            first_delay, если наблюдений ещё нет.
+        """
+        with self._lock:
+            build_times = list(self._build_times.get(report, ()))
+        if not build_times:
+            return self.first_delay
+        return min(max(median(build_times), self.first_delay), self.max_delay)
+
+    def record(
+        self,
+        report: TypeReport,
+        found_at: float,
+        missed_at: float = 0.0,
+    ) -> None:
+        """Метод для сохранения наблюдаемого времени формирования отчёта.
+        Отчёт сформирован между последней неудачной и удачной проверками,
+        поэтому запоминается середина этого интервала. Время обнаружения
+        отчёта не меньше задержки первой проверки, и без такой поправки
+        медиана только росла бы вместе с задержкой.
+
+        Args:
+            report: тип отчёта.
+            found_at: время от создания отчёта до удачной проверки, сек.
+            missed_at: время от создания отчёта до последней неудачной
+            проверки, сек.
+        """
+        build_time = (missed_at + found_at) / 2
+        log.debug(f"Отчёт {report} сформирован примерно за {build_time:.2f} сек.")
+        with self._lock:
+            history = self._build_times.setdefault(
+                report,
+                deque(maxlen=self._history_size),
+            )
+            history.append(build_time)
+
+    def delays(self, report: TypeReport, deadline: float) -> Iterator[float]:
+        """Генератор задержек перед очередной проверкой готовности отчёта.
+
+        Args:
+            report: тип отчёта.
+            deadline: общее время ожидания отчёта, сек.
+
+        Yields:
+            float: задержка перед очередной проверкой, сек.
+        """
+        started = monotonic()
+        delay = self.initial_delay(report)
+        while True:
+            remaining = deadline - (monotonic() - started)
+            if remaining <= 0:
+                return
+            yield min(self._with_jitter(delay), remaining)
+            delay = min(delay * self.factor, self.max_delay)
+
+    def _with_jitter(self, delay: float) -> float:
+        jitter = self.jitter
+        if not jitter:
+            return delay
+        return max(0.0, delay * uniform(1 - jitter, 1 + jitter))
+
+    def _option(self, name: str, default: Any) -> Any:
+        value = self._options[name]
+        if value is None:
+            return get_config_value("polling", name, default=default)
+        return value
+
+
+POLLING_STRATEGY = PollingStrategy()
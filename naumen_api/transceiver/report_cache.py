@@ -0,0 +1,348 @@
+import logging
+import os
+import pickle
+import sqlite3
+from collections import OrderedDict
+from contextlib import closing
+from datetime import date, datetime
+from threading import Lock
+from time import time
+from typing import Any, Sequence, Tuple, Union
+from urllib.parse import urlsplit
+
+from ..config.config import CONFIG, get_config_value
+from ..config.structures import TypeReport
+
+log = logging.getLogger(__name__)
+
+CACHED_REPORTS = (
+    TypeReport.SERVICE_LEVEL,
+    TypeReport.MTTR_LEVEL,
+    TypeReport.FLR_LEVEL,
+    TypeReport.AHT_LEVEL,
+)
+
+
+class ReportCacheBackend:
+
+    """Базовый класс хранилища кэша отчётов.
+    Хранилище работает с готовыми ключами и сериализованными отчётами,
+    expires_at None означает бессрочное хранение.
+    """
+
+    def get(self, key: str) -> Union[bytes, None]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, expires_at: Union[float, None]) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+class MemoryBackend(ReportCacheBackend):
+
+    """Хранилище кэша отчётов в памяти процесса с ограничением размера."""
+
+    def __init__(self, max_size: int = 256) -> None:
+        self.max_size = max_size
+        self._items: "OrderedDict[str, Tuple[bytes, Union[float, None]]]" = (
+            OrderedDict()
+        )
+        self._lock = Lock()
+
+    def get(self, key: str) -> Union[bytes, None]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at < time():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, expires_at: Union[float, None]) -> None:
+        with self._lock:
+            self._items[key] = (value, expires_at)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+class SQLiteBackend(ReportCacheBackend):
+
+    """Хранилище кэша отчётов в файле SQLite, переживает перезапуск.
+
+    Если задан max_size, при записи удаляются истекшие отчёты и самые
+    давно записанные сверх max_size.
+
+    Отчёты хранятся сериализованными pickle и восстанавливаются
+    pickle.loads, который может выполнить произвольный код. Файл должен
+    быть доступен на запись только процессам, которым доверяет клиент:
+    новый файл создаётся с правами только для владельца.
+    """
+
+    def __init__(self, path: str, max_size: int = 0) -> None:
+        self.path = path
+        self.max_size = max_size
+        if path != ":memory:" and not os.path.exists(path):
+            os.close(os.open(path, os.O_CREAT | os.O_WRONLY, 0o600))
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS report_cache "
+                "(key TEXT PRIMARY KEY, value BLOB, expires_at REAL)",
+            )
+
+    def get(self, key: str) -> Union[bytes, None]:
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                "SELECT value, expires_at FROM report_cache WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at is not None and expires_at < time():
+            self.delete(key)
+            return None
+        return value
+
+    def set(self, key: str, value: bytes, expires_at: Union[float, None]) -> None:
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO report_cache VALUES (?, ?, ?)",
+                (key, value, expires_at),
+            )
+            if self.max_size > 0:
+                self._evict(connection)
+
+    def delete(self, key: str) -> None:
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM report_cache WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM report_cache")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _evict(self, connection: sqlite3.Connection) -> None:
+        connection.execute(
+            "DELETE FROM report_cache WHERE expires_at < ?",
+            (time(),),
+        )
+        # замена записи выдаёт ей новый rowid, поэтому он растёт со временем записи.
+        connection.execute(
+            "DELETE FROM report_cache WHERE rowid NOT IN "
+            "(SELECT rowid FROM report_cache ORDER BY rowid DESC LIMIT ?)",
+            (self.max_size,),
+        )
+
+
+class ReportCache:
+
+    """Кэш разобранных отчётов SL, MTTR, FLR и AHT.
+
+    Ключом является учетная запись CRM, тип отчёта и все данные запроса
+    (период, deadline и прочие параметры): у разных пользователей CRM
+    могут быть разные права. Отчёты за полностью закрытые периоды не могут
+    измениться и хранятся бессрочно, отчёты за период, захватывающий
+    сегодняшний день, хранятся ttl секунд.
+
+    Хранилище и параметры, не переданные явно, берутся из раздела
+    report_cache конфигурации. Пустое значение backend выключает кэш.
+    """
+
+    def __init__(
+        self,
+        backend: Union[ReportCacheBackend, None] = None,
+        *,
+        ttl: Union[float, None] = None,
+    ) -> None:
+        """Создание кэша отчётов.
+
+        Args:
+            backend: хранилище кэша.
+
+        Kwargs:
+            ttl: время хранения отчётов за незакрытый период, сек.
+        """
+        self._backend = backend
+        self._ttl = ttl
+        self._lock = Lock()
+
+    @property
+    def backend(self) -> Union[ReportCacheBackend, None]:
+        with self._lock:
+            if self._backend is None:
+                self._backend = _backend_from_config()
+            return self._backend
+
+    @backend.setter
+    def backend(self, value: Union[ReportCacheBackend, None]) -> None:
+        with self._lock:
+            self._backend = value
+
+    @property
+    def ttl(self) -> float:
+        if self._ttl is not None:
+            return self._ttl
+        return float(get_config_value("report_cache", "ttl", default=60))
+
+    def get(
+        self,
+        report: TypeReport,
+        mod_data: Union[Tuple[Tuple[str, Any]], Tuple],
+        mod_params: Union[Tuple[Tuple[str, Any]], Tuple] = (),
+        *,
+        account: str = "",
+    ) -> Union[Sequence, None]:
+
+        """Метод получения отчёта из кэша.
+
+        Args:
+            report: тип отчёта.
+            mod_data: данные запроса отчёта.
+            mod_params: параметры запроса отчёта.
+
+        Kwargs:
+            account: учетная запись CRM, см. account_key.
+
+        Returns:
+            Union[Sequence, None]: отчёт или None, если его нет в кэше.
+        """
+
+        backend = self.backend
+        if backend is None or report not in CACHED_REPORTS:
+            return None
+        value = backend.get(_make_key(report, mod_data, mod_params, account))
+        if value is None:
+            return None
+        log.debug(f"Отчёт {report} получен из кэша.")
+        return pickle.loads(value)
+
+    def put(
+        self,
+        report: TypeReport,
+        mod_data: Union[Tuple[Tuple[str, Any]], Tuple],
+        collect: Sequence,
+        mod_params: Union[Tuple[Tuple[str, Any]], Tuple] = (),
+        *,
+        account: str = "",
+    ) -> None:
+
+        """Метод сохранения отчёта в кэш.
+
+        Args:
+            report: тип отчёта.
+            mod_data: данные запроса отчёта.
+            collect: разобранный отчёт.
+            mod_params: параметры запроса отчёта.
+
+        Kwargs:
+            account: учетная запись CRM, см. account_key.
+        """
+
+        backend = self.backend
+        if backend is None or report not in CACHED_REPORTS:
+            return
+        end_date = _get_end_date(mod_data)
+        if end_date is None:
+            return
+        expires_at = None if end_date < date.today() else time() + self.ttl
+        backend.set(
+            _make_key(report, mod_data, mod_params, account),
+            pickle.dumps(collect),
+            expires_at,
+        )
+
+    def clear(self) -> None:
+        """Метод очистки кэша."""
+
+        backend = self.backend
+        if backend is not None:
+            backend.clear()
+
+
+def _backend_from_config() -> Union[ReportCacheBackend, None]:
+
+    """Функция создания хранилища кэша отчётов по конфигурации.
+
+    Returns:
+        Union[ReportCacheBackend, None]: хранилище или None, если кэш
+        выключен.
+    """
+
+    name = get_config_value("report_cache", "backend", default="memory")
+    max_size = get_config_value("report_cache", "max_size", default=256)
+    if name == "memory":
+        return MemoryBackend(max_size)
+    if name == "sqlite":
+        path = get_config_value("report_cache", "path", default="")
+        return SQLiteBackend(path or "naumen_reports.sqlite3", max_size)
+    if name:
+        log.warning(f"Неизвестное хранилище кэша отчётов: {name}")
+    return None
+
+
+def account_key(crm: Any) -> str:
+
+    """Функция получения учетной записи соединения для ключей кэша.
+    Для пула сессий это все учетные записи его сессий. Учетная запись
+    дополняется адресом CRM, поэтому общий файл кэша не смешивает отчёты
+    разных CRM. Соединение без сохраненных учетных данных кэширует отчёты
+    только для себя по случайному идентификатору сессии.
+
+    Args:
+        crm: соединение с CRM или пул сессий.
+
+    Returns:
+        str: учетная запись вида domain\\username@host.
+    """
+
+    connects = getattr(crm, "connects", None)
+    if connects is not None:
+        return ",".join(sorted({account_key(connect) for connect in connects}))
+    credentials = getattr(crm, "credentials", None)
+    if credentials is None:
+        state = getattr(crm, "state", None)
+        return f"session-{state.token}" if state is not None else ""
+    account = f"{credentials.domain}\\{credentials.username}"
+    host = urlsplit(CONFIG.config["url"]["main"]).netloc
+    return f"{account}@{host}" if host else account
+
+
+def _make_key(
+    report: TypeReport,
+    mod_data: Union[Tuple[Tuple[str, Any]], Tuple],
+    mod_params: Union[Tuple[Tuple[str, Any]], Tuple],
+    account: str = "",
+) -> str:
+    data = sorted((str(name), str(value)) for name, value in mod_data)
+    params = sorted((str(name), str(value)) for name, value in mod_params)
+    return repr((account, report.name, data, params))
+
+
+def _get_end_date(mod_data: Union[Tuple[Tuple[str, Any]], Tuple]) -> Union[date, None]:
+    try:
+        end_date = dict(mod_data)["end_date"]
+        return datetime.strptime(str(end_date), "%d.%m.%Y").date()
+    except (KeyError, ValueError):
+        return None
+
+
+REPORT_CACHE = ReportCache()
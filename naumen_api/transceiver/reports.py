@@ -1,17 +1,37 @@
 import logging
+from concurrent.futures import Future
 from dataclasses import fields
-from time import sleep
-from typing import Any, Mapping, Sequence, Tuple, Union
+from time import monotonic, sleep
+from typing import Any, Iterator, List, Mapping, Sequence, Tuple, Union
 
-from ..config.config import get_report_name, get_search_create_report_params
+from requests.exceptions import RequestException
+
+from ..config.config import (
+    get_config_value,
+    get_report_name,
+    get_search_create_report_params,
+)
 from ..config.structures import NaumenRequestType, SearchOptions, TypeReport
 from ..exceptions import CantGetData
-from ..parser.parser import parse_naumen_page
+from ..parser.issues import Issue
+from ..parser.parser import parse_naumen_page, parse_naumen_pages
 from ..parser.parser_base import PageType
+from .cache import ISSUE_CARD_CACHE
+from .coalescing import REPORT_COALESCER, make_report_key
+from .concurrency import iter_bounded
 from .crm import ActiveConnect, get_crm_response
+from .instrumentation import INSTRUMENTATION, Stage, count_retries, response_size
+from .janitor import ReportJanitor
+from .polling import POLLING_STRATEGY
+from .report_cache import REPORT_CACHE, account_key
+from .segments import SEGMENT_STORE
+from .session_pool import leased
 
 log = logging.getLogger(__name__)
 
+# ошибки получения карточки, при которых обращение отдается без неё.
+_CARD_ERRORS = (CantGetData, RequestException, AttributeError, ValueError)
+
 
 def get_report(
     crm: ActiveConnect,
@@ -23,6 +43,10 @@ def get_report(
     **kwargs: Mapping,
 ) -> Sequence:
     """Функция для получения отчёта из CRM.
+    Отчёты SL, MTTR, FLR и AHT берутся из кэша отчётов, если такой отчёт
+    уже был получен, иначе собираются по дням: из CRM запрашиваются только
+    дни, которых нет в хранилище. Одновременные одинаковые запросы
+    формируют отчёт один раз.
 
     Args:
         crm (ActiveConnect): активное соединение с CRM.
@@ -43,49 +67,164 @@ def get_report(
         CantGetData: в случае невозможности вернуть коллекцию.
     """
 
-    report_exists = True if naumen_uuid else False
-    need_delete_report = False
-    is_vip_issues = True if report == TypeReport.ISSUES_VIP_LINE else False
-    parse_issue_history, parse_issue_card = False, False
-    report_name = get_report_name()
-
-    if report in [TypeReport.ISSUES_FIRST_LINE, TypeReport.ISSUES_VIP_LINE]:
-        _: Mapping[str, Any] = dict(mod_data)
-        parse_issue_history, parse_issue_card, _ = _check_issues_report_keys(**_)
-        mod_data = tuple(_.items())
-
-    if report_exists:
-        log.debug(f"Обьект в CRM NAUMEN уже создан. Его UUID: {naumen_uuid}")
-
-    else:
-        need_delete_report = True
-        _ = dict(mod_data)
-        _.update({"title": report_name})
-        mod_data = tuple(_.items())
-
-        _create_report(
+    if naumen_uuid:
+        return _build_report(
             crm,
             report,
-            NaumenRequestType.CREATE_REPORT,
             *args,
+            naumen_uuid=naumen_uuid,
             mod_params=mod_params,
             mod_data=mod_data,
             **kwargs,
         )
-        params_for_search_report = get_search_create_report_params(report, report_name)
-        naumen_uuid = _find_report_uuid(crm, params_for_search_report, report)
 
-    log.debug(f"Найден UUID сформированного отчёта : {naumen_uuid}")
+    account = account_key(crm)
+    collect = REPORT_CACHE.get(report, mod_data, mod_params, account=account)
+    if collect is not None:
+        return collect
 
-    mod_params = tuple({"uuid": naumen_uuid}.items())
-    report_page = _get_report(
-        crm,
-        report,
-        NaumenRequestType.SEARCH_REPORT,
-        mod_params=mod_params,
+    def _collect() -> Sequence:
+        collect = SEGMENT_STORE.assemble(
+            report,
+            mod_data,
+            mod_params,
+            lambda data: _build_report(
+                crm,
+                report,
+                *args,
+                mod_params=mod_params,
+                mod_data=data,
+                **kwargs,
+            ),
+            account=account,
+        )
+        REPORT_CACHE.put(report, mod_data, collect, mod_params, account=account)
+        return collect
+
+    return REPORT_COALESCER.run(
+        make_report_key(crm, report, mod_data, mod_params, kwargs),
+        _collect,
     )
 
-    collect = parse_naumen_page(report_page, report.page)
+
+def _build_report(
+    crm: ActiveConnect,
+    report: TypeReport,
+    *args: Sequence,
+    naumen_uuid: str = "",
+    mod_params: Union[Tuple[Tuple[str, Any]], Tuple] = (),
+    mod_data: Union[Tuple[Tuple[str, Any]], Tuple] = (),
+    **kwargs: Mapping,
+) -> Sequence:
+    """Функция формирования отчёта в CRM, его получения и разбора.
+    Если такой же отчёт был недавно сформирован, открывается он.
+
+    Args:
+        crm (ActiveConnect): активное соединение с CRM.
+        report (TypeReport): отчёт, который необходимо получить.
+        *args (Sequence): позиционные аргументы(не используются)
+
+    Kwargs:
+        naumen_uuid (str): uuid уже созданного отчёта.
+        mod_params (Union[Tuple[Tuple[str, Any]], Tuple]): обновленные
+        параметры
+        mod_data (Union[Tuple[Tuple[str, Any]], Tuple]): обновленные
+        данные запроса
+        **kwargs: именнованные аргументы для создания отчёта.
+
+    Returns:
+        Sequence: коллекция обьектов необходимого отчёта.
+    Raises:
+        CantGetData: в случае невозможности вернуть коллекцию.
+    """
+
+    report_exists = True if naumen_uuid else False
+    need_delete_report = False
+    reuse_key = make_report_key(crm, report, mod_data, mod_params, kwargs)
+    if not report_exists:
+        reused_uuid = REPORT_COALESCER.recall(reuse_key)
+        if reused_uuid:
+            try:
+                return _build_report(
+                    crm,
+                    report,
+                    *args,
+                    naumen_uuid=reused_uuid,
+                    mod_params=mod_params,
+                    mod_data=mod_data,
+                    **kwargs,
+                )
+            except CantGetData:
+                log.debug(f"Отчёт {reused_uuid} недоступен, формируется новый.")
+                REPORT_COALESCER.forget(reuse_key)
+
+    is_vip_issues = True if report == TypeReport.ISSUES_VIP_LINE else False
+    parse_issue_history, parse_issue_card = False, False
+    report_name = get_report_name()
+
+    if report in [TypeReport.ISSUES_FIRST_LINE, TypeReport.ISSUES_VIP_LINE]:
+        parse_issue_history, parse_issue_card, kwargs = _check_issues_report_keys(
+            **kwargs,
+        )
+
+    # отчёт формируется, ищется и открывается в одной сессии пула.
+    with leased(crm) as connect:
+        delete_delay = None
+        try:
+            if report_exists:
+                log.debug(f"Обьект в CRM NAUMEN уже создан. Его UUID: {naumen_uuid}")
+
+            else:
+                need_delete_report = True
+                _: Mapping[str, Any] = dict(mod_data)
+                _.update({"title": report_name})
+                mod_data = tuple(_.items())
+
+                _create_report(
+                    connect,
+                    report,
+                    NaumenRequestType.CREATE_REPORT,
+                    *args,
+                    mod_params=mod_params,
+                    mod_data=mod_data,
+                    **kwargs,
+                )
+                params_for_search_report = get_search_create_report_params(
+                    report,
+                    report_name,
+                )
+                naumen_uuid = _find_report_uuid(
+                    connect,
+                    params_for_search_report,
+                    report,
+                )
+
+            log.debug(f"Найден UUID сформированного отчёта : {naumen_uuid}")
+
+            report_page = _get_report(
+                connect,
+                report,
+                NaumenRequestType.SEARCH_REPORT,
+                mod_params=tuple({"uuid": naumen_uuid}.items()),
+            )
+            if need_delete_report:
+                delete_delay = REPORT_COALESCER.remember(reuse_key, naumen_uuid)
+        finally:
+            # отчёт удаляется в фоне, в том числе если его не удалось найти
+            # или получить: без uuid отчёт ищется по названию.
+            if need_delete_report and naumen_uuid:
+                REPORT_JANITOR.schedule(
+                    connect,
+                    report,
+                    naumen_uuid,
+                    delay=delete_delay,
+                )
+            elif need_delete_report:
+                REPORT_JANITOR.schedule_by_name(connect, report, report_name)
+
+    with INSTRUMENTATION.measure(Stage.PARSE, report.name) as counters:
+        collect = parse_naumen_page(report_page, report.page)
+        counters.rows = len(collect)
 
     if is_vip_issues:
         for vip_issue in collect:
@@ -93,30 +232,264 @@ def get_report(
                 vip_issue.vip_contragent = True
 
     if parse_issue_card:
-        collect = list(collect)
         log.debug("Парсинг карточек обращений.")
+        collect = _enrich_issue_cards(crm, collect)
 
-        for num, issue in enumerate(collect):
-            issue_card = get_report(crm, TypeReport.ISSUE_CARD, naumen_uuid=issue.uuid)[
-                0
-            ]
+    if parse_issue_history:
+        log.debug("Парсинг истории обращений.")
+        raise NotImplementedError
 
-            for field in fields(issue_card):
-                issue_card_field_value = getattr(issue_card, field.name)
+    return collect
 
-                if issue_card_field_value:
-                    setattr(issue, field.name, issue_card_field_value)
 
-            collect[num] = issue
+def iter_issues(
+    crm: ActiveConnect,
+    report: TypeReport,
+    *args: Sequence,
+    mod_params: Union[Tuple[Tuple[str, Any]], Tuple] = (),
+    mod_data: Union[Tuple[Tuple[str, Any]], Tuple] = (),
+    **kwargs: Mapping,
+) -> Iterator[Issue]:
+    """Генератор обращений из таблицы обращений на линии.
+    Если нужно парсить карточки, обращения отдаются по одному, как только
+    готова карточка очередного обращения.
 
-    if parse_issue_history:
-        log.debug("Парсинг истории обращений.")
-        raise NotImplementedError
+    Args:
+        crm (ActiveConnect): активное соединение с CRM.
+        report (TypeReport): таблица обращений первой или vip линии.
+        *args (Sequence): позиционные аргументы(не используются)
+
+    Kwargs:
+        mod_params (Union[Tuple[Tuple[str, Any]], Tuple]): обновленные
+        параметры
+        mod_data (Union[Tuple[Tuple[str, Any]], Tuple]): обновленные
+        данные запроса
+        **kwargs: именнованные аргументы для создания отчёта.
 
-    if need_delete_report:
-        _delete_report(crm, report, naumen_uuid)
+    Yields:
+        Issue: очередное обращение.
 
-    return collect
+    Raises:
+        CantGetData: в случае невозможности получить таблицу обращений.
+    """
+
+    parse_issue_history, parse_issue_card, kwargs = _check_issues_report_keys(**kwargs)
+    issues = get_report(
+        crm,
+        report,
+        *args,
+        mod_params=mod_params,
+        mod_data=mod_data,
+        parse_issue_history=parse_issue_history,
+        **kwargs,
+    )
+    if parse_issue_card:
+        yield from _iter_enriched_issues(crm, issues)
+    else:
+        yield from issues
+
+
+def _enrich_issue_cards(crm: ActiveConnect, issues: Sequence[Issue]) -> List[Issue]:
+
+    """Функция для дополнения обращений данными с их карточек.
+
+    Args:
+        crm (ActiveConnect): активное соединение с CRM.
+        issues (Sequence[Issue]): обращения, которые необходимо дополнить.
+
+    Returns:
+        List[Issue]: обращения в исходном порядке.
+    """
+
+    return list(_iter_enriched_issues(crm, issues))
+
+
+def _iter_enriched_issues(
+    crm: ActiveConnect,
+    issues: Sequence[Issue],
+) -> Iterator[Issue]:
+
+    """Генератор обращений, дополненных данными с их карточек.
+    Карточки запрашиваются параллельно пулом потоков, размер которого
+    задается параметром конфигурации issue_card_workers. Загруженные
+    страницы карточек разбираются пачками по issue_card_workers функцией
+    parse_naumen_pages, поэтому при включенном пуле процессов парсинг идет
+    в нескольких процессах. Ошибка получения одной карточки не прерывает
+    сбор остальных: обращение остается с данными из таблицы, а причина
+    записывается в атрибут card_error. Карточки обращений, которые не
+    менялись с прошлого запроса, берутся из кэша.
+
+    Args:
+        crm (ActiveConnect): активное соединение с CRM.
+        issues (Sequence[Issue]): обращения, которые необходимо дополнить.
+
+    Yields:
+        Issue: обращения в исходном порядке.
+    """
+
+    workers = get_config_value("issue_card_workers", default=8)
+    log.debug(f"Количество потоков для сбора карточек: {workers}")
+    futures = iter_bounded(
+        lambda issue: _load_issue_card(crm, issue),
+        issues,
+        workers,
+    )
+
+    window: List[Tuple[Issue, "Future[Any]"]] = []
+    for issue_future in futures:
+        window.append(issue_future)
+        if len(window) >= workers:
+            yield from _merge_loaded_cards(window)
+            window = []
+    yield from _merge_loaded_cards(window)
+
+
+def _merge_loaded_cards(
+    window: Sequence[Tuple[Issue, "Future[Any]"]],
+) -> Iterator[Issue]:
+    issues = [issue for issue, _ in window]
+    loaded: List[Any] = []
+    for _, future in window:
+        try:
+            loaded.append(future.result())
+        except _CARD_ERRORS as exc:
+            loaded.append(exc)
+    cards = _parse_issue_cards(issues, loaded)
+    yield from _apply_issue_cards(issues, cards, _CARD_ERRORS)
+
+
+def _load_issue_card(crm: ActiveConnect, issue: Issue) -> Union[Issue, str]:
+
+    """Функция получения карточки обращения из кэша или страницы карточки
+    из CRM.
+
+    Args:
+        crm (ActiveConnect): активное соединение с CRM.
+        issue (Issue): обращение из таблицы обращений.
+
+    Returns:
+        Union[Issue, str]: карточка из кэша или страница карточки.
+
+    Raises:
+        CantGetData: в случае невозможности получить карточку.
+    """
+
+    issue_card = ISSUE_CARD_CACHE.get(issue)
+    if issue_card is not None:
+        log.debug(f"Карточка обращения {issue.uuid} получена из кэша.")
+        return issue_card
+    return _get_issue_card_page(crm, issue.uuid)
+
+
+def _get_issue_card_page(crm: ActiveConnect, naumen_uuid: str) -> str:
+
+    """Функция получения страницы карточки одного обращения.
+
+    Args:
+        crm (ActiveConnect): активное соединение с CRM.
+        naumen_uuid (str): uuid обращения в CRM NAUMEN.
+
+    Returns:
+        str: страница карточки.
+
+    Raises:
+        CantGetData: в случае невозможности получить карточку.
+    """
+
+    with leased(crm) as connect:
+        return _get_report(
+            connect,
+            TypeReport.ISSUE_CARD,
+            NaumenRequestType.SEARCH_REPORT,
+            mod_params=(("uuid", naumen_uuid),),
+        )
+
+
+def _parse_issue_cards(issues: Sequence[Issue], loaded: Sequence[Any]) -> List[Any]:
+
+    """Функция разбора загруженных страниц карточек одной пачкой.
+    Разобранные карточки сохраняются в кэш.
+
+    Args:
+        issues (Sequence[Issue]): обращения из таблицы обращений.
+        loaded (Sequence[Any]): для каждого обращения карточка из кэша,
+        страница карточки или ошибка её получения.
+
+    Returns:
+        List[Any]: для каждого обращения карточка или ошибка.
+    """
+
+    cards = list(loaded)
+    pages = [num for num, value in enumerate(loaded) if isinstance(value, str)]
+    if not pages:
+        return cards
+    report = TypeReport.ISSUE_CARD
+    with INSTRUMENTATION.measure(Stage.PARSE, report.name) as counters:
+        parsed = parse_naumen_pages(
+            [loaded[num] for num in pages],
+            report.page,
+            return_exceptions=True,
+        )
+        counters.rows = len(pages)
+    for num, collect in zip(pages, parsed):
+        if isinstance(collect, Exception):
+            cards[num] = collect
+        elif not collect:
+            cards[num] = CantGetData()
+        else:
+            cards[num] = collect[0]
+            ISSUE_CARD_CACHE.put(issues[num], collect[0])
+    return cards
+
+
+def _apply_issue_cards(
+    issues: Sequence[Issue],
+    cards: Sequence[Any],
+    card_errors: Tuple[type, ...],
+) -> Iterator[Issue]:
+
+    """Генератор переноса карточек в обращения.
+
+    Args:
+        issues (Sequence[Issue]): обращения из таблицы обращений.
+        cards (Sequence[Any]): для каждого обращения карточка или ошибка.
+        card_errors (Tuple[type, ...]): ошибки, при которых обращение
+        отдается без карточки, остальные ошибки пробрасываются.
+
+    Yields:
+        Issue: обращения в исходном порядке.
+    """
+
+    for issue, issue_card in zip(issues, cards):
+        if isinstance(issue_card, card_errors):
+            log.warning(f"Не удалось получить карточку обращения {issue.uuid}")
+            issue.card_error = repr(issue_card)
+        elif isinstance(issue_card, Exception):
+            raise issue_card
+        else:
+            _merge_issue_card(issue, issue_card)
+        yield issue
+
+
+def _merge_issue_card(issue: Issue, issue_card: Issue) -> Issue:
+
+    """Функция переноса заполненных полей карточки в обращение.
+
+    Args:
+        issue (Issue): обращение из таблицы обращений.
+        issue_card (Issue): обращение, полученное с карточки.
+
+    Returns:
+        Issue: дополненное обращение.
+    """
+
+    for field in fields(issue_card):
+        issue_card_field_value = getattr(issue_card, field.name)
+
+        if issue_card_field_value:
+            setattr(issue, field.name, issue_card_field_value)
+
+    return issue
 
 
 def _check_issues_report_keys(
@@ -147,11 +520,13 @@ def _check_issues_report_keys(
 
 
 def _delete_report(crm: ActiveConnect, report: TypeReport, uuid: str) -> bool:
-    """_summary_
+    """Функция удаления созданного отчета в CRM Naumen.
+    Вызывается фоновым REPORT_JANITOR.
 
     Args:
-        crm (ActiveConnect): _description_
-        uuid (str): _description_
+        crm (ActiveConnect): активное соединение с CRM.
+        report (TypeReport): тип отчёта.
+        uuid (str): uuid отчёта.
 
     Raises:
         CantGetData: если не удалось получить ответ.
@@ -165,13 +540,15 @@ def _delete_report(crm: ActiveConnect, report: TypeReport, uuid: str) -> bool:
 
     params = tuple({"uuid": uuid}.items())
     log.debug(f"Параметры для удаления отчёта {params}")
-    _responce = get_crm_response(
-        crm,
-        report,
-        NaumenRequestType.DELETE_REPORT,
-        mod_params=params,
-        method="GET",
-    )
+    with INSTRUMENTATION.measure(Stage.DELETE, report.name) as counters:
+        _responce = get_crm_response(
+            crm,
+            report,
+            NaumenRequestType.DELETE_REPORT,
+            mod_params=params,
+            method="GET",
+        )
+        counters.retries = count_retries(_responce)
 
     if _responce:
         log.debug("Отчет в CRM Наумен удален.")
@@ -187,6 +564,9 @@ def _find_report_uuid(
     report: TypeReport,
 ) -> str:
     """Функция поиска сформированного отчета в CRM Naumen.
+    Интервалы между проверками задает POLLING_STRATEGY. Общее время ожидания
+    берется из параметра polling.deadline конфигурации, а если он не задан,
+    равно delay_attems * (num_attems + 1) из настроек отчёта.
 
     Args:
         crm:  активное соединение с CRM Naumen.
@@ -197,58 +577,51 @@ def _find_report_uuid(
         str: строчный идентификатор обьекта в CRM Naumen.
 
     Raises:
-        ConnectionsFailed: если не удалось подключиться к CRM системе.
+        CantGetData: если отчёт не найден за отведенное время.
 
     """
 
-    def _searching(
-        report: TypeReport,
-        num_attems: int,
-        mod_params: Tuple,
-    ) -> Sequence[str]:
-        """Рекурсивная функция поиска отчета в CRM системе.
-
-        Args:
-            num_attems: количество попыток поиска.
-            search_request: запрос для поиска отчета.
-
-        Returns:
-            Sequence[str]: коллекцию внутри которой идентификатор в CRM Naumen.
-
-        Raises:
-
-        """
+    mod_params = tuple({"uuid": options.uuid}.items())
+    deadline = get_config_value("polling", "deadline", default=0) or (
+        options.delay_attems * (options.num_attems + 1)
+    )
+    started = monotonic()
+    missed_at = 0.0
+    parsed_collection = None
+
+    with INSTRUMENTATION.measure(Stage.POLL, report.name) as counters:
+        for attempt, delay in enumerate(POLLING_STRATEGY.delays(report, deadline), 1):
+            log.debug(
+                f"Поиск свормированного отчета: {options.name}."
+                f"Попытка: {attempt}. Задержка: {delay:.2f} сек.",
+            )
+            counters.retries = attempt - 1
+            sleep(delay)
+            probed_at = monotonic() - started
+            response = get_crm_response(
+                crm,
+                report,
+                NaumenRequestType.SEARCH_REPORT,
+                mod_params=mod_params,
+                method="GET",
+            )
+            counters.bytes += response_size(response)
+            parsed_collection = parse_naumen_page(
+                response.text,
+                PageType.REPORT_LIST_PAGE,
+                options.name,
+            )
+            if parsed_collection is not None:
+                POLLING_STRATEGY.record(report, probed_at, missed_at)
+                break
+            missed_at = probed_at
 
-        log.debug(
-            f"Поиск свормированного отчета: {options.name}."
-            f"Осталось попыток: {num_attems}",
-        )
-        sleep(options.delay_attems)
-        response = get_crm_response(
-            crm,
-            report,
-            NaumenRequestType.SEARCH_REPORT,
-            mod_params=mod_params,
-            method="GET",
-        )
-        page_text = response.text
-        parsed_collection = parse_naumen_page(
-            page_text,
-            PageType.REPORT_LIST_PAGE,
-            options.name,
-        )
         if parsed_collection is None:
-            if num_attems >= 1:
-                return _searching(report, num_attems - 1, mod_params)
             log.error(f"Не удалось найти отчёт: {options.name}")
             raise CantGetData
-        return parsed_collection
-
-    mod_params = tuple({"uuid": options.uuid}.items())
-    parsed_collection = _searching(report, options.num_attems, mod_params)
 
-    if len(parsed_collection) != 1:
-        raise CantGetData
+        if len(parsed_collection) != 1:
+            raise CantGetData
 
     return str(parsed_collection[0])
 
@@ -281,16 +654,18 @@ def _create_report(
     Raises:
         CantGetData: в случае невозможности вернуть коллекцию.
     """
-    get_crm_response(
-        crm,
-        report,
-        request_type,
-        *args,
-        mod_params=mod_params,
-        mod_data=mod_data,
-        method="POST",
-        **kwargs,
-    )
+    with INSTRUMENTATION.measure(Stage.CREATE, report.name) as counters:
+        naumen_responce = get_crm_response(
+            crm,
+            report,
+            request_type,
+            *args,
+            mod_params=mod_params,
+            mod_data=mod_data,
+            method="POST",
+            **kwargs,
+        )
+        counters.retries = count_retries(naumen_responce)
 
 
 def _get_report(
@@ -321,14 +696,20 @@ def _get_report(
     Raises:
         CantGetData: в случае невозможности вернуть коллекцию.
     """
-    naumen_responce = get_crm_response(
-        crm,
-        report,
-        request_type,
-        *args,
-        mod_params=mod_params,
-        mod_data=mod_data,
-        method="GET",
-        **kwargs,
-    )
-    return naumen_responce.text
+    with INSTRUMENTATION.measure(Stage.DOWNLOAD, report.name) as counters:
+        naumen_responce = get_crm_response(
+            crm,
+            report,
+            request_type,
+            *args,
+            mod_params=mod_params,
+            mod_data=mod_data,
+            method="GET",
+            **kwargs,
+        )
+        counters.bytes = response_size(naumen_responce)
+        counters.retries = count_retries(naumen_responce)
+        return naumen_responce.text
+
+
+REPORT_JANITOR = ReportJanitor(_delete_report)
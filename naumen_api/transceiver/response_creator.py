@@ -1,11 +1,26 @@
 import json
-from dataclasses import asdict, is_dataclass
+from dataclasses import fields, is_dataclass
 from datetime import datetime, timedelta
-from typing import Any, Iterable, NamedTuple, Type
+from time import perf_counter
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    NamedTuple,
+    Sized,
+    Tuple,
+    Type,
+)
 
 from ..config.structures import StatusType
+from .instrumentation import INSTRUMENTATION, Stage, TimingEvent
 
-FORMATTED_RESPONSE = str
+# вид ответа зависит от класса форматирования: строка JSON у
+# JSONResponseFormatter, ResponseTemplate у NativeResponseFormatter,
+# генератор строк у NDJSONResponseFormatter.
+FORMATTED_RESPONSE = Any
 
 
 class ResponseTemplate(NamedTuple):
@@ -27,8 +42,11 @@ class ResponseFormatter:
 
     Attributes:
         FORMATTED_RESPONSE: форматированный ответа.
+        lazy: ответ - генератор, который кодирует данные по мере чтения.
     """
 
+    lazy = False
+
     @classmethod
     def make(cls, api_response: ResponseTemplate) -> FORMATTED_RESPONSE:
 
@@ -70,30 +88,142 @@ class JSONResponseFormatter(ResponseFormatter):
             "description": api_response.status.description,
             "content": api_response.content,
         }
-        json_string = json.dumps(
-            dict_for_json,
-            sort_keys=False,
-            ensure_ascii=False,
-            separators=(",", ": "),
-            cls=EnhancedJSONEncoder,
-        )
-        return json_string
+        return JSON_ENCODER.encode(dict_for_json)
+
+
+class NativeResponseFormatter(ResponseFormatter):
+
+    """Класс для создания ответов API объектами Python без сериализации.
+
+    Ответ возвращается как ResponseTemplate: статус с теми же кодом,
+    сообщением и описанием, что и в JSON ответе, и содержание с исходными
+    dataclass отчётов, datetime и timedelta. Одновременные одинаковые
+    запросы получают собственные копии объектов.
+    """
+
+    @classmethod
+    def make(cls, api_response: ResponseTemplate) -> ResponseTemplate:
+
+        """Метод для форматирования ответа.
+
+        Args:
+            api_response: сырой ответ от API.
+
+        Returns:
+            ResponseTemplate: ответ без изменений.
+        """
+
+        return api_response
+
+
+class NDJSONResponseFormatter(ResponseFormatter):
+
+    """Класс для создания ответов API потоком строк NDJSON.
+
+    Первая строка - заголовок со статусом ответа, каждая следующая - один
+    элемент содержания. Строки кодируются по мере чтения генератора, и
+    ответ не собирается в памяти целиком. Если содержание тоже генератор,
+    например Client.iter_issues, в памяти находится только текущий
+    элемент. Ошибка при получении содержания прерывает поток после уже
+    отданных строк.
+    """
+
+    lazy = True
+
+    @classmethod
+    def make(cls, api_response: ResponseTemplate) -> Iterator[str]:
+
+        """Метод для форматирования ответа.
+
+        Args:
+            api_response: сырой ответ от API.
+
+        Returns:
+            Iterator[str]: генератор строк NDJSON, каждая заканчивается
+            переводом строки.
+        """
+
+        return cls._iter_lines(api_response)
+
+    @staticmethod
+    def _iter_lines(api_response: ResponseTemplate) -> Iterator[str]:
+        header = {
+            "status_code": api_response.status.code,
+            "status_message": api_response.status.message,
+            "description": api_response.status.description,
+        }
+        yield JSON_ENCODER.encode(header) + "\n"
+        for item in api_response.content:
+            yield JSON_ENCODER.encode(item) + "\n"
 
 
 class EnhancedJSONEncoder(json.JSONEncoder):
+
+    """Кодировщик JSON с поддержкой dataclass, datetime и timedelta.
+
+    Dataclass передается кодировщику словарем своих полей без копирования
+    значений, вложенные dataclass кодируются так же по мере обхода. Список
+    полей каждого класса вычисляется один раз. Результат совпадает с
+    кодированием dataclasses.asdict.
+    """
+
     def default(self, encoding_object: Any) -> Any:
-        if is_dataclass(encoding_object):
-            return asdict(encoding_object)
+        encode = _TYPE_ENCODERS.get(type(encoding_object))
+        if encode is not None:
+            return encode(encoding_object)
+        if is_dataclass(encoding_object) and not isinstance(encoding_object, type):
+            return _dataclass_encoder(type(encoding_object))(encoding_object)
         if isinstance(encoding_object, datetime):
-            return datetime.strftime(encoding_object, "%d.%m.%Y %H:%M:%S")
+            return _encode_datetime(encoding_object)
         if isinstance(encoding_object, timedelta):
             return encoding_object.total_seconds()
         return super().default(encoding_object)
 
 
+def _encode_datetime(value: datetime) -> str:
+    return datetime.strftime(value, "%d.%m.%Y %H:%M:%S")
+
+
+def _dataclass_encoder(cls: type) -> Callable[[Any], Dict[str, Any]]:
+
+    """Функция получения кодировщика экземпляров dataclass.
+    Кодировщик запоминается для класса в _TYPE_ENCODERS.
+
+    Args:
+        cls: класс dataclass.
+
+    Returns:
+        Callable[[Any], Dict[str, Any]]: функция, возвращающая словарь
+        полей экземпляра.
+    """
+
+    names: Tuple[str, ...] = tuple(field.name for field in fields(cls))
+
+    def _encode(encoding_object: Any) -> Dict[str, Any]:
+        return {name: getattr(encoding_object, name) for name in names}
+
+    _TYPE_ENCODERS[cls] = _encode
+    return _encode
+
+
+_TYPE_ENCODERS: Dict[type, Callable[[Any], Any]] = {
+    datetime: _encode_datetime,
+    timedelta: timedelta.total_seconds,
+}
+
+# кодировщик не хранит состояния между вызовами encode и используется
+# всеми потоками.
+JSON_ENCODER = EnhancedJSONEncoder(
+    sort_keys=False,
+    ensure_ascii=False,
+    separators=(",", ": "),
+)
+
+
 def make_response(
     api_response: ResponseTemplate,
     formatter: Type[ResponseFormatter],
+    report: str = "",
 ) -> FORMATTED_RESPONSE:
 
     """Функция форматорования ответа.
@@ -101,6 +231,7 @@ def make_response(
     Args:
         api_response: шаблонный ответ от api
         formatter: класс для форматированния ответа.
+        report: имя типа отчёта для измерения времени форматирования.
 
     Returns:
         ResponseFormatter.FORMATTED_RESPONSE: форматированный ответ.
@@ -109,4 +240,54 @@ def make_response(
 
     """
 
-    return formatter.make(api_response)
+    if formatter.lazy:
+        return _measure_lazy(formatter.make(api_response), report)
+    with INSTRUMENTATION.measure(Stage.FORMAT, report) as counters:
+        if isinstance(api_response.content, Sized):
+            counters.rows = len(api_response.content)
+        return formatter.make(api_response)
+
+
+def _measure_lazy(lines: Iterator[Any], report: str) -> Iterator[Any]:
+
+    """Генератор измерения времени форматирования ленивого ответа.
+    Учитывается только время получения строк из генератора формата, без
+    времени их обработки читающим кодом. Событие передается, когда ответ
+    прочитан, прерван или завершился ошибкой.
+
+    Args:
+        lines: генератор строк ответа, первая строка - заголовок.
+        report: имя типа отчёта.
+
+    Yields:
+        Any: строки ответа.
+    """
+
+    if not INSTRUMENTATION.enabled:
+        yield from lines
+        return
+    duration, count, error = 0.0, 0, ""
+    try:
+        while True:
+            started = perf_counter()
+            try:
+                line = next(lines)
+            except StopIteration:
+                return
+            except BaseException as exc:
+                error = type(exc).__name__
+                raise
+            finally:
+                duration += perf_counter() - started
+            count += 1
+            yield line
+    finally:
+        INSTRUMENTATION.emit(
+            TimingEvent(
+                stage=Stage.FORMAT,
+                report=report,
+                duration=duration,
+                rows=max(0, count - 1),
+                error=error,
+            ),
+        )
@@ -1,11 +1,17 @@
 import logging
+from contextlib import closing
+from itertools import islice
 from time import sleep
-from typing import Any, Iterable, List, Mapping, Sequence, Tuple, Union
+from typing import Any, Iterable, Iterator, Mapping, Sequence, Tuple, Union
 
+from ..config.config import get_config_value
 from ..config.structures import NaumenRequestType, PageType, SearchType, TypeReport
-from ..parser.parser import parse_naumen_page
+from ..parser.parser import parse_naumen_page, parse_naumen_pages
+from .concurrency import iter_bounded
 from .crm import ActiveConnect, get_crm_response
+from .instrumentation import INSTRUMENTATION, Stage, count_retries, response_size
 from .reports import _check_issues_report_keys
+from .session_pool import leased
 
 log = logging.getLogger(__name__)
 
@@ -34,23 +40,69 @@ def search(
     Raises:
         CantGetData: в случае невозможности вернуть коллекцию.
     """
-    collect: List = []
-    if report in [SearchType.ISSUES_SEARCH]:
-        parse_issue_history, parse_issue_card, _ = _check_issues_report_keys(**kwargs)
-        get_crm_response(
+    return list(
+        iter_search(
             crm,
+            report,
+            *args,
+            mod_params=mod_params,
+            mod_data=mod_data,
+            **kwargs,
+        ),
+    )
+
+
+def iter_search(
+    crm: ActiveConnect,
+    report: SearchType,
+    *args: Sequence,
+    mod_params: Union[Tuple[Tuple[str, Any]], Tuple] = (),
+    mod_data: Union[Tuple[Tuple[str, Any]], Tuple] = (),
+    **kwargs: Mapping,
+) -> Iterator:
+    """Генератор результатов поиска в CRM, страница за страницей.
+    Результаты первой страницы отдаются сразу после первого ответа CRM.
+    Следующие страницы запрашиваются пулом потоков окнами по search_workers
+    и разбираются пачкой функцией parse_naumen_pages, поэтому при включенном
+    пуле процессов парсинг идет в нескольких процессах. В памяти одновременно
+    находится не больше трех окон страниц.
+    Все запросы поиска идут через одну сессию пула, так как CRM хранит
+    состояние поиска в сессии.
+
+    Args:
+        crm: активное соединение с CRM.
+        report: вид поиска.
+        *args: позиционные аргументы(не используются)
+
+    Kwargs:
+        mod_params (Union[Tuple[Tuple[str, Any]], Tuple]): параметры поиска.
+        mod_data (Union[Tuple[Tuple[str, Any]], Tuple]): данные поиска.
+        **kwargs: именнованные аргументы для создания отчёта.
+
+    Yields:
+        Any: очередной результат поиска в порядке страниц.
+    Raises:
+        CantGetData: в случае невозможности получить результаты.
+    """
+    if report not in [SearchType.ISSUES_SEARCH]:
+        return
+
+    parse_issue_history, parse_issue_card, _ = _check_issues_report_keys(**kwargs)
+    with leased(crm) as connect:
+        get_crm_response(
+            connect,
             TypeReport.CONTROL_ENABLE_SEARCH,
             NaumenRequestType.CONTROL,
         )
         sleep(1)
         get_crm_response(
-            crm,
+            connect,
             TypeReport.CONTROL_SELECT_SEARCH,
             NaumenRequestType.CONTROL,
         )
         sleep(2)
         naumen_responce = get_crm_response(
-            crm,
+            connect,
             report,
             NaumenRequestType.SEARCH_REPORT,
             *args,
@@ -63,22 +115,76 @@ def search(
         log.debug("Проверка количества страниц")
         page_count = parse_naumen_page(page_text, PageType.PAGINATION_PAGE)
         log.debug(f"Количество страниц: {page_count}")
-        page_collection = [page_text]
-        for i in range(1, page_count):  # type: ignore
-            _ = dict(mod_params)
-            _.update({"pagination": str(i)})
-            mod_params = tuple(_.items())
-            naumen_responce = get_crm_response(
-                crm,
+        workers = get_config_value("search_workers", default=4)
+
+        next_pages = iter_bounded(
+            lambda page_number: _get_search_page(
+                connect,
                 report,
-                NaumenRequestType.CREATE_REPORT,
+                page_number,
                 *args,
                 mod_params=mod_params,
                 mod_data=mod_data,
-                method="GET",
                 **kwargs,
-            )
-            page_collection.append(naumen_responce.text)
-        for page in page_collection:
-            collect += parse_naumen_page(page, report.page)
-    return collect
+            ),
+            range(1, page_count),  # type: ignore
+            workers,
+        )
+        with closing(next_pages):
+            # запуск загрузки следующих страниц до парсинга первой
+            window = list(islice(next_pages, workers))
+            yield from parse_naumen_page(page_text, report.page)
+            while window:
+                pages = [future.result() for _, future in window]
+                window = list(islice(next_pages, workers))
+                with INSTRUMENTATION.measure(Stage.PARSE, report.name) as counters:
+                    collects = parse_naumen_pages(pages, report.page)
+                    counters.rows = sum(len(collect) for collect in collects)
+                for collect in collects:
+                    yield from collect
+
+
+def _get_search_page(
+    crm: ActiveConnect,
+    report: SearchType,
+    page_number: int,
+    *args: Sequence,
+    mod_params: Union[Tuple[Tuple[str, Any]], Tuple] = (),
+    mod_data: Union[Tuple[Tuple[str, Any]], Tuple] = (),
+    **kwargs: Mapping,
+) -> str:
+    """Функция получения одной страницы результатов поиска.
+
+    Args:
+        crm: активное соединение с CRM.
+        report: вид поиска.
+        page_number: номер страницы пагинации, начиная с 0.
+        *args: позиционные аргументы(не используются)
+
+    Kwargs:
+        mod_params (Union[Tuple[Tuple[str, Any]], Tuple]): параметры поиска.
+        mod_data (Union[Tuple[Tuple[str, Any]], Tuple]): данные поиска.
+        **kwargs: именнованные аргументы для создания отчёта.
+
+    Returns:
+        str: страница результатов поиска.
+
+    Raises:
+        CantGetData: в случае невозможности получить страницу.
+    """
+    _ = dict(mod_params)
+    _.update({"pagination": str(page_number)})
+    with INSTRUMENTATION.measure(Stage.DOWNLOAD, report.name) as counters:
+        naumen_responce = get_crm_response(
+            crm,
+            report,
+            NaumenRequestType.CREATE_REPORT,
+            *args,
+            mod_params=tuple(_.items()),
+            mod_data=mod_data,
+            method="GET",
+            **kwargs,
+        )
+        counters.bytes = response_size(naumen_responce)
+        counters.retries = count_retries(naumen_responce)
+    return naumen_responce.text
@@ -0,0 +1,354 @@
+import asyncio
+import logging
+import pickle
+from datetime import date, datetime, timedelta
+from threading import Lock
+from typing import Any, Awaitable, Callable, Dict, List, Sequence, Tuple, Union
+
+from ..config.config import get_config_value
+from ..config.structures import TypeReport
+from ..exceptions import CantGetData
+from ..parser import aht, service_level
+from .concurrency import iter_bounded
+from .report_cache import MemoryBackend, ReportCacheBackend, _make_key
+
+log = logging.getLogger(__name__)
+
+DATE_FORMAT = "%d.%m.%Y"
+MOD_DATA = Union[Tuple[Tuple[str, Any]], Tuple]
+
+# отчёты, строки которых привязаны к дате.
+DATED_REPORTS = (TypeReport.FLR_LEVEL, TypeReport.AHT_LEVEL)
+# отчёты, строки которых привязаны к номеру дня месяца,
+# их можно собирать по дням только в пределах одного месяца.
+MONTH_DAY_REPORTS = (TypeReport.SERVICE_LEVEL, TypeReport.MTTR_LEVEL)
+
+
+class SegmentStore:
+
+    """Хранилище отчётов SL, MTTR, FLR и AHT по дням.
+
+    Запрошенный период разбивается на дни. Дни, которые уже есть в
+    хранилище, берутся из него, а в CRM запрашиваются только отсутствующие
+    непрерывные отрезки. Результат собирается в ту же коллекцию, которую
+    вернул бы отчёт за весь период. Сохраняются только прошедшие дни,
+    сегодняшний день всегда запрашивается заново.
+
+    Отчёты SL и MTTR возвращают дни без привязки к месяцу, поэтому
+    собираются по дням только если период не выходит за один месяц.
+
+    Если задан shard_days, длинные отрезки делятся на части не длиннее
+    shard_days дней, которые формируются в CRM и разбираются параллельно,
+    не более workers одновременно.
+
+    Параметры, не переданные явно, берутся из разделов report_segments и
+    report_shards конфигурации.
+    """
+
+    def __init__(
+        self,
+        backend: Union[ReportCacheBackend, None] = None,
+        *,
+        enabled: Union[bool, None] = None,
+        shard_days: Union[int, None] = None,
+        workers: Union[int, None] = None,
+    ) -> None:
+        """Создание хранилища отчётов по дням.
+
+        Args:
+            backend: хранилище сериализованных дней.
+
+        Kwargs:
+            enabled: включено ли хранение отчётов по дням.
+            shard_days: максимальная длина одного отчёта в днях, 0 - не делить.
+            workers: количество одновременно формируемых отчётов.
+        """
+        self._backend = backend
+        self._enabled = enabled
+        self._shard_days = shard_days
+        self._workers = workers
+        self._lock = Lock()
+
+    @property
+    def enabled(self) -> bool:
+        if self._enabled is not None:
+            return self._enabled
+        return bool(get_config_value("report_segments", "enabled", default=True))
+
+    @property
+    def shard_days(self) -> int:
+        if self._shard_days is not None:
+            return self._shard_days
+        return int(get_config_value("report_shards", "shard_days", default=0))
+
+    @property
+    def workers(self) -> int:
+        if self._workers is not None:
+            return self._workers
+        return int(get_config_value("report_shards", "workers", default=4))
+
+    @property
+    def backend(self) -> ReportCacheBackend:
+        with self._lock:
+            if self._backend is None:
+                max_size = get_config_value(
+                    "report_segments",
+                    "max_size",
+                    default=10000,
+                )
+                self._backend = MemoryBackend(max_size)
+            return self._backend
+
+    @backend.setter
+    def backend(self, value: ReportCacheBackend) -> None:
+        with self._lock:
+            self._backend = value
+
+    def assemble(
+        self,
+        report: TypeReport,
+        mod_data: MOD_DATA,
+        mod_params: MOD_DATA,
+        build: Callable[[MOD_DATA], Sequence],
+        *,
+        account: str = "",
+    ) -> Sequence:
+
+        """Метод сборки отчёта за период из сохранённых и новых дней.
+
+        Args:
+            report: тип отчёта.
+            mod_data: данные запроса отчёта.
+            mod_params: параметры запроса отчёта.
+            build: функция получения отчёта из CRM по данным запроса.
+
+        Kwargs:
+            account: учетная запись CRM, см. report_cache.account_key.
+
+        Returns:
+            Sequence: коллекция отчёта за весь период.
+        """
+
+        plan = self._plan(report, mod_data, mod_params, account)
+        if plan is None:
+            return build(mod_data)
+        days, held, runs = plan
+
+        futures = iter_bounded(
+            lambda run: build(_replace_period(mod_data, run)),
+            runs,
+            self.workers,
+        )
+        try:
+            for run, future in futures:
+                collect = future.result()
+                held.update(
+                    self._store(report, mod_data, mod_params, account, run, collect),
+                )
+        except CantGetData:
+            log.warning(f"Не удалось собрать отчёт {report} по дням.")
+            return build(mod_data)
+        finally:
+            futures.close()
+
+        return _stitch(report, days, held)
+
+    async def assemble_async(
+        self,
+        report: TypeReport,
+        mod_data: MOD_DATA,
+        mod_params: MOD_DATA,
+        build: Callable[[MOD_DATA], Awaitable[Sequence]],
+        *,
+        account: str = "",
+    ) -> Sequence:
+
+        """Асинхронная версия метода assemble.
+
+        Args:
+            report: тип отчёта.
+            mod_data: данные запроса отчёта.
+            mod_params: параметры запроса отчёта.
+            build: корутина получения отчёта из CRM по данным запроса.
+
+        Kwargs:
+            account: учетная запись CRM, см. report_cache.account_key.
+
+        Returns:
+            Sequence: коллекция отчёта за весь период.
+        """
+
+        plan = self._plan(report, mod_data, mod_params, account)
+        if plan is None:
+            return await build(mod_data)
+        days, held, runs = plan
+
+        semaphore = asyncio.Semaphore(max(1, self.workers))
+
+        async def _build(run: Sequence[date]) -> Sequence:
+            async with semaphore:
+                return await build(_replace_period(mod_data, run))
+
+        try:
+            collections = await asyncio.gather(*[_build(run) for run in runs])
+            for run, collect in zip(runs, collections):
+                held.update(
+                    self._store(report, mod_data, mod_params, account, run, collect),
+                )
+        except CantGetData:
+            log.warning(f"Не удалось собрать отчёт {report} по дням.")
+            return await build(mod_data)
+
+        return _stitch(report, days, held)
+
+    def clear(self) -> None:
+        """Метод очистки хранилища."""
+
+        self.backend.clear()
+
+    def _plan(
+        self,
+        report: TypeReport,
+        mod_data: MOD_DATA,
+        mod_params: MOD_DATA,
+        account: str,
+    ) -> Union[Tuple[List[date], Dict[date, Any], List[List[date]]], None]:
+
+        """Метод определения дней отчёта, которые нужно запросить в CRM.
+
+        Returns:
+            Union[Tuple, None]: дни периода, сохранённые дни и непрерывные
+            отрезки отсутствующих дней или None, если отчёт нельзя собрать
+            по дням.
+        """
+
+        enabled, shard_days = self.enabled, self.shard_days
+        days = _get_days(mod_data)
+        if not (enabled or shard_days > 0):
+            return None
+        if not days or not _can_segment(report, days):
+            return None
+
+        today = date.today()
+        held: Dict[date, Any] = {}
+        for day in days:
+            if enabled and day < today:
+                held.update(self._load(report, mod_data, mod_params, account, day))
+        missing = [day for day in days if day not in held]
+        runs = _split_runs(missing, shard_days)
+        log.debug(
+            f"Отчёт {report}: дней в хранилище {len(held)}, "
+            f"запрашивается {len(missing)} в {len(runs)} отчётах",
+        )
+        return days, held, runs
+
+    def _store(
+        self,
+        report: TypeReport,
+        mod_data: MOD_DATA,
+        mod_params: MOD_DATA,
+        account: str,
+        run: Sequence[date],
+        collect: Sequence,
+    ) -> Dict[date, Any]:
+        if len(collect) != len(run):
+            log.warning(
+                f"Отчёт {report} за {len(run)} дн. вернул {len(collect)} элем.",
+            )
+            raise CantGetData
+        # строки отчёта идут в порядке дней периода.
+        fetched = dict(zip(run, collect))
+        if not self.enabled:
+            return fetched
+        today = date.today()
+        for day, segment in fetched.items():
+            if day < today:
+                self.backend.set(
+                    _segment_key(report, mod_data, mod_params, account, day),
+                    pickle.dumps(segment),
+                    None,
+                )
+        return fetched
+
+    def _load(
+        self,
+        report: TypeReport,
+        mod_data: MOD_DATA,
+        mod_params: MOD_DATA,
+        account: str,
+        day: date,
+    ) -> Dict[date, Any]:
+        value = self.backend.get(
+            _segment_key(report, mod_data, mod_params, account, day),
+        )
+        if value is None:
+            return {}
+        return {day: pickle.loads(value)}
+
+
+def _get_days(mod_data: MOD_DATA) -> List[date]:
+    try:
+        period = dict(mod_data)
+        start_date = datetime.strptime(str(period["start_date"]), DATE_FORMAT)
+        end_date = datetime.strptime(str(period["end_date"]), DATE_FORMAT)
+    except (KeyError, ValueError):
+        return []
+    return [
+        start_date.date() + timedelta(days=num)
+        for num in range((end_date - start_date).days)
+    ]
+
+
+def _can_segment(report: TypeReport, days: Sequence[date]) -> bool:
+    if report in DATED_REPORTS:
+        return True
+    if report in MONTH_DAY_REPORTS:
+        return (days[0].year, days[0].month) == (days[-1].year, days[-1].month)
+    return False
+
+
+def _split_runs(days: Sequence[date], shard_days: int = 0) -> List[List[date]]:
+    runs: List[List[date]] = []
+    for day in days:
+        continues = runs and runs[-1][-1] + timedelta(days=1) == day
+        if continues and (shard_days <= 0 or len(runs[-1]) < shard_days):
+            runs[-1].append(day)
+        else:
+            runs.append([day])
+    return runs
+
+
+def _stitch(
+    report: TypeReport,
+    days: Sequence[date],
+    held: Dict[date, Any],
+) -> Sequence:
+    collection = tuple(held[day] for day in days)
+    if report == TypeReport.AHT_LEVEL:
+        dates = [day.strftime(DATE_FORMAT) for day in days]
+        collection = aht._merged_data_completion(dates, collection)
+    if report == TypeReport.SERVICE_LEVEL:
+        collection = service_level._merged_data_completion(collection)
+    return collection
+
+
+def _replace_period(mod_data: MOD_DATA, run: Sequence[date]) -> MOD_DATA:
+    period = dict(mod_data)
+    period["start_date"] = run[0].strftime(DATE_FORMAT)
+    period["end_date"] = (run[-1] + timedelta(days=1)).strftime(DATE_FORMAT)
+    return tuple(period.items())
+
+
+def _segment_key(
+    report: TypeReport,
+    mod_data: MOD_DATA,
+    mod_params: MOD_DATA,
+    account: str,
+    day: date,
+) -> str:
+    data = [_ for _ in mod_data if _[0] not in ("start_date", "end_date")]
+    data.append(("day", day.strftime(DATE_FORMAT)))
+    return _make_key(report, tuple(data), mod_params, account)
+
+
+SEGMENT_STORE = SegmentStore()
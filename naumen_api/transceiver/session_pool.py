@@ -0,0 +1,340 @@
+import logging
+from contextlib import contextmanager
+from dataclasses import dataclass
+from threading import Condition, Event, Thread
+from time import monotonic
+from typing import Any, Iterator, List, Sequence, Union
+
+from ..config.config import get_config_value
+from ..config.structures import ActiveConnect, Credentials
+from ..exceptions import CantGetData, ConnectionsFailed
+from .crm import close_session, get_session, ping, relogin
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PoolMetrics:
+
+    """Класс данных для хранения метрик пула сессий.
+
+    Attributes:
+        size: количество сессий в пуле.
+        healthy: количество рабочих сессий.
+        in_use: количество выданных сессий.
+        waiting: количество ожидающих сессию операций.
+        leases: количество выдач сессий за время работы пула.
+        wait_time_total: суммарное время ожидания сессии, сек.
+        wait_time_max: максимальное время ожидания сессии, сек.
+    """
+
+    size: int
+    healthy: int
+    in_use: int
+    waiting: int
+    leases: int
+    wait_time_total: float
+    wait_time_max: float
+
+    @property
+    def wait_time_avg(self) -> float:
+        return self.wait_time_total / self.leases if self.leases else 0.0
+
+
+class SessionPoolBase:
+
+    """Общая часть синхронного и асинхронного пулов сессий: выбор сессии
+    и метрики.
+
+    Сессия выдается операции на время её выполнения. Одной сессии
+    одновременно выдается не больше max_leases операций, выбирается
+    наименее загруженная рабочая сессия. Сессия, в которую не удалось
+    повторно войти, не выдается, и вход в неё повторяется не чаще, чем
+    раз в retry_delay секунд. Если свободной сессии нет дольше
+    lease_timeout секунд, операция завершается ошибкой CantGetData.
+    Каждые health_check_interval секунд пул проверяет все сессии методом
+    health_check, значение 0 выключает проверку.
+
+    Параметры, не переданные явно, берутся из раздела session_pool
+    конфигурации.
+    """
+
+    def __init__(
+        self,
+        connects: Sequence[Any],
+        *,
+        max_leases: Union[int, None] = None,
+        retry_delay: Union[float, None] = None,
+        lease_timeout: Union[float, None] = None,
+        health_check_interval: Union[float, None] = None,
+    ) -> None:
+        """Создание пула сессий.
+
+        Args:
+            connects: авторизованные сессии с CRM.
+
+        Kwargs:
+            max_leases: количество одновременных операций на одну сессию.
+            retry_delay: интервал попыток входа в нерабочую сессию, сек.
+            lease_timeout: максимальное время ожидания сессии, сек.
+            health_check_interval: интервал проверки сессий пула, сек.
+        """
+        self.connects = list(connects)
+        self._options = {
+            "max_leases": max_leases,
+            "retry_delay": retry_delay,
+            "lease_timeout": lease_timeout,
+            "health_check_interval": health_check_interval,
+        }
+        self._in_use = [0] * len(self.connects)
+        self._waiting = 0
+        self._leases = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+        self._closed = False
+
+    @property
+    def max_leases(self) -> int:
+        return max(1, int(self._option("max_leases", 4)))
+
+    @property
+    def retry_delay(self) -> float:
+        return float(self._option("retry_delay", 30))
+
+    @property
+    def lease_timeout(self) -> float:
+        return float(self._option("lease_timeout", 60))
+
+    @property
+    def health_check_interval(self) -> float:
+        return float(self._option("health_check_interval", 300))
+
+    def metrics(self) -> PoolMetrics:
+        """Метод получения метрик пула."""
+
+        return PoolMetrics(
+            size=len(self.connects),
+            healthy=sum(connect.state.healthy for connect in self.connects),
+            in_use=sum(self._in_use),
+            waiting=self._waiting,
+            leases=self._leases,
+            wait_time_total=self._wait_time_total,
+            wait_time_max=self._wait_time_max,
+        )
+
+    def __len__(self) -> int:
+        return len(self.connects)
+
+    def _pick(self) -> Union[int, None]:
+        max_leases = self.max_leases
+        free = [
+            index
+            for index, connect in enumerate(self.connects)
+            if connect.state.healthy and self._in_use[index] < max_leases
+        ]
+        if not free:
+            return None
+        return min(free, key=lambda index: self._in_use[index])
+
+    def _take(self, index: int, started: float) -> Any:
+        wait_time = monotonic() - started
+        self._in_use[index] += 1
+        self._leases += 1
+        self._wait_time_total += wait_time
+        self._wait_time_max = max(self._wait_time_max, wait_time)
+        if wait_time > 1:
+            log.debug(f"Ожидание свободной сессии: {wait_time:.1f} сек.")
+        return self.connects[index]
+
+    def _due_for_repair(self) -> List[Any]:
+        now, retry_delay = monotonic(), self.retry_delay
+        connects = []
+        for connect in self.connects:
+            if connect.state.healthy:
+                continue
+            if now - connect.state.failed_at >= retry_delay:
+                # повторный вход выполняет только одна операция.
+                connect.state.failed_at = now
+                connects.append(connect)
+        return connects
+
+    def _option(self, name: str, default: Any) -> Any:
+        value = self._options[name]
+        if value is None:
+            value = get_config_value("session_pool", name, default=default)
+        return value
+
+
+class SessionPool(SessionPoolBase):
+
+    """Пул авторизованных сессий с CRM Naumen.
+
+    Пул передается в функции транспорта вместо ActiveConnect: каждый
+    запрос выполняется в сессии, выданной пулом, а отчёт формируется,
+    ищется и открывается в одной сессии.
+    """
+
+    def __init__(self, connects: Sequence[ActiveConnect], **kwargs: Any) -> None:
+        super().__init__(connects, **kwargs)
+        self._condition = Condition()
+        self._stopped = Event()
+        self._health_checks: Union[Thread, None] = None
+        self._start_health_checks()
+
+    @classmethod
+    def create(
+        cls,
+        credentials: Sequence[Credentials],
+        **kwargs: Any,
+    ) -> "SessionPool":
+
+        """Метод создания пула с входом в CRM под каждой учетной записью.
+        Для нескольких сессий одного пользователя учетная запись
+        повторяется нужное количество раз.
+
+        Args:
+            credentials: учетные записи сессий пула.
+            **kwargs: параметры пула.
+
+        Returns:
+            SessionPool: пул сессий.
+
+        Raises:
+            ConnectionsFailed: если не удалось войти ни в одну сессию.
+        """
+
+        connects = []
+        for account in credentials:
+            try:
+                connects.append(
+                    get_session(account.username, account.password, account.domain),
+                )
+            except ConnectionsFailed:
+                log.error(f"Не удалось создать сессию {account.username}.")
+        if not connects:
+            raise ConnectionsFailed
+        return cls(connects, **kwargs)
+
+    @contextmanager
+    def lease(self) -> Iterator[ActiveConnect]:
+
+        """Метод выдачи сессии на время операции.
+
+        Yields:
+            ActiveConnect: сессия с CRM.
+
+        Raises:
+            CantGetData: если свободная сессия не появилась за lease_timeout.
+        """
+
+        connect = self._acquire()
+        try:
+            yield connect
+        finally:
+            with self._condition:
+                self._in_use[self.connects.index(connect)] -= 1
+                self._condition.notify()
+
+    def health_check(self) -> int:
+
+        """Метод проверки всех сессий пула с повторным входом в истекшие.
+
+        Returns:
+            int: количество рабочих сессий.
+        """
+
+        for connect in self.connects:
+            connect.state.healthy = ping(connect)
+            if not connect.state.healthy:
+                connect.state.failed_at = monotonic()
+        with self._condition:
+            self._condition.notify_all()
+        return self.metrics().healthy
+
+    def close(self) -> None:
+        """Метод закрытия всех сессий пула."""
+
+        self._stopped.set()
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        for connect in self.connects:
+            close_session(connect)
+
+    def _start_health_checks(self) -> None:
+        interval = self.health_check_interval
+        if interval <= 0:
+            return
+        self._health_checks = Thread(
+            target=self._check_health,
+            args=(interval,),
+            name="naumen-pool-health-check",
+            daemon=True,
+        )
+        self._health_checks.start()
+
+    def _check_health(self, interval: float) -> None:
+
+        """Метод периодической проверки сессий пула.
+        Работает до закрытия пула.
+
+        Args:
+            interval: интервал проверки, сек.
+        """
+
+        while not self._stopped.wait(interval):
+            try:
+                healthy = self.health_check()
+            except Exception as exc:
+                # поток проверки не должен останавливаться из-за ошибки.
+                log.warning(f"Ошибка проверки сессий пула: {exc!r}")
+                continue
+            log.debug(f"Рабочих сессий в пуле: {healthy} из {len(self)}.")
+
+    def _acquire(self) -> ActiveConnect:
+        started = monotonic()
+        deadline = started + self.lease_timeout
+        while True:
+            with self._condition:
+                if self._closed:
+                    raise CantGetData
+                index = self._pick()
+                if index is not None:
+                    return self._take(index, started)
+                repair = self._due_for_repair()
+                if not repair:
+                    remaining = deadline - monotonic()
+                    if remaining <= 0:
+                        log.error("Нет свободной сессии с CRM Naumen.")
+                        raise CantGetData
+                    self._waiting += 1
+                    try:
+                        self._condition.wait(min(remaining, self.retry_delay))
+                    finally:
+                        self._waiting -= 1
+                    continue
+            for connect in repair:
+                relogin(connect)
+            with self._condition:
+                self._condition.notify_all()
+
+
+@contextmanager
+def leased(crm: Any) -> Iterator[Any]:
+
+    """Функция выдачи сессии из пула на время операции.
+    Если передан не пул, а одна сессия, возвращается она.
+
+    Args:
+        crm: пул сессий или сессия с CRM.
+
+    Yields:
+        ActiveConnect: сессия с CRM.
+    """
+
+    lease = getattr(crm, "lease", None)
+    if lease is None:
+        yield crm
+        return
+    with lease() as connect:
+        yield connect
@@ -0,0 +1,259 @@
+import logging
+import os
+from threading import Lock
+from time import monotonic, sleep, time
+from typing import Any, Tuple, Union
+
+from ..config.config import get_config_value
+from ..exceptions import CrmUnavailable
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore
+
+log = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CrmThrottle:
+
+    """Ограничение нагрузки на CRM Naumen: ограничитель скорости запросов
+    и размыкатель цепи.
+
+    Ограничитель - корзина токенов: запросы отправляются не чаще rate в
+    секунду, допускается пачка до burst запросов. Запрос, которому
+    пришлось бы ждать очереди дольше max_wait секунд, не отправляется.
+    Если задан state_file, корзина хранится в файле под блокировкой и
+    общая для всех процессов, использующих этот файл.
+
+    Размыкатель: после failure_threshold ошибок подряд (ошибка соединения,
+    таймаут или статус 5xx) запросы не отправляются cooldown секунд, затем
+    пропускается один пробный запрос. Успешный пробный запрос замыкает
+    цепь, неудачный снова размыкает.
+
+    В обоих случаях вызывается исключение CrmUnavailable. Параметры, не
+    переданные явно, берутся из раздела throttle конфигурации, rate 0 и
+    failure_threshold 0 выключают соответствующую часть.
+    """
+
+    def __init__(
+        self,
+        *,
+        rate: Union[float, None] = None,
+        burst: Union[int, None] = None,
+        max_wait: Union[float, None] = None,
+        state_file: Union[str, None] = None,
+        failure_threshold: Union[int, None] = None,
+        cooldown: Union[float, None] = None,
+    ) -> None:
+        """Создание ограничителя нагрузки.
+
+        Kwargs:
+            rate: запросов в секунду.
+            burst: размер корзины токенов.
+            max_wait: максимальное ожидание очереди запросов, сек.
+            state_file: файл корзины, общей для нескольких процессов.
+            failure_threshold: количество ошибок подряд до размыкания.
+            cooldown: время до пробного запроса после размыкания, сек.
+        """
+        self._options = {
+            "rate": rate,
+            "burst": burst,
+            "max_wait": max_wait,
+            "state_file": state_file,
+            "failure_threshold": failure_threshold,
+            "cooldown": cooldown,
+        }
+        self._lock = Lock()
+        self._tokens: Union[float, None] = None
+        self._updated = 0.0
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_at: Union[float, None] = None
+
+    @property
+    def rate(self) -> float:
+        return float(self._option("rate", 0))
+
+    @property
+    def burst(self) -> int:
+        return max(1, int(self._option("burst", 5)))
+
+    @property
+    def max_wait(self) -> float:
+        return float(self._option("max_wait", 60))
+
+    @property
+    def state_file(self) -> str:
+        return str(self._option("state_file", ""))
+
+    @property
+    def failure_threshold(self) -> int:
+        return int(self._option("failure_threshold", 5))
+
+    @property
+    def cooldown(self) -> float:
+        return float(self._option("cooldown", 30))
+
+    @property
+    def state(self) -> str:
+        """Состояние цепи: closed, open или half_open."""
+
+        with self._lock:
+            if self._state == OPEN and self._cooldown_passed():
+                return HALF_OPEN
+            return self._state
+
+    def reserve(self) -> float:
+
+        """Метод получения разрешения на запрос к CRM.
+
+        Returns:
+            float: задержка перед отправкой запроса, сек.
+
+        Raises:
+            CrmUnavailable: если цепь разомкнута или очередь слишком долгая.
+        """
+
+        self._allow()
+        rate = self.rate
+        if rate <= 0:
+            return 0.0
+        path = self.state_file
+        if path and fcntl is not None:
+            return self._reserve_shared(path, rate)
+        with self._lock:
+            now = monotonic()
+            if self._tokens is None:
+                self._tokens, self._updated = float(self.burst), now
+            self._tokens, delay = self._take(self._tokens, self._updated, now, rate)
+            self._updated = now
+        return delay
+
+    def wait(self) -> None:
+        """Метод ожидания очереди запроса к CRM.
+
+        Raises:
+            CrmUnavailable: если цепь разомкнута или очередь слишком долгая.
+        """
+
+        delay = self.reserve()
+        if delay > 0:
+            sleep(delay)
+
+    def record(self, success: bool) -> None:
+        """Метод учета результата запроса к CRM.
+
+        Args:
+            success: получен ли ответ без ошибки сервера.
+        """
+
+        with self._lock:
+            self._probe_at = None
+            if success:
+                if self._state != CLOSED:
+                    log.info("CRM Naumen отвечает, цепь запросов замкнута.")
+                self._state, self._failures = CLOSED, 0
+                return
+            self._failures += 1
+            threshold = self.failure_threshold
+            if threshold <= 0:
+                return
+            if self._state != CLOSED or self._failures >= threshold:
+                if self._state == CLOSED:
+                    log.warning(
+                        f"{self._failures} ошибок CRM Naumen подряд, запросы "
+                        f"приостановлены на {self.cooldown:.0f} сек.",
+                    )
+                self._state, self._opened_at = OPEN, monotonic()
+
+    def reset(self) -> None:
+        """Метод сброса корзины токенов и замыкания цепи."""
+
+        with self._lock:
+            self._tokens, self._probe_at = None, None
+            self._state, self._failures = CLOSED, 0
+
+    def _allow(self) -> None:
+        with self._lock:
+            if self._state == CLOSED:
+                return
+            now = monotonic()
+            if self._state == OPEN and self._cooldown_passed():
+                self._state = HALF_OPEN
+            # пробный запрос, не вернувший результат за cooldown, считается
+            # потерянным, и пропускается следующий.
+            if self._state == HALF_OPEN and (
+                self._probe_at is None or now - self._probe_at >= self.cooldown
+            ):
+                self._probe_at = now
+                return
+        raise CrmUnavailable
+
+    def _cooldown_passed(self) -> bool:
+        return monotonic() - self._opened_at >= self.cooldown
+
+    def _reserve_shared(self, path: str, rate: float) -> float:
+        with open(path, "a+", encoding="utf-8") as state_file:
+            fcntl.flock(state_file, fcntl.LOCK_EX)
+            state_file.seek(0)
+            tokens, updated = _parse_state(state_file.read(), self.burst)
+            now = time()
+            tokens, delay = self._take(tokens, updated, now, rate)
+            state_file.seek(0)
+            state_file.truncate()
+            state_file.write(f"{tokens} {now}")
+            state_file.flush()
+            os.fsync(state_file.fileno())
+        return delay
+
+    def _take(
+        self,
+        tokens: float,
+        updated: float,
+        now: float,
+        rate: float,
+    ) -> Tuple[float, float]:
+
+        """Метод взятия токена из корзины. Токены могут уйти в минус: это
+        запросы, ожидающие своей очереди.
+
+        Args:
+            tokens: токенов в корзине на момент updated.
+            updated: время последнего обновления корзины.
+            now: текущее время.
+            rate: запросов в секунду.
+
+        Returns:
+            Tuple[float, float]: токенов в корзине и задержка запроса, сек.
+
+        Raises:
+            CrmUnavailable: если задержка больше max_wait.
+        """
+
+        tokens = min(float(self.burst), tokens + max(0.0, now - updated) * rate)
+        delay = max(0.0, (1 - tokens) / rate)
+        if delay > self.max_wait:
+            log.warning(f"Очередь запросов к CRM Naumen: {delay:.1f} сек.")
+            raise CrmUnavailable
+        return tokens - 1, delay
+
+    def _option(self, name: str, default: Any) -> Any:
+        value = self._options[name]
+        if value is None:
+            return get_config_value("throttle", name, default=default)
+        return value
+
+
+def _parse_state(raw: str, burst: int) -> Tuple[float, float]:
+    try:
+        tokens, updated = raw.split()
+        return float(tokens), float(updated)
+    except ValueError:
+        return float(burst), 0.0
+
+
+CRM_THROTTLE = CrmThrottle()
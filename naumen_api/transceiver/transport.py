@@ -0,0 +1,152 @@
+import logging
+from threading import local
+from typing import Any, Mapping, Tuple, Union
+
+from requests import PreparedRequest, Response, Session
+from requests.adapters import HTTPAdapter, Retry
+
+from ..config.config import get_config_value
+from ..config.structures import NaumenRequestType
+from .throttle import CRM_THROTTLE
+
+log = logging.getLogger(__name__)
+
+TIMEOUT = Tuple[Union[float, None], Union[float, None]]
+
+# политики повторов по умолчанию: POST запросы создают отчёты в CRM,
+# поэтому повторяются только при ошибке соединения.
+DEFAULT_RETRIES: Mapping[str, Mapping[str, Any]] = {
+    "GET": {"total": 5, "backoff_factor": 0.5, "status_forcelist": [502, 503, 504]},
+    "POST": {"total": 2, "backoff_factor": 0.5, "status_forcelist": []},
+}
+
+
+class ThrottledRetry(Retry):
+
+    """Политика повторов urllib3, которая учитывает повторы в CRM_THROTTLE.
+
+    Каждая неудачная попытка перед повтором считается ошибкой размыкателя
+    цепи, а каждый повтор ждет очереди ограничителя скорости. Если цепь
+    разомкнулась, повтор не отправляется и вызывается исключение
+    CrmUnavailable.
+    """
+
+    def sleep(self, response: Any = None) -> None:
+        # sleep вызывается только перед повтором неудачной попытки.
+        CRM_THROTTLE.record(False)
+        super().sleep(response)
+        CRM_THROTTLE.wait()
+
+
+class NaumenAdapter(HTTPAdapter):
+
+    """HTTPAdapter с отдельной политикой повторов для каждого HTTP метода.
+
+    HTTPAdapter передает в urllib3 одну политику max_retries, поэтому
+    политика запроса выбирается в send по его методу и хранится в
+    локальной памяти потока.
+    """
+
+    def __init__(self, method_retries: Mapping[str, Retry], **kwargs: Any) -> None:
+        """Создание адаптера.
+
+        Args:
+            method_retries: политики повторов по HTTP методам.
+            **kwargs: параметры HTTPAdapter.
+        """
+        self._local = local()
+        self.method_retries = dict(method_retries)
+        super().__init__(**kwargs)
+
+    @property  # type: ignore
+    def max_retries(self) -> Retry:  # type: ignore
+        return getattr(self._local, "retries", None) or self._max_retries
+
+    @max_retries.setter
+    def max_retries(self, value: Retry) -> None:
+        self._max_retries = value
+
+    def send(self, request: PreparedRequest, *args: Any, **kwargs: Any) -> Response:
+        self._local.retries = self.method_retries.get(str(request.method))
+        try:
+            return super().send(request, *args, **kwargs)
+        finally:
+            self._local.retries = None
+
+
+def make_retry(method: str) -> Retry:
+
+    """Функция создания политики повторов HTTP метода по разделу
+    transport.retries конфигурации.
+
+    Args:
+        method: HTTP метод.
+
+    Returns:
+        Retry: политика повторов.
+    """
+
+    default = DEFAULT_RETRIES.get(method, DEFAULT_RETRIES["GET"])
+    options = {
+        name: get_config_value("transport", "retries", method, name, default=value)
+        for name, value in default.items()
+    }
+    # ответ с ошибкой возвращается вызывающему коду, а не RetryError.
+    return ThrottledRetry(**options, raise_on_status=False)
+
+
+def mount_adapters(session: Session) -> None:
+
+    """Функция настройки пула соединений, повторов и сжатия сессии по
+    разделу transport конфигурации.
+
+    Args:
+        session: сессия requests.
+    """
+
+    method_retries = {method: make_retry(method) for method in DEFAULT_RETRIES}
+    for prefix in ("https://", "http://"):
+        adapter = NaumenAdapter(
+            method_retries,
+            pool_connections=get_config_value(
+                "transport",
+                "pool_connections",
+                default=10,
+            ),
+            pool_maxsize=get_config_value("transport", "pool_maxsize", default=10),
+            max_retries=method_retries["GET"],
+            pool_block=get_config_value("transport", "pool_block", default=True),
+        )
+        session.mount(prefix, adapter)
+    session.headers["Accept-Encoding"] = get_accept_encoding()
+
+
+def get_accept_encoding() -> str:
+    """Функция получения поддерживаемых клиентом алгоритмов сжатия ответа."""
+
+    encoding = get_config_value("transport", "accept_encoding", default="gzip, deflate")
+    return str(encoding)
+
+
+def get_timeout(request_type: Union[NaumenRequestType, None] = None) -> TIMEOUT:
+
+    """Функция получения таймаутов соединения и чтения ответа для типа
+    запроса. Значение 0 означает отсутствие таймаута.
+
+    Args:
+        request_type: тип запроса к CRM, None - служебные запросы.
+
+    Returns:
+        TIMEOUT: таймаут соединения и таймаут чтения ответа, сек.
+    """
+
+    connect = get_config_value("transport", "connect_timeout", default=10)
+    read = get_config_value("transport", "read_timeout", "default", default=60)
+    if request_type is not None:
+        read = get_config_value(
+            "transport",
+            "read_timeout",
+            request_type.value,
+            default=read,
+        )
+    return (float(connect) or None, float(read) or None)
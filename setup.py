@@ -19,5 +19,13 @@ setup(
         "beautifulsoup4==4.11.1",
         "requests==2.28.1",
     ],
+    extras_require={
+        "async": ["aiohttp>=3.8"],
+        "lxml": ["lxml"],
+        "msgpack": ["msgpack>=1.0"],
+        "cbor": ["cbor2>=5.4"],
+        "numpy": ["numpy"],
+        "arrow": ["pyarrow"],
+    },
     include_package_data=True,
 )
@@ -0,0 +1,35 @@
+"""Замер группировки строк отчёта по дням на синтетическом годовом отчёте.
+
+Запуск: python -m tests.benchmark_days_dict
+"""
+
+from datetime import datetime, timedelta
+from timeit import timeit
+
+from naumen_api.parser.parser_base import (
+    PageType,
+    _forming_days_dict,
+    _get_date_range,
+)
+
+
+def main(number=10):
+    start = datetime(2022, 1, 1)
+    date_range = _get_date_range(start, start + timedelta(days=365))
+    for segments in (1, 10, 50):
+        rows = [
+            {'Месяц': str(day.month), 'День': str(day.day), 'Сегмент': str(num)}
+            for day in date_range for num in range(segments)
+        ]
+        for report_type in (PageType.SERVICE_LEVEL_REPORT_PAGE,
+                            PageType.FLR_LEVEL_REPORT_PAGE):
+            spent = timeit(
+                lambda: _forming_days_dict(date_range, rows, report_type),
+                number=number,
+            )
+            print(f'{report_type.name}, строк {len(rows)}: '
+                  f'{spent / number * 1000:.2f} мс')
+
+
+if __name__ == '__main__':
+    main()
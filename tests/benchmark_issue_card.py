@@ -0,0 +1,37 @@
+"""Сравнение скорости парсинга карточки обращения с индексом по id и без.
+
+Запуск: python -m tests.benchmark_issue_card [путь к html карточки]
+Без аргумента используется синтетическая карточка с большим числом полей.
+"""
+
+import sys
+from timeit import timeit
+from types import SimpleNamespace
+from unittest import mock
+
+from naumen_api.parser import issue_card
+
+from . import naumen_pages
+
+
+def _legacy_index(soup):
+    return SimpleNamespace(find=soup.find, soup=soup)
+
+
+def main(number=20):
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], encoding='utf-8') as page:
+            text = page.read()
+    else:
+        text = naumen_pages.issue_card_page(padding=2000)
+
+    indexed = timeit(lambda: issue_card.parse(text), number=number)
+    with mock.patch.object(issue_card, '_IdIndex', _legacy_index):
+        legacy = timeit(lambda: issue_card.parse(text), number=number)
+    print(f'По полям: {legacy / number * 1000:.1f} мс на карточку')
+    print(f'С индексом: {indexed / number * 1000:.1f} мс на карточку')
+    print(f'Ускорение: {legacy / indexed:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+"""Замер форматирования большого списка обращений в JSON: кодирование
+через dataclasses.asdict и через JSONResponseFormatter.
+
+Запуск: python -m tests.benchmark_json_formatter
+"""
+
+from timeit import timeit
+
+from naumen_api.config.structures import StatusType
+from naumen_api.transceiver.response_creator import (
+    JSONResponseFormatter,
+    ResponseTemplate,
+)
+
+from .test_response_creator import _issue, _reference
+
+
+def main(number=5):
+    for count in (1000, 10000):
+        api_response = ResponseTemplate(
+            StatusType._SUCCESS,
+            [_issue(num) for num in range(count)],
+        )
+        for name, make in (
+            ('asdict', _reference),
+            ('JSONResponseFormatter', JSONResponseFormatter.make),
+        ):
+            spent = timeit(lambda: make(api_response), number=number)
+            print(f'{name}, обращений {count}: {spent / number * 1000:.2f} мс')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+"""Синтетические страницы CRM Naumen для тестов парсеров."""
+
+from datetime import datetime, timedelta
+
+
+SL_LABEL = ('День', 'Группа', 'Поступило в ТП', 'Количество первичных',
+            'Принято за 15 минут', 'В очереди более 15 мин',
+            'Service Level (%)')
+MTTR_LABEL = ('День', 'Всего ТТ', 'Средн МТТР', 'Средн МТТР ТП')
+FLR_LABEL = ('Месяц', 'День', 'FLR по дн (в %)', 'Закрыто ТП без др отд',
+             'Количество первичных')
+AHT_LABEL = ('Месяц', 'День', 'Сегмент', 'Поступило', 'Среднее время')
+ISSUES_LABEL = ('Обращение', 'Время решения', 'Тип обращения', 'Состояние',
+                'Ответственный')
+SEARCH_LABEL = ('Номер обращения', 'Источник обращения', 'Тип обращения',
+                'Статус', 'Ответственный', 'Описание', 'Контактное лицо')
+SL_GROUPS = ('Группа поддержки VIP', 'Группа поддержки сети')
+AHT_SEGMENTS = ('B2B', 'VIP')
+
+
+def _page(body):
+    return f'<html><head><title>Naumen</title></head><body>{body}</body></html>'
+
+
+def _legend(start_name, end_name, start_date, end_date):
+    return (
+        '<table id="stdViewpart0.legendTableList">'
+        f'<tr><td>{start_name}:</td><td>{start_date}</td></tr>'
+        f'<tr><td>{end_name}:</td><td>{end_date}</td></tr>'
+        '</table>'
+    )
+
+
+def _row(cells):
+    return '<tr>' + ''.join(f'<td>{cell}</td>' for cell in cells) + '</tr>'
+
+
+def _head(label):
+    return '<tr>' + ''.join(f'<th><b>{name}</b></th>' for name in label) + '</tr>'
+
+
+def _report_table(label, rows, head_rows, footer):
+    filler = ''.join(_row(['']) for _ in range(head_rows - 1))
+    tail = _row(['Итого']) if footer else ''
+    return (
+        '<table class="supp" id="stdViewpart0.part0_TableList">'
+        + _head(label) + filler + ''.join(_row(row) for row in rows) + tail
+        + '</table>'
+    )
+
+
+def _days(start_date, end_date):
+    start = datetime.strptime(start_date, '%d.%m.%Y')
+    end = datetime.strptime(end_date, '%d.%m.%Y')
+    while start < end:
+        yield start
+        start += timedelta(days=1)
+
+
+def service_level_page(start_date, end_date, skip_days=()):
+    rows = []
+    for day in _days(start_date, end_date):
+        if day.day in skip_days:
+            continue
+        for num, group in enumerate(SL_GROUPS):
+            total = day.day + num
+            row = [group, total, num, total - 1, 1,
+                   round((total - 1) / total * 100, 1)]
+            if num == 0:
+                row.insert(0, day.day)
+            rows.append(row)
+    return _page(
+        _legend('Дата перевода, с', 'Дата перевода, по', start_date, end_date)
+        + _report_table(SL_LABEL, rows, 3, True),
+    )
+
+
+def mttr_page(start_date, end_date, skip_days=()):
+    rows = [
+        [day.day, day.day * 2, f'{day.day}.5', f'{day.day}.1']
+        for day in _days(start_date, end_date) if day.day not in skip_days
+    ]
+    return _page(
+        _legend('Дата регистр, с', 'Дата регистр, по', start_date, end_date)
+        + _report_table(MTTR_LABEL, rows, 3, False),
+    )
+
+
+def flr_page(start_date, end_date, skip_days=()):
+    rows = [
+        [day.month, day.day, f'{50 + day.day % 50}', day.day, day.day * 2]
+        for day in _days(start_date, end_date) if day.day not in skip_days
+    ]
+    return _page(
+        _legend('Дата перевода, с', 'Дата перевода, по', start_date, end_date)
+        + _report_table(FLR_LABEL, rows, 3, True),
+    )
+
+
+def aht_page(start_date, end_date, skip_days=(), segments=AHT_SEGMENTS):
+    rows = []
+    for day in _days(start_date, end_date):
+        if day.day in skip_days:
+            continue
+        for num, segment in enumerate(segments):
+            rows.append([day.month, day.day, segment, day.day + num,
+                         f'{day.day},{num}'])
+    return _page(
+        _legend('Дата перевода, с', 'Дата перевода, по', start_date, end_date)
+        + _report_table(AHT_LABEL, rows, 1, False),
+    )
+
+
+def issues_page(count):
+    rows = [
+        [f'<a href="/card?uuid=issue{num}">Обращение {1000000 + num}</a>',
+         f'{num} д {num % 24} ч {num % 60} мин', 'Авария',
+         'В работе', f'Инженер {num}']
+        for num in range(count)
+    ]
+    filler = ''.join(_row(['']) for _ in range(6))
+    return _page(
+        '<table class="supp">' + _head(ISSUES_LABEL) + filler
+        + ''.join(_row(row) for row in rows) + _row(['Итого']) + '</table>',
+    )
+
+
+def search_page(count, page_count=1, offset=0):
+    rows = [
+        [f'<a href="/card?uuid=issue{num}">{1000000 + num}</a>',
+         f'<a href="/cntr?uuid=cntr{num}">Контрагент {num}</a>',
+         'Авария', 'Открыто',
+         f'<a href="/emp?uuid=emp{num}">Инженер {num}</a>',
+         f'Описание {num}', f'Контакт {num}']
+        for num in range(offset, offset + count)
+    ]
+    pages = ''.join(
+        f'<a id="advSearchTab.searchResults_page{num}">{num}</a>'
+        for num in range(1, page_count + 1)
+    )
+    return _page(
+        '<table class="supp" id="advSearchTab.searchResults">'
+        + _head(SEARCH_LABEL) + ''.join(_row(row) for row in rows)
+        + '</table>' + pages,
+    )
+
+
+def report_list_page(names):
+    links = ''.join(
+        f'<a title="{name}" href="/report?uuid=report{num}">{name}</a>'
+        for num, name in enumerate(names)
+    )
+    return _page(f'<div class="reports">{links}</div>')
+
+
+def issue_card_page(number=1234567, padding=0):
+    filler = ''.join(
+        f'<div id="filler{num}"><span>Поле {num}</span></div>'
+        for num in range(padding)
+    )
+    return _page(
+        filler
+        + f'<div id="number"><b>{number}</b></div>'
+        + '<div id="title">Нет связи</div>'
+        + '<div id="stage">В работе</div>'
+        + '<div id="BOCase">Авария</div>'
+        + '<div id="stateResponsible"><a href="/emp?uuid=emp1">Иванов</a></div>'
+        + '<table>'
+        + '<tr><td id="contragent"><a href="/cntr?uuid=cntr1">ООО Ромашка</a></td></tr>'
+        + '<tr><td id="requestDescription">Нет <b>линка</b></td></tr>'
+        + '<tr><td id="creationDate">01.09.2022 10:00</td></tr>'
+        + '<tr><td id="services"><a href="/srv?uuid=srv1">Интернет</a></td></tr>'
+        + '<tr><td id="obrd">02.09.2022 12:00</td></tr>'
+        + '<tr><td id="obrd1">03.09.2022 12:00</td></tr>'
+        + '</table>'
+        + '<div id="srvInf">Услуга : Интернет Адрес установки : Москва '
+        + 'Состояние : Активна</div>'
+        + '<div id="diagnostica">Диагностика: линк упал<br/>Пинг: нет</div>'
+        + '<div id="reqDeadLineDate">05.09.2022 10:00</div>'
+        + '<div id="closeDate"></div>'
+        + '<div id="clientRequisite">Полное наименование : ООО Ромашка '
+        + 'ИНН : 123</div>'
+        + '<div id="custCategory">VIP</div>'
+        + '<table class="supp" '
+        + 'id="Request.ListsParent.ListsParent2.ContactPersonsList">'
+        + _head(('ФИО', 'Телефон'))
+        + _row(('Петров', '+7 900 000 00 00'))
+        + '</table>',
+    )
@@ -0,0 +1,443 @@
+import asyncio
+from json import loads
+from time import time
+from types import SimpleNamespace
+
+import pytest
+
+aiohttp = pytest.importorskip('aiohttp')
+
+from naumen_api.async_naumen_api import AsyncClient  # noqa: E402
+from naumen_api.config.config import CONFIG  # noqa: E402
+from naumen_api.config.structures import SearchType, TypeReport  # noqa: E402
+from naumen_api.exceptions import ConnectionsFailed  # noqa: E402
+from naumen_api.parser.parser import parse_naumen_page  # noqa: E402
+from naumen_api.parser.parser_base import PageType  # noqa: E402
+from naumen_api.transceiver import (  # noqa: E402
+    async_crm,
+    async_reports,
+    async_search,
+)
+from naumen_api.transceiver.async_crm import AsyncActiveConnect  # noqa: E402
+from naumen_api.transceiver.async_session_pool import AsyncSessionPool  # noqa: E402
+from naumen_api.transceiver.cache import ISSUE_CARD_CACHE  # noqa: E402
+from naumen_api.transceiver.coalescing import REPORT_COALESCER  # noqa: E402
+from naumen_api.transceiver.polling import PollingStrategy  # noqa: E402
+from naumen_api.transceiver.report_cache import REPORT_CACHE  # noqa: E402
+from naumen_api.transceiver.response_creator import (  # noqa: E402
+    NativeResponseFormatter,
+)
+from naumen_api.transceiver.segments import SEGMENT_STORE  # noqa: E402
+from naumen_api.transceiver.throttle import CRM_THROTTLE  # noqa: E402
+
+from . import naumen_pages  # noqa: E402
+
+REPORT_NAME = 'ID0000001'
+
+
+def test_not_connected():
+    client = AsyncClient()
+    responce = loads(asyncio.run(client.get_sl_report('01.09.2022',
+                                                      '02.09.2022', 15)))
+    assert responce.get('status_code') == 401
+    assert responce.get("content") == []
+
+
+def test_error_connect():
+    client = AsyncClient()
+    responce = loads(asyncio.run(client.connect()))
+    assert responce.get('status_code') == 401
+
+
+def test_invalid_deadline():
+    client = AsyncClient()
+    responce = loads(asyncio.run(client.get_sl_report('01.09.2022',
+                                                      '02.09.2022', 'error')))
+    assert responce.get('status_code') == 400
+
+
+class FakeResponse:
+
+    def __init__(self, session, text, status=200):
+        self._session = session
+        self._text = text
+        self.status = status
+        self.url = 'https://crm.local/page'
+        self.history = ()
+
+    async def __aenter__(self):
+        self._session.active += 1
+        self._session.max_active = max(self._session.max_active, self._session.active)
+        await asyncio.sleep(self._session.latency)
+        self._session.active -= 1
+        if isinstance(self._text, Exception):
+            raise self._text
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def text(self):
+        return self._text
+
+    async def read(self):
+        return self._text.encode()
+
+
+class FakeSession:
+
+    def __init__(self, handler, latency=0.0):
+        self.handler = handler
+        self.latency = latency
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+        self.closed = False
+
+    def get(self, url, params=None, **kwargs):
+        return self._request('GET', url, params, None, kwargs)
+
+    def post(self, url, data=None, params=None, **kwargs):
+        return self._request('POST', url, params, data, kwargs)
+
+    def _request(self, method, url, params, data, kwargs):
+        request = SimpleNamespace(
+            method=method,
+            url=url,
+            params=dict(params or {}),
+            data=dict(data or {}),
+            kwargs=kwargs,
+        )
+        self.requests.append(request)
+        return FakeResponse(self, self.handler(request))
+
+    async def close(self):
+        self.closed = True
+
+
+def _fake_naumen_request(obj, request_type, mod_params=(), mod_data=(), *args,
+                         **kwargs):
+    return SimpleNamespace(
+        url=f'{obj.name}/{request_type.name}',
+        params=dict(mod_params),
+        data=dict(mod_data),
+        headers={},
+        verify=False,
+    )
+
+
+class ReportHandler:
+
+    def __init__(self, report_page, ready_after=2):
+        self.report_page = report_page
+        self.ready_after = ready_after
+        self.polls = 0
+
+    def __call__(self, request):
+        name, request_type = request.url.split('/')
+        if request_type == 'SEARCH_REPORT' and request.params.get('uuid') == '':
+            self.polls += 1
+            ready = self.ready_after is not None and self.polls > self.ready_after
+            return naumen_pages.report_list_page([REPORT_NAME] if ready else [])
+        if request_type == 'SEARCH_REPORT' and name == 'ISSUE_CARD':
+            number = int(request.params['uuid'].replace('issue', ''))
+            return naumen_pages.issue_card_page(number)
+        if request_type == 'SEARCH_REPORT':
+            return self.report_page
+        return ''
+
+
+@pytest.fixture
+def fake_crm(monkeypatch):
+    monkeypatch.setattr(async_crm, 'create_naumen_request', _fake_naumen_request)
+    monkeypatch.setattr(async_reports, 'get_report_name', lambda: REPORT_NAME)
+    monkeypatch.setattr(
+        async_reports,
+        'POLLING_STRATEGY',
+        PollingStrategy(first_delay=0.01, factor=1, max_delay=0.01, jitter=0),
+    )
+    for cache in (
+        REPORT_CACHE, SEGMENT_STORE, REPORT_COALESCER, ISSUE_CARD_CACHE,
+    ):
+        cache.clear()
+    CRM_THROTTLE.reset()
+    yield
+    for cache in (
+        REPORT_CACHE, SEGMENT_STORE, REPORT_COALESCER, ISSUE_CARD_CACHE,
+    ):
+        cache.clear()
+
+
+def _client(session):
+    client = AsyncClient(formatter=NativeResponseFormatter)
+    client._session = AsyncActiveConnect(session)
+    return client
+
+
+def test_sl_report_polls_until_built(fake_crm):
+    page = naumen_pages.service_level_page('01.09.2022', '05.09.2022')
+    handler = ReportHandler(page, ready_after=2)
+    session = FakeSession(handler)
+
+    async def _run():
+        client = _client(session)
+        response = await client.get_sl_report('01.09.2022', '05.09.2022', 30)
+        await client.close()
+        return response
+
+    response = asyncio.run(_run())
+    assert response.status.code == 200
+    assert response.content == parse_naumen_page(
+        page, PageType.SERVICE_LEVEL_REPORT_PAGE,
+    )
+    assert handler.polls == 3
+    steps = [(request.method, request.url) for request in session.requests]
+    assert steps[0] == ('POST', 'SERVICE_LEVEL/CREATE_REPORT')
+    assert session.requests[0].data['deadline'] == 30
+    assert session.requests[0].data['title'] == REPORT_NAME
+    assert steps[-1] == ('GET', 'SERVICE_LEVEL/DELETE_REPORT')
+    assert session.requests[-1].params == {'uuid': 'report0'}
+    assert session.closed
+
+
+def test_report_polling_deadline(fake_crm, monkeypatch):
+    monkeypatch.setitem(CONFIG.config['polling'], 'deadline', {'value': 0.1})
+    handler = ReportHandler('', ready_after=None)
+    session = FakeSession(handler)
+
+    async def _run():
+        client = _client(session)
+        response = await client.get_flr_report('01.09.2022', '05.09.2022')
+        polls = handler.polls
+        # отчёт появился в списке после окончания ожидания.
+        handler.ready_after = 0
+        await client.close()
+        return response, polls
+
+    response, polls = asyncio.run(_run())
+    assert response.status.code == 400
+    assert 1 < polls < 20
+    deleted = [
+        request.params['uuid'] for request in session.requests
+        if request.url.endswith('DELETE_REPORT')
+    ]
+    assert deleted and set(deleted) == {'report0'}
+
+
+def test_issue_cards_fan_out(fake_crm, monkeypatch):
+    monkeypatch.setitem(CONFIG.config, 'issue_card_workers', {'value': 3})
+    handler = ReportHandler(naumen_pages.issues_page(10), ready_after=0)
+    session = FakeSession(handler, latency=0.02)
+
+    async def _run():
+        client = _client(session)
+        response = await client.get_issues(parse_issue_card=True)
+        await client.close()
+        return response
+
+    response = asyncio.run(_run())
+    assert response.status.code == 200
+    assert [issue.uuid for issue in response.content] == [
+        f'issue{num}' for num in range(10)
+    ]
+    assert all(issue.name_contragent == 'ООО Ромашка' for issue in response.content)
+    card_requests = [
+        request for request in session.requests
+        if request.url == 'ISSUE_CARD/SEARCH_REPORT'
+    ]
+    assert len(card_requests) == 10
+    assert session.max_active == 3
+
+
+def test_connection_error_response(fake_crm):
+    def _handler(request):
+        return aiohttp.ClientConnectionError()
+
+    response = asyncio.run(
+        _client(FakeSession(_handler)).get_aht_report('01.09.2022', '05.09.2022'),
+    )
+    assert response.status.code == 504
+
+
+def test_search_pages(fake_crm, monkeypatch):
+    real_sleep = asyncio.sleep
+
+    async def _no_sleep(delay, *args):
+        await real_sleep(0)
+
+    monkeypatch.setattr(async_search.asyncio, 'sleep', _no_sleep)
+    monkeypatch.setitem(CONFIG.config, 'search_workers', {'value': 2})
+
+    def _handler(request):
+        if request.url == 'ISSUES_SEARCH/SEARCH_REPORT':
+            return naumen_pages.search_page(3, page_count=4)
+        if request.url == 'ISSUES_SEARCH/CREATE_REPORT':
+            offset = int(request.params['pagination']) * 3
+            return naumen_pages.search_page(3, page_count=4, offset=offset)
+        return ''
+
+    session = FakeSession(_handler, latency=0.01)
+    response = asyncio.run(
+        _client(session).search_issue(name_contragent='Ромашка'),
+    )
+    assert response.status.code == 200
+    assert [result.uuid for result in response.content] == [
+        f'issue{num}' for num in range(12)
+    ]
+    assert [request.url for request in session.requests[:3]] == [
+        'CONTROL_ENABLE_SEARCH/CONTROL',
+        'CONTROL_SELECT_SEARCH/CONTROL',
+        'ISSUES_SEARCH/SEARCH_REPORT',
+    ]
+    assert session.requests[2].data['byCntrTitle'] == 'Ромашка'
+    assert session.max_active <= 2
+
+
+def test_search_holds_one_pool_session(fake_crm, monkeypatch):
+    real_sleep = asyncio.sleep
+
+    async def _no_sleep(delay, *args):
+        await real_sleep(0)
+
+    monkeypatch.setattr(async_search.asyncio, 'sleep', _no_sleep)
+    monkeypatch.setitem(CONFIG.config, 'search_workers', {'value': 2})
+
+    def _handler(request):
+        if request.url == 'ISSUES_SEARCH/SEARCH_REPORT':
+            return naumen_pages.search_page(3, page_count=4)
+        if request.url == 'ISSUES_SEARCH/CREATE_REPORT':
+            offset = int(request.params['pagination']) * 3
+            return naumen_pages.search_page(3, page_count=4, offset=offset)
+        return ''
+
+    sessions = [FakeSession(_handler, latency=0.01) for _ in range(3)]
+
+    async def _run():
+        pool = AsyncSessionPool(
+            [AsyncActiveConnect(session) for session in sessions],
+            max_leases=1,
+            lease_timeout=1,
+            health_check_interval=0,
+        )
+        results = await async_search.search(pool, SearchType.ISSUES_SEARCH)
+        return results, pool.metrics()
+
+    results, metrics = asyncio.run(_run())
+    assert len(results) == 12
+    assert sorted(len(session.requests) for session in sessions) == [0, 0, 6]
+    assert metrics.leases == 1
+    assert metrics.in_use == 0
+
+
+def test_ping_uses_timeout(fake_crm):
+    session = FakeSession(lambda request: 'main page')
+    assert asyncio.run(async_crm.ping(AsyncActiveConnect(session)))
+    assert isinstance(session.requests[0].kwargs['timeout'], aiohttp.ClientTimeout)
+
+
+def test_iter_issues_yields_cards_in_order(fake_crm):
+    handler = ReportHandler(naumen_pages.issues_page(5), ready_after=0)
+    session = FakeSession(handler, latency=0.01)
+
+    async def _run():
+        client = _client(session)
+        issues = [
+            issue async for issue in client.iter_issues(parse_issue_card=True)
+        ]
+        await client.close()
+        return issues
+
+    issues = asyncio.run(_run())
+    assert [issue.uuid for issue in issues] == [f'issue{num}' for num in range(5)]
+    assert all(issue.name_contragent == 'ООО Ромашка' for issue in issues)
+
+
+def test_iter_search_issue_early_close(fake_crm, monkeypatch):
+    real_sleep = asyncio.sleep
+
+    async def _no_sleep(delay, *args):
+        await real_sleep(0)
+
+    monkeypatch.setattr(async_search.asyncio, 'sleep', _no_sleep)
+
+    def _handler(request):
+        offset = int(request.params.get('pagination', 0)) * 3
+        return naumen_pages.search_page(3, page_count=20, offset=offset)
+
+    session = FakeSession(_handler, latency=0.01)
+
+    async def _run():
+        results = _client(session).iter_search_issue(number=1000000)
+        first = await results.__anext__()
+        await results.aclose()
+        await real_sleep(0.05)
+        return first
+
+    first = asyncio.run(_run())
+    assert first.uuid == 'issue0'
+    pages = [
+        request for request in session.requests
+        if request.url == 'ISSUES_SEARCH/CREATE_REPORT'
+    ]
+    assert len(pages) <= CONFIG.config['search_workers']['value']
+
+
+def test_iter_not_connected():
+    async def _run():
+        async for issue in AsyncClient().iter_issues():
+            pass
+
+    with pytest.raises(ConnectionsFailed):
+        asyncio.run(_run())
+
+
+def test_sweep_reports_deletes_abandoned_reports(fake_crm, monkeypatch):
+    created = int(time())
+    names = [f'ID0000001-{created - 7200}', f'ID0000002-{created}', 'SL']
+
+    def handler(request):
+        if request.url.endswith('SEARCH_REPORT'):
+            return naumen_pages.report_list_page(names)
+        return ''
+
+    monkeypatch.setattr(
+        async_reports, 'sweep_targets', lambda: [(TypeReport.FLR_LEVEL, 'flr-list')],
+    )
+    session = FakeSession(handler)
+
+    async def _run():
+        crm = AsyncActiveConnect(session)
+        found = await async_reports.sweep_reports(crm)
+        await async_reports.wait_deletions(crm)
+        return found
+
+    assert asyncio.run(_run()) == 1
+    deleted = [
+        request.params['uuid'] for request in session.requests
+        if request.url.endswith('DELETE_REPORT')
+    ]
+    assert deleted and set(deleted) == {'report0'}
+
+
+def test_wait_deletions_waits_only_own_session(fake_crm):
+    own_session = FakeSession(lambda request: '')
+    other_session = FakeSession(lambda request: '')
+
+    async def _run():
+        own = AsyncActiveConnect(own_session)
+        other = AsyncActiveConnect(other_session)
+        async_reports._schedule_delete(own, TypeReport.FLR_LEVEL, 'own', 600)
+        async_reports._schedule_delete(other, TypeReport.FLR_LEVEL, 'other', 600)
+        await async_reports.wait_deletions(own)
+        other_requests = len(other_session.requests)
+        await async_reports.wait_deletions()
+        return other_requests
+
+    assert asyncio.run(_run()) == 0
+    assert [request.params['uuid'] for request in own_session.requests] == ['own']
+    assert [request.params['uuid'] for request in other_session.requests] == ['other']
+
+
+if __name__ == '__main__':
+
+    pytest.main()
@@ -0,0 +1,158 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+from naumen_api.config.structures import StatusType
+from naumen_api.parser.issues import Issue
+from naumen_api.parser.parser import parse_naumen_page
+from naumen_api.parser.parser_base import PageType
+from naumen_api.transceiver import binary_response
+from naumen_api.transceiver.binary_response import (
+    CBORResponseFormatter,
+    MessagePackResponseFormatter,
+)
+from naumen_api.transceiver.response_creator import (
+    JSONResponseFormatter,
+    ResponseTemplate,
+)
+
+import pytest
+
+from . import naumen_pages
+
+FORMATTERS = [
+    ('msgpack', MessagePackResponseFormatter),
+    ('cbor2', CBORResponseFormatter),
+]
+
+CONTENTS = [
+    (),
+    parse_naumen_page(naumen_pages.issue_card_page(), PageType.ISSUE_CARD_PAGE),
+    parse_naumen_page(naumen_pages.issues_page(3), PageType.ISSUES_TABLE_PAGE),
+    parse_naumen_page(
+        naumen_pages.search_page(3), PageType.SEARCH_RESULT_ISSUES_PAGE,
+    ),
+    parse_naumen_page(
+        naumen_pages.service_level_page('01.09.2022', '05.09.2022'),
+        PageType.SERVICE_LEVEL_REPORT_PAGE,
+    ),
+    parse_naumen_page(
+        naumen_pages.mttr_page('01.09.2022', '05.09.2022'),
+        PageType.MMTR_LEVEL_REPORT_PAGE,
+    ),
+    parse_naumen_page(
+        naumen_pages.flr_page('01.09.2022', '05.09.2022'),
+        PageType.FLR_LEVEL_REPORT_PAGE,
+    ),
+    parse_naumen_page(
+        naumen_pages.aht_page('01.09.2022', '05.09.2022'),
+        PageType.AHT_LEVEL_REPORT_PAGE,
+    ),
+]
+
+
+@pytest.mark.parametrize('package, formatter', FORMATTERS)
+@pytest.mark.parametrize('content', CONTENTS)
+def test_round_trip(package, formatter, content):
+    pytest.importorskip(package)
+    api_response = ResponseTemplate(StatusType._SUCCESS, content)
+    data = formatter.make(api_response)
+    assert isinstance(data, bytes)
+    decoded = formatter.decode(data)
+    assert decoded.status is StatusType._SUCCESS
+    assert JSONResponseFormatter.make(decoded) == JSONResponseFormatter.make(
+        api_response,
+    )
+
+
+@pytest.mark.parametrize('package, formatter', FORMATTERS)
+def test_types_are_restored(package, formatter):
+    pytest.importorskip(package)
+    issue = Issue(
+        uuid='1',
+        step_time=timedelta(minutes=90, microseconds=5),
+        last_edit_time=datetime(2022, 9, 1, 12, 30, 15, 123456),
+        creation_date=datetime(2022, 9, 1),
+        diagnostics=(('Пинг', 'нет'),),
+    )
+    api_response = ResponseTemplate(StatusType._SUCCESS, [issue])
+    decoded = formatter.decode(formatter.make(api_response))
+    assert decoded.content == [issue]
+    assert decoded.content[0].last_edit_time.tzinfo is None
+
+
+@pytest.fixture
+def local_timezone(monkeypatch):
+    if not hasattr(time, 'tzset'):
+        pytest.skip('time.tzset is not available')
+    monkeypatch.setenv('TZ', 'UTC-05')
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+@pytest.mark.parametrize('package, formatter', FORMATTERS)
+def test_naive_datetime_is_local_time(package, formatter, local_timezone):
+    module = pytest.importorskip(package)
+    issue = Issue(uuid='1', last_edit_time=datetime(2022, 9, 1, 12, 30))
+    data = formatter.make(ResponseTemplate(StatusType._SUCCESS, [issue]))
+    if package == 'msgpack':
+        raw = module.unpackb(data, raw=False, timestamp=3)
+    else:
+        raw = module.loads(data)
+    assert raw['content'][0]['last_edit_time'] == datetime(
+        2022, 9, 1, 7, 30, tzinfo=timezone.utc,
+    )
+    assert formatter.decode(data).content == [issue]
+
+
+@pytest.mark.parametrize('package, formatter', FORMATTERS)
+@pytest.mark.parametrize(
+    'content',
+    [
+        [datetime(2022, 1, 1, 10, 15)],
+        [{'created': datetime(2022, 7, 1, 10, 15)}],
+    ],
+)
+def test_naive_datetime_outside_dataclass(
+    package, formatter, content, local_timezone,
+):
+    pytest.importorskip(package)
+    data = formatter.make(ResponseTemplate(StatusType._SUCCESS, content))
+    decoded = formatter.decode(data)
+    assert decoded.content == content
+
+
+@pytest.mark.parametrize('package, formatter', FORMATTERS)
+def test_payload_is_smaller_than_json(package, formatter):
+    pytest.importorskip(package)
+    content = parse_naumen_page(
+        naumen_pages.issues_page(50), PageType.ISSUES_TABLE_PAGE,
+    )
+    api_response = ResponseTemplate(StatusType._SUCCESS, content)
+    json_size = len(JSONResponseFormatter.make(api_response).encode())
+    assert len(formatter.make(api_response)) < json_size
+
+
+@pytest.mark.parametrize('package, formatter', FORMATTERS)
+@pytest.mark.parametrize(
+    'status', [StatusType._GATEWAY_TIMEOUT, StatusType._CRM_UNAVAILABLE],
+)
+def test_error_status(package, formatter, status):
+    pytest.importorskip(package)
+    api_response = ResponseTemplate(status, ())
+    decoded = formatter.decode(formatter.make(api_response))
+    assert decoded.status is status
+    assert list(decoded.content) == []
+
+
+def test_missing_package(monkeypatch):
+    monkeypatch.setattr(binary_response, 'msgpack', None)
+    with pytest.raises(ImportError):
+        MessagePackResponseFormatter.make(
+            ResponseTemplate(StatusType._SUCCESS, ()),
+        )
+
+
+if __name__ == '__main__':
+    pytest.main()
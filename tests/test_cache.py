@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta
+
+from naumen_api.parser.issues import Issue
+from naumen_api.transceiver import cache
+from naumen_api.transceiver.cache import IssueCardCache
+
+import pytest
+
+EDIT_TIME = datetime(2022, 9, 1, 10, 0)
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache, 'monotonic', clock)
+    return clock
+
+
+def _issue(uuid='1', step='В работе', responsible='Иванов',
+           last_edit_time=EDIT_TIME):
+    return Issue(uuid=uuid, step=step, responsible=responsible,
+                 last_edit_time=last_edit_time)
+
+
+def _card(uuid='1'):
+    return Issue(uuid=uuid, description=f'card {uuid}')
+
+
+def test_get_returns_copy(clock):
+    card_cache = IssueCardCache(max_size=10, ttl=60, edit_time_tolerance=60)
+    card_cache.put(_issue(), _card())
+    cached = card_cache.get(_issue())
+    assert cached == _card()
+    cached.description = 'changed'
+    assert card_cache.get(_issue()).description == 'card 1'
+
+
+def test_miss(clock):
+    card_cache = IssueCardCache(max_size=10, ttl=60, edit_time_tolerance=60)
+    assert card_cache.get(_issue()) is None
+
+
+def test_ttl(clock):
+    card_cache = IssueCardCache(max_size=10, ttl=60, edit_time_tolerance=60)
+    card_cache.put(_issue(), _card())
+    clock.now += 59
+    assert card_cache.get(_issue()) is not None
+    clock.now += 2
+    assert card_cache.get(_issue()) is None
+    assert len(card_cache) == 0
+
+
+@pytest.mark.parametrize('changed', [
+    {'step': 'Закрыто'},
+    {'responsible': 'Петров'},
+    {'last_edit_time': EDIT_TIME + timedelta(minutes=5)},
+    {'last_edit_time': None},
+])
+def test_invalidated_when_issue_changed(clock, changed):
+    card_cache = IssueCardCache(max_size=10, ttl=60, edit_time_tolerance=60)
+    card_cache.put(_issue(), _card())
+    assert card_cache.get(_issue(**changed)) is None
+    assert card_cache.get(_issue()) is None
+
+
+def test_edit_time_tolerance(clock):
+    card_cache = IssueCardCache(max_size=10, ttl=60, edit_time_tolerance=60)
+    card_cache.put(_issue(), _card())
+    moved = _issue(last_edit_time=EDIT_TIME + timedelta(seconds=40))
+    assert card_cache.get(moved) is not None
+
+
+def test_lru_eviction(clock):
+    card_cache = IssueCardCache(max_size=2, ttl=60, edit_time_tolerance=60)
+    card_cache.put(_issue('1'), _card('1'))
+    card_cache.put(_issue('2'), _card('2'))
+    card_cache.get(_issue('1'))
+    card_cache.put(_issue('3'), _card('3'))
+    assert card_cache.get(_issue('2')) is None
+    assert card_cache.get(_issue('1')) is not None
+    assert card_cache.get(_issue('3')) is not None
+
+
+def test_disabled(clock):
+    card_cache = IssueCardCache(max_size=0, ttl=60, edit_time_tolerance=60)
+    card_cache.put(_issue(), _card())
+    assert card_cache.get(_issue()) is None
+
+
+def test_invalidate_and_clear(clock):
+    card_cache = IssueCardCache(max_size=10, ttl=60, edit_time_tolerance=60)
+    card_cache.put(_issue('1'), _card('1'))
+    card_cache.put(_issue('2'), _card('2'))
+    card_cache.invalidate('1')
+    assert card_cache.get(_issue('1')) is None
+    card_cache.clear()
+    assert len(card_cache) == 0
+
+
+def test_options_from_config():
+    card_cache = IssueCardCache()
+    assert card_cache.max_size == 1000
+    assert card_cache.ttl == 600
+    assert card_cache.edit_time_tolerance == 60
+
+
+if __name__ == '__main__':
+    pytest.main()
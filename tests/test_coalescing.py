@@ -0,0 +1,189 @@
+import asyncio
+from threading import Barrier, Thread
+from time import sleep
+
+from naumen_api.config.structures import ActiveConnect, Credentials, TypeReport
+from naumen_api.exceptions import CantGetData
+from naumen_api.parser.issues import Issue
+from naumen_api.transceiver import reports
+from naumen_api.transceiver.coalescing import ReportCoalescer, make_report_key
+
+import pytest
+
+PERIOD = (('start_date', '01.09.2022'), ('end_date', '05.09.2022'))
+
+
+def _run_in_threads(func, count=5):
+    barrier = Barrier(count)
+    results = [None] * count
+
+    def _worker(num):
+        barrier.wait()
+        try:
+            results[num] = func()
+        except Exception as exc:
+            results[num] = exc
+
+    threads = [Thread(target=_worker, args=(num,)) for num in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def _slow_build(calls, result):
+    def _build():
+        calls.append(1)
+        sleep(0.1)
+        return result
+    return _build
+
+
+def test_run_shares_one_call():
+    coalescer = ReportCoalescer(enabled=True)
+    calls, report = [], ['report']
+    results = _run_in_threads(lambda: coalescer.run('key', _slow_build(calls, report)))
+    assert len(calls) == 1
+    assert results == [report] * 5
+    # каждый запрос получает свой результат.
+    assert len({id(result) for result in results}) == 5
+
+
+def test_run_shares_error():
+    coalescer = ReportCoalescer(enabled=True)
+    calls = []
+
+    def _build():
+        calls.append(1)
+        sleep(0.1)
+        raise CantGetData
+
+    results = _run_in_threads(lambda: coalescer.run('key', _build))
+    assert len(calls) == 1
+    assert all(isinstance(result, CantGetData) for result in results)
+    assert coalescer.run('key', lambda: 'next') == 'next'
+
+
+def test_run_disabled():
+    coalescer = ReportCoalescer(enabled=False)
+    calls = []
+    _run_in_threads(lambda: coalescer.run('key', _slow_build(calls, 'report')))
+    assert len(calls) == 5
+
+
+def test_run_async_shares_one_call():
+    coalescer = ReportCoalescer(enabled=True)
+    calls = []
+
+    async def _build():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return ['report']
+
+    async def _main():
+        return await asyncio.gather(
+            *[coalescer.run_async('key', _build) for _ in range(5)],
+            coalescer.run_async('other', _build),
+        )
+
+    results = asyncio.run(_main())
+    assert len(calls) == 2
+    assert results[:5] == [['report']] * 5
+    assert len({id(result) for result in results[:5]}) == 5
+
+
+def test_remember_and_recall():
+    coalescer = ReportCoalescer(reuse_window=0.05)
+    assert coalescer.recall('key') == ''
+    assert coalescer.remember('key', 'uuid') > 0.05
+    assert coalescer.recall('key') == 'uuid'
+    sleep(0.06)
+    assert coalescer.recall('key') == ''
+
+
+def test_reuse_disabled():
+    coalescer = ReportCoalescer(reuse_window=0)
+    assert coalescer.remember('key', 'uuid') is None
+    assert coalescer.recall('key') == ''
+
+
+def test_report_key_depends_on_account():
+    def _connect(username):
+        return ActiveConnect(None, Credentials(username, 'secret', 'corp'))
+
+    first, second = _connect('ivanov'), _connect('petrov')
+    assert make_report_key(first, TypeReport.FLR_LEVEL, PERIOD, (), {}) == (
+        make_report_key(_connect('ivanov'), TypeReport.FLR_LEVEL, PERIOD, (), {})
+    )
+    assert make_report_key(first, TypeReport.FLR_LEVEL, PERIOD, (), {}) != (
+        make_report_key(second, TypeReport.FLR_LEVEL, PERIOD, (), {})
+    )
+
+
+def test_get_report_coalesces_identical_calls(monkeypatch):
+    calls = []
+
+    def _build_report(crm, report, *args, **kwargs):
+        calls.append(kwargs['mod_data'])
+        sleep(0.1)
+        return ('report',)
+
+    monkeypatch.setattr(reports, '_build_report', _build_report)
+    monkeypatch.setattr(reports, 'REPORT_COALESCER', ReportCoalescer(enabled=True))
+    results = _run_in_threads(
+        lambda: reports.get_report(
+            None, TypeReport.ISSUES_FIRST_LINE, mod_data=PERIOD,
+        ),
+    )
+    assert calls == [PERIOD]
+    assert results == [('report',)] * 5
+
+
+def test_build_report_reuses_recent_report(monkeypatch):
+    created, opened, scheduled = [], [], []
+
+    def _create_report(crm, report, request_type, *args, **kwargs):
+        created.append(1)
+
+    def _get_report(crm, report, request_type, *args, mod_params=(), **kwargs):
+        opened.append(dict(mod_params)['uuid'])
+        return 'page'
+
+    def _schedule(crm, report, uuid, delay=None):
+        scheduled.append((uuid, delay))
+
+    monkeypatch.setattr(reports, '_create_report', _create_report)
+    monkeypatch.setattr(reports, '_find_report_uuid', lambda *args: 'uuid1')
+    monkeypatch.setattr(reports, '_get_report', _get_report)
+    monkeypatch.setattr(reports, 'parse_naumen_page', lambda text, page: (text,))
+    monkeypatch.setattr(reports.REPORT_JANITOR, 'schedule', _schedule)
+    monkeypatch.setattr(reports, 'REPORT_COALESCER', ReportCoalescer(reuse_window=60))
+
+    for _ in range(3):
+        assert reports._build_report(
+            None, TypeReport.FLR_LEVEL, mod_data=PERIOD,
+        ) == ('page',)
+    assert len(created) == 1
+    assert opened == ['uuid1'] * 3
+    assert len(scheduled) == 1
+    assert scheduled[0][0] == 'uuid1'
+    assert scheduled[0][1] >= 60
+
+
+def test_waiters_do_not_share_mutations():
+    coalescer = ReportCoalescer(enabled=True)
+    issue = Issue(uuid='1')
+
+    def _build_and_edit():
+        result = coalescer.run('key', _slow_build([], [issue]))
+        result[0].responsible = str(id(result))
+        return result
+
+    results = _run_in_threads(_build_and_edit)
+    assert len({result[0].responsible for result in results}) == 5
+    assert len({id(result[0]) for result in results}) == 5
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,196 @@
+import csv
+import io
+from array import array
+from datetime import datetime, timedelta
+
+from naumen_api.config.structures import StatusType
+from naumen_api.naumen_api import Client
+from naumen_api.parser.issues import Issue
+from naumen_api.parser.parser import parse_naumen_page
+from naumen_api.parser.parser_base import PageType
+from naumen_api.parser.service_level import ServiceLevel
+from naumen_api.transceiver import columnar
+from naumen_api.transceiver.columnar import (
+    ColumnarResponseFormatter,
+    to_columns,
+    write_arrow,
+    write_csv,
+)
+from naumen_api.transceiver.response_creator import ResponseTemplate
+
+import pytest
+
+from . import naumen_pages
+
+
+def _sl_report():
+    return parse_naumen_page(
+        naumen_pages.service_level_page('01.09.2022', '05.09.2022'),
+        PageType.SERVICE_LEVEL_REPORT_PAGE,
+    )
+
+
+def _rows(content):
+    return [row for day in content for row in day]
+
+
+@pytest.mark.parametrize('page, page_type', [
+    (
+        naumen_pages.service_level_page('01.09.2022', '05.09.2022'),
+        PageType.SERVICE_LEVEL_REPORT_PAGE,
+    ),
+    (
+        naumen_pages.flr_page('01.09.2022', '05.09.2022'),
+        PageType.FLR_LEVEL_REPORT_PAGE,
+    ),
+    (
+        naumen_pages.aht_page('01.09.2022', '05.09.2022'),
+        PageType.AHT_LEVEL_REPORT_PAGE,
+    ),
+    (
+        naumen_pages.mttr_page('01.09.2022', '05.09.2022'),
+        PageType.MMTR_LEVEL_REPORT_PAGE,
+    ),
+    (naumen_pages.issues_page(5), PageType.ISSUES_TABLE_PAGE),
+])
+def test_columns_match_rows(page, page_type):
+    content = parse_naumen_page(page, page_type)
+    rows = list(columnar._iter_rows(content))
+    columns = to_columns(content)
+    assert rows
+    for name, column in columns.items():
+        assert list(column) == [getattr(row, name) for row in rows]
+
+
+def test_numeric_columns_are_typed():
+    pytest.importorskip('numpy')
+    columns = to_columns(_sl_report())
+    assert isinstance(columns['day'], list)
+    assert isinstance(columns['group'], list)
+    assert columns['total_issues'].dtype == 'int64'
+    assert columns['service_level'].dtype == 'float64'
+    rows = _rows(_sl_report())
+    assert columns['total_issues'].sum() == sum(row.total_issues for row in rows)
+
+
+def test_numeric_columns_without_numpy(monkeypatch):
+    monkeypatch.setattr(columnar, 'numpy', None)
+    columns = to_columns(_sl_report())
+    assert isinstance(columns['total_issues'], array)
+    assert columns['total_issues'].typecode == 'q'
+    assert columns['service_level'].typecode == 'd'
+
+
+def test_bool_column(monkeypatch):
+    monkeypatch.setattr(columnar, 'numpy', None)
+    columns = to_columns([Issue(vip_contragent=True), Issue()])
+    assert columns['vip_contragent'].typecode == 'b'
+    assert list(columns['vip_contragent']) == [1, 0]
+
+
+def test_numeric_column_with_none_stays_list():
+    rows = [
+        ServiceLevel(1, 'A', 2, 1, 1, 1, 50.0),
+        ServiceLevel(1, 'B', 0, 0, 0, 0, None),
+    ]
+    columns = to_columns(rows)
+    assert columns['service_level'] == [50.0, None]
+
+
+def test_empty_and_mixed_content():
+    assert to_columns(()) == {}
+    assert to_columns([[], []]) == {}
+    with pytest.raises(TypeError):
+        to_columns([Issue(), ServiceLevel(1, 'A', 2, 1, 1, 1, 50.0)])
+
+
+def test_formatter_keeps_status():
+    api_response = ResponseTemplate(StatusType._SUCCESS, _sl_report())
+    response = ColumnarResponseFormatter.make(api_response)
+    assert response.status is StatusType._SUCCESS
+    assert set(response.content) == {
+        'day',
+        'group',
+        'total_issues',
+        'total_primary_issues',
+        'num_issues_before_deadline',
+        'num_issues_after_deadline',
+        'service_level',
+    }
+
+
+def test_write_csv():
+    issue = Issue(
+        uuid='1',
+        step_time=timedelta(minutes=2),
+        creation_date=datetime(2022, 9, 1, 12, 30),
+        diagnostics=(('Пинг', 'нет'),),
+    )
+    file = io.StringIO(newline='')
+    write_csv(to_columns([issue]), file)
+    file.seek(0)
+    header, row = list(csv.reader(file))
+    values = dict(zip(header, row))
+    assert values['uuid'] == '1'
+    assert values['step_time'] == '120.0'
+    assert values['creation_date'] == '01.09.2022 12:30:00'
+    assert values['diagnostics'] == "(('Пинг', 'нет'),)"
+
+
+def test_write_csv_sl():
+    file = io.StringIO(newline='')
+    write_csv(to_columns(_sl_report()), file)
+    file.seek(0)
+    lines = list(csv.reader(file))
+    assert len(lines) == len(_rows(_sl_report())) + 1
+
+
+@pytest.mark.parametrize('use_numpy', [True, False])
+def test_write_arrow(monkeypatch, use_numpy):
+    pytest.importorskip('pyarrow')
+    import pyarrow.ipc
+
+    if not use_numpy:
+        monkeypatch.setattr(columnar, 'numpy', None)
+    columns = to_columns(_sl_report())
+    sink = io.BytesIO()
+    write_arrow(columns, sink)
+    sink.seek(0)
+    table = pyarrow.ipc.open_stream(sink).read_all()
+    assert str(table.schema.field('total_issues').type) == 'int64'
+    assert str(table.schema.field('service_level').type) == 'double'
+    assert table.column('group').to_pylist() == list(columns['group'])
+
+
+def test_write_arrow_uneven_nested_column():
+    pytest.importorskip('pyarrow')
+    import pyarrow.ipc
+
+    issues = [Issue(contact=(('a', 1),)), Issue(contact=((),))]
+    sink = io.BytesIO()
+    write_arrow(to_columns(issues), sink)
+    sink.seek(0)
+    table = pyarrow.ipc.open_stream(sink).read_all()
+    assert table.num_rows == 2
+
+
+def test_write_arrow_missing_package(monkeypatch):
+    monkeypatch.setattr(columnar, 'pyarrow', None)
+    with pytest.raises(ImportError):
+        write_arrow({}, io.BytesIO())
+
+
+def test_client_columnar_response(monkeypatch):
+    from naumen_api import naumen_api
+
+    report = _sl_report()
+    monkeypatch.setattr(naumen_api, 'get_report', lambda *args, **kwargs: report)
+    client = Client(formatter=ColumnarResponseFormatter)
+    client._session = object()
+    response = client.get_sl_report('01.09.2022', '05.09.2022')
+    assert response.status.code == 200
+    assert list(response.content['group']) == [row.group for row in _rows(report)]
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,148 @@
+from time import monotonic, sleep
+from types import SimpleNamespace
+
+from naumen_api.config.config import CONFIG
+from naumen_api.config.structures import (
+    ActiveConnect,
+    Credentials,
+    NaumenRequest,
+    NaumenRequestType,
+    TypeReport,
+)
+from naumen_api.exceptions import CantGetData
+from naumen_api.transceiver import crm
+
+import pytest
+
+LOGIN_URL = 'https://crm.local/login'
+LOGIN_PAGE = b'<form><input name="login"><input name="password"></form>'
+REPORT_PAGE = b'<table><tr><td>report</td></tr></table>'
+
+
+def _response(content=REPORT_PAGE, url='https://crm.local/report', history=()):
+    return SimpleNamespace(
+        status_code=200,
+        url=url,
+        history=list(history),
+        content=content,
+    )
+
+
+class FakeSession:
+
+    def __init__(self, pages, login_status=200):
+        self.pages = list(pages)
+        self.login_status = login_status
+        self.logins = 0
+        self.requests = 0
+
+    def post(self, url, **kwargs):
+        if url == LOGIN_URL:
+            self.logins += 1
+            return SimpleNamespace(status_code=self.login_status)
+        return self.get(url, **kwargs)
+
+    def get(self, url, **kwargs):
+        self.requests += 1
+        return self.pages.pop(0) if len(self.pages) > 1 else self.pages[0]
+
+    def close(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def naumen_urls(monkeypatch):
+    monkeypatch.setitem(CONFIG.config['url'], 'login', LOGIN_URL)
+    monkeypatch.setitem(CONFIG.config['url'], 'main', 'https://crm.local/')
+    monkeypatch.setattr(
+        crm,
+        'create_naumen_request',
+        lambda *args, **kwargs: NaumenRequest(
+            'https://crm.local/report', {}, {}, {}, False,
+        ),
+    )
+
+
+def _connect(session, credentials=Credentials('user', 'secret', 'corp')):
+    return ActiveConnect(session, credentials)
+
+
+def _get(connect):
+    return crm.get_crm_response(
+        connect,
+        TypeReport.FLR_LEVEL,
+        NaumenRequestType.SEARCH_REPORT,
+        method='GET',
+    )
+
+
+def test_expired_session_relogin_and_replay():
+    session = FakeSession([_response(LOGIN_PAGE), _response()])
+    connect = _connect(session)
+    assert _get(connect).content == REPORT_PAGE
+    assert session.logins == 1
+    assert session.requests == 2
+    assert connect.state.generation == 1
+
+
+def test_redirect_to_login_page_is_expired():
+    session = FakeSession([
+        _response(b'', url=LOGIN_URL + '?next=report', history=[object()]),
+        _response(),
+    ])
+    assert _get(_connect(session)).content == REPORT_PAGE
+    assert session.logins == 1
+
+
+def test_relogin_only_once():
+    session = FakeSession([_response(LOGIN_PAGE)])
+    with pytest.raises(CantGetData):
+        _get(_connect(session))
+    assert session.logins == 1
+    assert session.requests == 2
+
+
+def test_failed_relogin():
+    session = FakeSession([_response(LOGIN_PAGE), _response()], login_status=500)
+    with pytest.raises(CantGetData):
+        _get(_connect(session))
+    assert session.requests == 1
+
+
+def test_no_relogin_without_credentials():
+    session = FakeSession([_response(LOGIN_PAGE), _response()])
+    with pytest.raises(CantGetData):
+        _get(_connect(session, credentials=None))
+    assert session.logins == 0
+
+
+def test_relogin_skipped_when_already_renewed():
+    session = FakeSession([_response()])
+    connect = _connect(session)
+    assert crm.relogin(connect, generation=0)
+    assert crm.relogin(connect, generation=0)
+    assert session.logins == 1
+    assert connect.state.generation == 1
+
+
+def test_keep_alive_renews_idle_session(monkeypatch):
+    monkeypatch.setitem(
+        CONFIG.config['session'], 'keep_alive_interval', {'value': 0.05},
+    )
+    session = FakeSession([_response(LOGIN_PAGE), _response()])
+    connect = _connect(session)
+    connect.state.last_used = monotonic() - 10
+    crm._start_keep_alive(connect)
+    thread = connect.state.keep_alive
+    for _ in range(100):
+        if session.logins:
+            break
+        sleep(0.01)
+    crm.close_session(connect)
+    thread.join(timeout=1)
+    assert session.logins == 1
+    assert not thread.is_alive()
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,91 @@
+from dataclasses import asdict, is_dataclass
+
+from bs4.builder import builder_registry
+from naumen_api.parser import parser_base
+from naumen_api.parser.parser import parse_naumen_page
+from naumen_api.parser.parser_base import (
+    HTML_BACKENDS,
+    PageType,
+    get_html_backend,
+    set_html_backend,
+)
+
+import pytest
+
+from . import naumen_pages
+
+AVAILABLE_BACKENDS = [
+    backend for backend in HTML_BACKENDS if builder_registry.lookup(backend)
+]
+
+PAGES = [
+    (naumen_pages.report_list_page(['ID0000001', 'ID0000002']),
+     PageType.REPORT_LIST_PAGE, 'ID0000002'),
+    (naumen_pages.issues_page(5), PageType.ISSUES_TABLE_PAGE, ''),
+    (naumen_pages.issue_card_page(), PageType.ISSUE_CARD_PAGE, ''),
+    (naumen_pages.service_level_page('01.09.2022', '05.09.2022', (3,)),
+     PageType.SERVICE_LEVEL_REPORT_PAGE, ''),
+    (naumen_pages.mttr_page('01.09.2022', '05.09.2022', (2,)),
+     PageType.MMTR_LEVEL_REPORT_PAGE, ''),
+    (naumen_pages.flr_page('01.09.2022', '05.09.2022', (4,)),
+     PageType.FLR_LEVEL_REPORT_PAGE, ''),
+    (naumen_pages.aht_page('01.09.2022', '05.09.2022', (1,)),
+     PageType.AHT_LEVEL_REPORT_PAGE, ''),
+    (naumen_pages.search_page(3, page_count=4),
+     PageType.SEARCH_RESULT_ISSUES_PAGE, ''),
+    (naumen_pages.search_page(3, page_count=4), PageType.PAGINATION_PAGE, ''),
+]
+
+
+def _normalize(collection):
+    if isinstance(collection, (list, tuple)):
+        return [_normalize(item) for item in collection]
+    if is_dataclass(collection):
+        fields = asdict(collection)
+        fields.pop('last_edit_time', None)
+        return fields
+    return collection
+
+
+@pytest.fixture(autouse=True)
+def reset_backend():
+    yield
+    set_html_backend(None)
+
+
+@pytest.mark.parametrize('backend', AVAILABLE_BACKENDS)
+@pytest.mark.parametrize('page, type_page, name', PAGES)
+def test_backends_parse_equally(backend, page, type_page, name):
+    set_html_backend('html.parser')
+    expected = parse_naumen_page(page, type_page, name)
+    assert expected
+    set_html_backend(backend)
+    assert _normalize(parse_naumen_page(page, type_page, name)) == (
+        _normalize(expected)
+    )
+
+
+def test_default_backend_from_config():
+    assert get_html_backend() == 'html.parser'
+
+
+def test_auto_backend_prefers_lxml():
+    set_html_backend('auto')
+    expected = 'lxml' if 'lxml' in AVAILABLE_BACKENDS else 'html.parser'
+    assert get_html_backend() == expected
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        set_html_backend('selectolax')
+
+
+def test_missing_backend_falls_back(monkeypatch):
+    monkeypatch.setattr(parser_base.builder_registry, 'lookup',
+                        lambda name: None)
+    set_html_backend('lxml')
+    assert get_html_backend() == 'html.parser'
+
+
+if __name__ == '__main__':
+    pytest.main()
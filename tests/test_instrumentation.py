@@ -0,0 +1,164 @@
+from time import sleep
+from types import SimpleNamespace
+
+from naumen_api.config.structures import (
+    NaumenRequestType,
+    SearchOptions,
+    StatusType,
+    TypeReport,
+)
+from naumen_api.exceptions import CantGetData
+from naumen_api.transceiver import reports
+from naumen_api.transceiver.instrumentation import (
+    INSTRUMENTATION,
+    Instrumentation,
+    Stage,
+    TimingAggregator,
+    TimingEvent,
+)
+from naumen_api.transceiver.polling import PollingStrategy
+from naumen_api.transceiver.response_creator import (
+    JSONResponseFormatter,
+    NDJSONResponseFormatter,
+    ResponseTemplate,
+    make_response,
+)
+
+from . import naumen_pages
+
+import pytest
+
+
+@pytest.fixture
+def events():
+    collected = []
+    INSTRUMENTATION.subscribe(collected.append)
+    yield collected
+    INSTRUMENTATION.unsubscribe(collected.append)
+
+
+def _event(stage, duration, report='SERVICE_LEVEL', **kwargs):
+    return TimingEvent(stage=stage, report=report, duration=duration, **kwargs)
+
+
+def test_measure_emits_counters():
+    instrumentation, collected = Instrumentation(), []
+    instrumentation.subscribe(collected.append)
+    with instrumentation.measure(Stage.PARSE, 'FLR_LEVEL') as counters:
+        counters.rows = 3
+    assert len(collected) == 1
+    assert collected[0].stage == Stage.PARSE
+    assert collected[0].report == 'FLR_LEVEL'
+    assert collected[0].rows == 3
+    assert collected[0].duration >= 0
+    assert collected[0].error == ''
+
+
+def test_measure_records_error():
+    instrumentation, collected = Instrumentation(), []
+    instrumentation.subscribe(collected.append)
+    with pytest.raises(CantGetData):
+        with instrumentation.measure(Stage.POLL):
+            raise CantGetData
+    assert collected[0].error == 'CantGetData'
+
+
+def test_failing_hook_does_not_break_stage():
+    instrumentation, collected = Instrumentation(), []
+
+    def _broken(event):
+        raise ValueError
+
+    instrumentation.subscribe(_broken)
+    instrumentation.subscribe(collected.append)
+    with instrumentation.measure(Stage.CREATE):
+        pass
+    assert len(collected) == 1
+
+
+def test_aggregator_percentiles():
+    aggregator = TimingAggregator(history_size=1000)
+    for num in range(1, 101):
+        aggregator(_event(Stage.DOWNLOAD, float(num), bytes=10))
+    aggregator(_event(Stage.PARSE, 0.5, rows=7, error='ValueError'))
+    stats = aggregator.stats()
+    assert stats[Stage.DOWNLOAD].p50 == 50
+    assert stats[Stage.DOWNLOAD].p95 == 95
+    assert stats[Stage.DOWNLOAD].p99 == 99
+    assert stats[Stage.DOWNLOAD].max == 100
+    assert stats[Stage.DOWNLOAD].bytes == 1000
+    assert stats[Stage.PARSE].rows == 7
+    assert stats[Stage.PARSE].errors == 1
+
+
+def test_aggregator_history_and_report_filter():
+    aggregator = TimingAggregator(history_size=2)
+    for duration in (10.0, 1.0, 2.0):
+        aggregator(_event(Stage.POLL, duration))
+    aggregator(_event(Stage.POLL, 5.0, report='FLR_LEVEL'))
+    assert aggregator.stats('SERVICE_LEVEL')[Stage.POLL].count == 2
+    assert aggregator.stats('SERVICE_LEVEL')[Stage.POLL].max == 2.0
+    assert aggregator.stats()[Stage.POLL].count == 3
+    aggregator.clear()
+    assert aggregator.stats() == {}
+
+
+def test_report_stages_are_measured(monkeypatch, events):
+    pages = iter([
+        naumen_pages.report_list_page([]),
+        naumen_pages.report_list_page(['ID0000001']),
+        'report page',
+    ])
+
+    def _crm_response(*args, **kwargs):
+        return SimpleNamespace(
+            text=next(pages),
+            headers={'Content-Length': '42'},
+            raw=SimpleNamespace(retries=SimpleNamespace(history=(1,))),
+        )
+
+    monkeypatch.setattr(reports, 'get_crm_response', _crm_response)
+    monkeypatch.setattr(
+        reports,
+        'POLLING_STRATEGY',
+        PollingStrategy(first_delay=0, factor=1, max_delay=0, jitter=0),
+    )
+    options = SearchOptions(name='ID0000001', delay_attems=1, num_attems=5, uuid='')
+    assert reports._find_report_uuid(
+        None, options, TypeReport.SERVICE_LEVEL,
+    ) == 'report0'
+    reports._get_report(None, TypeReport.SERVICE_LEVEL, NaumenRequestType.SEARCH_REPORT)
+
+    poll, download = events
+    assert poll.stage == Stage.POLL
+    assert poll.report == 'SERVICE_LEVEL'
+    assert poll.retries == 1
+    assert poll.bytes == 84
+    assert download.stage == Stage.DOWNLOAD
+    assert download.bytes == 42
+    assert download.retries == 1
+
+
+def test_format_stage_is_measured(events):
+    response = ResponseTemplate(StatusType._SUCCESS, [1, 2, 3])
+    make_response(response, JSONResponseFormatter, 'FLR_LEVEL')
+    assert events[0].stage == Stage.FORMAT
+    assert events[0].report == 'FLR_LEVEL'
+    assert events[0].rows == 3
+
+
+def test_lazy_format_stage_measures_encoding(events):
+    response = ResponseTemplate(StatusType._SUCCESS, iter([1, 2, 3]))
+    lines = make_response(response, NDJSONResponseFormatter, 'FLR_LEVEL')
+    assert events == []
+    for _ in lines:
+        sleep(0.02)
+    assert len(events) == 1
+    assert events[0].stage == Stage.FORMAT
+    assert events[0].rows == 3
+    # время чтения строк вызывающим кодом не учитывается.
+    assert events[0].duration < 0.05
+
+
+if __name__ == '__main__':
+    pytest.main()
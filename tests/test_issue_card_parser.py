@@ -1,9 +1,15 @@
+from types import SimpleNamespace
+
 from naumen_api.exceptions import CantGetData
-from naumen_api.parser.issue_card import parse
+from naumen_api.parser import issue_card
+from naumen_api.parser.issue_card import _IdIndex, parse
 from naumen_api.parser.issues import Issue
+from naumen_api.parser.parser_base import _make_soup
 
 import pytest
 
+from . import naumen_pages
+
 
 def test_parse_day_report():
     with open('naumen_api\\parser\\test\\parse-templates-page\\'
@@ -33,6 +39,55 @@ def test_parse_error_params(text):
         parse(text)
 
 
+def test_parse_card_without_contact_table():
+    text = naumen_pages.issue_card_page()
+    text = text[:text.index('<table class="supp"')] + '</body></html>'
+    with pytest.raises(CantGetData):
+        parse(text)
+
+
+queries = [
+    ((), {'id': 'number'}),
+    (('td',), {'id': 'obrd'}),
+    (('div',), {'id': 'contragent'}),
+    (('td',), {'id': 'requestDate'}),
+    ((), {'name': 'table', 'attrs': {
+        'id': 'Request.ListsParent.ListsParent2.ContactPersonsList'}}),
+    (('a',), {'href': True}),
+]
+
+
+@pytest.mark.parametrize('args, kwargs', queries)
+def test_id_index_find_as_soup(args, kwargs):
+    soup = _make_soup(naumen_pages.issue_card_page(padding=10))
+    assert _IdIndex(soup).find(*args, **kwargs) is soup.find(*args, **kwargs)
+
+
+def test_parse_with_index_as_soup(monkeypatch):
+    text = naumen_pages.issue_card_page(padding=10)
+    indexed = parse(text)
+    monkeypatch.setattr(issue_card, '_IdIndex',
+                        lambda soup: SimpleNamespace(find=soup.find, soup=soup))
+    assert parse(text) == indexed
+
+
+def test_parse_walks_tree_once(monkeypatch):
+    calls = []
+    find_all = issue_card.BeautifulSoup.find_all
+
+    def _find_all(self, *args, **kwargs):
+        calls.append(args or kwargs)
+        return find_all(self, *args, **kwargs)
+
+    def _find(self, *args, **kwargs):
+        raise AssertionError('find by id must use index')
+
+    monkeypatch.setattr(issue_card.BeautifulSoup, 'find_all', _find_all)
+    monkeypatch.setattr(issue_card.BeautifulSoup, 'find', _find)
+    parse(naumen_pages.issue_card_page())
+    assert calls == [{'id': True}]
+
+
 if __name__ == '__main__':
 
     pytest.main()
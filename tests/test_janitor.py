@@ -0,0 +1,170 @@
+from time import time
+from types import SimpleNamespace
+
+from naumen_api.config.config import get_config_value
+from naumen_api.config.structures import TypeReport
+from naumen_api.exceptions import CantGetData
+from naumen_api.parser.report_page import find_generated_reports
+from naumen_api.transceiver import janitor
+from naumen_api.transceiver.janitor import ReportJanitor
+
+import pytest
+
+from . import naumen_pages
+
+
+class FakeDelete:
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.deleted = []
+        self.attempts = 0
+
+    def __call__(self, crm, report, uuid):
+        self.attempts += 1
+        if self.attempts <= self.failures:
+            raise CantGetData
+        self.deleted.append(uuid)
+        return True
+
+
+def _make_janitor(delete_func, **kwargs):
+    options = dict(
+        batch_size=3,
+        workers=2,
+        max_retries=2,
+        retry_delay=0.01,
+        delete_delay=0,
+    )
+    options.update(kwargs)
+    return ReportJanitor(delete_func, **options)
+
+
+def test_schedule_deletes_in_background():
+    delete = FakeDelete()
+    report_janitor = _make_janitor(delete)
+    for num in range(7):
+        report_janitor.schedule(None, TypeReport.FLR_LEVEL, str(num))
+    assert report_janitor.join(timeout=5)
+    assert sorted(delete.deleted) == [str(num) for num in range(7)]
+    assert len(report_janitor) == 0
+
+
+def test_failed_delete_is_retried():
+    delete = FakeDelete(failures=2)
+    report_janitor = _make_janitor(delete)
+    report_janitor.schedule(None, TypeReport.FLR_LEVEL, 'report')
+    assert report_janitor.join(timeout=5)
+    assert delete.deleted == ['report']
+    assert delete.attempts == 3
+
+
+def test_delete_gives_up_after_max_retries():
+    delete = FakeDelete(failures=10)
+    report_janitor = _make_janitor(delete, max_retries=1)
+    report_janitor.schedule(None, TypeReport.FLR_LEVEL, 'report')
+    assert report_janitor.join(timeout=5)
+    assert delete.deleted == []
+    assert delete.attempts == 2
+
+
+def test_flush_deletes_delayed_reports():
+    delete = FakeDelete()
+    report_janitor = _make_janitor(delete, delete_delay=600)
+    report_janitor.schedule(None, TypeReport.FLR_LEVEL, '1')
+    report_janitor.schedule(None, TypeReport.FLR_LEVEL, '2')
+    assert not report_janitor.join(timeout=0.05)
+    report_janitor.flush()
+    assert sorted(delete.deleted) == ['1', '2']
+    assert report_janitor.join(timeout=1)
+
+
+def test_flush_deletes_only_own_reports():
+    delete = FakeDelete()
+    report_janitor = _make_janitor(delete, delete_delay=600)
+    first, second, pooled = object(), object(), object()
+    pool = SimpleNamespace(connects=[pooled])
+    report_janitor.schedule(first, TypeReport.FLR_LEVEL, '1')
+    report_janitor.schedule(second, TypeReport.FLR_LEVEL, '2')
+    report_janitor.schedule(pooled, TypeReport.FLR_LEVEL, '3')
+    report_janitor.flush(first)
+    assert delete.deleted == ['1']
+    report_janitor.flush(pool)
+    assert delete.deleted == ['1', '3']
+    assert len(report_janitor) == 1
+    report_janitor.flush()
+    assert delete.deleted == ['1', '3', '2']
+
+
+def test_find_generated_reports():
+    text = naumen_pages.report_list_page(
+        ['ID0000001-1000', 'Отчёт', 'ID12345678-1000', 'ID0000002-3000', 'ID0000003'],
+    )
+    assert find_generated_reports(text, 2000) == (('ID0000001-1000', 'report0'),)
+
+
+def test_find_generated_reports_skips_link_without_uuid():
+    text = naumen_pages.report_list_page(['ID0000001-1000']).replace('uuid=', 'id=')
+    assert find_generated_reports(text, 2000) == ()
+
+
+def test_sweep_schedules_leftover_reports(monkeypatch):
+    def _config_value(*keys, default=None):
+        if keys == (TypeReport.FLR_LEVEL.value, 'uuid'):
+            return 'flr-list'
+        if keys[-1] == 'uuid':
+            return ''
+        return get_config_value(*keys, default=default)
+
+    def _crm_response(crm, report, request_type, mod_params=(), method=''):
+        assert dict(mod_params) == {'uuid': 'flr-list'}
+        created = int(time())
+        names = [
+            f'ID0000001-{created - 7200}',
+            f'ID0000002-{created - 3700}',
+            f'ID0000003-{created}',
+            'SL',
+        ]
+        return SimpleNamespace(text=naumen_pages.report_list_page(names))
+
+    monkeypatch.setattr(janitor, 'get_config_value', _config_value)
+    monkeypatch.setattr(janitor, 'get_crm_response', _crm_response)
+    delete = FakeDelete()
+    report_janitor = _make_janitor(delete, delete_delay=600, sweep_min_age=3600)
+    assert report_janitor.sweep(None) == 2
+    assert report_janitor.join(timeout=5)
+    assert sorted(delete.deleted) == ['report0', 'report1']
+
+
+def test_schedule_by_name_finds_report_uuid(monkeypatch):
+    pages = iter([[], ['Отчёт', 'ID0000001-1000']])
+
+    def _crm_response(crm, report, request_type, mod_params=(), method=''):
+        return SimpleNamespace(text=naumen_pages.report_list_page(next(pages)))
+
+    monkeypatch.setattr(janitor, 'get_crm_response', _crm_response)
+    delete = FakeDelete()
+    report_janitor = _make_janitor(delete)
+    report_janitor.schedule_by_name(None, TypeReport.FLR_LEVEL, 'ID0000001-1000')
+    assert report_janitor.join(timeout=5)
+    assert delete.deleted == ['report1']
+
+
+def test_schedule_by_name_gives_up_when_report_not_found(monkeypatch):
+    requests = []
+
+    def _crm_response(crm, report, request_type, mod_params=(), method=''):
+        requests.append(mod_params)
+        return SimpleNamespace(text=naumen_pages.report_list_page([]))
+
+    monkeypatch.setattr(janitor, 'get_crm_response', _crm_response)
+    delete = FakeDelete()
+    report_janitor = _make_janitor(delete, max_retries=1)
+    report_janitor.schedule_by_name(None, TypeReport.FLR_LEVEL, 'ID0000001-1000')
+    assert report_janitor.join(timeout=5)
+    assert delete.attempts == 0
+    assert len(requests) == 2
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+from naumen_api.parser.parser_base import (
+    PageType,
+    _forming_days_dict,
+    _get_date_range,
+)
+
+import pytest
+
+
+class CountingRow(dict):
+
+    reads = 0
+
+    def __getitem__(self, key):
+        CountingRow.reads += 1
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        CountingRow.reads += 1
+        return super().get(key, default)
+
+
+def _year_rows(start, segments):
+    rows = []
+    for day in _get_date_range(start, start + timedelta(days=365)):
+        for segment in range(segments):
+            rows.append(CountingRow(
+                {'Месяц': str(day.month), 'День': str(day.day),
+                 'Сегмент': str(segment)},
+            ))
+    return rows
+
+
+@pytest.mark.parametrize('report_type', [
+    PageType.FLR_LEVEL_REPORT_PAGE,
+    PageType.AHT_LEVEL_REPORT_PAGE,
+])
+def test_forming_days_dict_by_day_and_month(report_type):
+    start = datetime(2022, 1, 1)
+    rows = _year_rows(start, 3)
+    date_range = _get_date_range(start, start + timedelta(days=365))
+    days = _forming_days_dict(date_range, rows, report_type)
+    assert list(days) == [day.strftime('%d.%m.%Y') for day in date_range]
+    assert days['15.03.2022'] == [
+        row for row in rows if row['Месяц'] == '3' and row['День'] == '15'
+    ]
+
+
+def test_forming_days_dict_by_day():
+    rows = [{'День': '1', 'Группа': 'a'}, {'День': '1', 'Группа': 'b'},
+            {'День': '3', 'Группа': 'a'}]
+    date_range = _get_date_range('01.09.2022', '04.09.2022')
+    days = _forming_days_dict(date_range, rows,
+                              PageType.SERVICE_LEVEL_REPORT_PAGE)
+    assert days == {'1': rows[:2], '2': [], '3': rows[2:]}
+
+
+def test_forming_days_dict_returns_new_lists():
+    rows = [{'День': '1', 'Месяц': '9'}]
+    date_range = _get_date_range('01.09.2022', '02.09.2022')
+    days = _forming_days_dict(date_range, rows, PageType.AHT_LEVEL_REPORT_PAGE)
+    days['01.09.2022'].append({})
+    days = _forming_days_dict(date_range, rows, PageType.AHT_LEVEL_REPORT_PAGE)
+    assert days['01.09.2022'] == rows
+
+
+def test_forming_days_dict_is_linear():
+    start = datetime(2022, 1, 1)
+    rows = _year_rows(start, 10)
+    date_range = _get_date_range(start, start + timedelta(days=365))
+    CountingRow.reads = 0
+    _forming_days_dict(date_range, rows, PageType.FLR_LEVEL_REPORT_PAGE)
+    assert CountingRow.reads <= 2 * len(rows)
+
+
+if __name__ == '__main__':
+    pytest.main()
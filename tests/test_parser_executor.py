@@ -0,0 +1,127 @@
+from concurrent.futures import Future
+
+from naumen_api.config.config import CONFIG, get_config_value
+from naumen_api.exceptions import CantGetData
+from naumen_api.parser.executor import ParsingExecutor
+from naumen_api.parser.parser import (
+    PARSING_EXECUTOR,
+    _parse_naumen_page,
+    parse_naumen_page,
+    parse_naumen_pages,
+)
+from naumen_api.parser.parser_base import PageType
+
+import pytest
+
+from . import naumen_pages
+
+
+class InlinePool:
+
+    def __init__(self):
+        self.batches = []
+
+    def submit(self, func, *args):
+        self.batches.append(len(args[3]))
+        future = Future()
+        future.set_result(func(*args))
+        return future
+
+
+def _config_probe(page, type_page, name_report=''):
+    return (get_config_value('defaul_group_name'),)
+
+
+@pytest.fixture
+def executor():
+    executor = ParsingExecutor(_parse_naumen_page, processes=2,
+                               min_page_size=1000, batch_size=3)
+    yield executor
+    executor.shutdown()
+
+
+def test_disabled_by_default():
+    assert PARSING_EXECUTOR.processes == 0
+    assert PARSING_EXECUTOR._get_pool() is None
+
+
+def test_parse_in_process_pool(executor):
+    page = naumen_pages.search_page(50, page_count=3)
+    expected = _parse_naumen_page(page, PageType.SEARCH_RESULT_ISSUES_PAGE)
+    assert executor.parse(page, PageType.SEARCH_RESULT_ISSUES_PAGE) == expected
+    assert executor._pool is not None
+
+
+def test_parse_error_from_pool(executor):
+    with pytest.raises(CantGetData):
+        executor.parse('x' * 2000, PageType.SEARCH_RESULT_ISSUES_PAGE)
+
+
+def test_small_pages_parsed_in_process(executor, monkeypatch):
+    pool = InlinePool()
+    monkeypatch.setattr(executor, '_get_pool', lambda: pool)
+    page = naumen_pages.search_page(1)
+    assert len(page) < executor.min_page_size
+    executor.parse(page, PageType.PAGINATION_PAGE)
+    assert pool.batches == []
+
+
+def test_parse_many_batches_small_pages(executor, monkeypatch):
+    pool = InlinePool()
+    monkeypatch.setattr(executor, '_get_pool', lambda: pool)
+    small = [naumen_pages.search_page(1, offset=num) for num in range(5)]
+    large = naumen_pages.search_page(50, offset=100)
+    pages = small[:2] + [large] + small[2:]
+    tasks = [(page, PageType.SEARCH_RESULT_ISSUES_PAGE, '') for page in pages]
+    assert executor.parse_many(tasks) == [
+        _parse_naumen_page(*task) for task in tasks
+    ]
+    assert sorted(pool.batches) == [1, 2, 3]
+
+
+@pytest.mark.parametrize('processes', [0, 2])
+def test_parse_many_returns_exceptions(executor, monkeypatch, processes):
+    pool = InlinePool() if processes else None
+    monkeypatch.setattr(executor, '_get_pool', lambda: pool)
+    page = naumen_pages.search_page(1)
+    tasks = [
+        (page, PageType.SEARCH_RESULT_ISSUES_PAGE, ''),
+        ('x', PageType.SEARCH_RESULT_ISSUES_PAGE, ''),
+    ]
+    parsed, error = executor.parse_many(tasks, return_exceptions=True)
+    assert parsed == _parse_naumen_page(*tasks[0])
+    assert isinstance(error, CantGetData)
+    with pytest.raises(CantGetData):
+        executor.parse_many(tasks)
+
+
+def test_parse_naumen_pages(monkeypatch):
+    pages = [naumen_pages.search_page(2, offset=num) for num in range(3)]
+    parsed = parse_naumen_pages(pages, PageType.SEARCH_RESULT_ISSUES_PAGE)
+    assert parsed == [
+        parse_naumen_page(page, PageType.SEARCH_RESULT_ISSUES_PAGE)
+        for page in pages
+    ]
+
+
+def test_pool_uses_current_config(monkeypatch):
+    executor = ParsingExecutor(_config_probe, processes=1, min_page_size=0)
+    try:
+        assert executor.parse('page', None) == ([],)
+        config = dict(CONFIG.config)
+        config['defaul_group_name'] = {'value': ['Группа поддержки']}
+        monkeypatch.setattr(CONFIG, 'config', config)
+        assert executor.parse('page', None) == (['Группа поддержки'],)
+    finally:
+        executor.shutdown()
+
+
+def test_configure_restarts_pool(executor):
+    executor._get_pool()
+    executor.configure(processes=0)
+    assert executor._pool is None
+    assert executor._get_pool() is None
+
+
+if __name__ == '__main__':
+    pytest.main()
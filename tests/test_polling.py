@@ -0,0 +1,77 @@
+from naumen_api.config.structures import TypeReport
+from naumen_api.transceiver import polling
+from naumen_api.transceiver.polling import PollingStrategy
+
+import pytest
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _collect_delays(strategy, report, deadline, clock):
+    delays = []
+    for delay in strategy.delays(report, deadline):
+        delays.append(delay)
+        clock.now += delay
+    return delays
+
+
+def test_delays_exponential_backoff(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(polling, 'monotonic', clock)
+    strategy = PollingStrategy(first_delay=1, factor=2, max_delay=8, jitter=0)
+    delays = _collect_delays(strategy, TypeReport.SERVICE_LEVEL, 30, clock)
+    assert delays == [1, 2, 4, 8, 8, 7]
+    assert sum(delays) == 30
+
+
+def test_delays_jitter_bounds(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(polling, 'monotonic', clock)
+    strategy = PollingStrategy(first_delay=10, factor=1, max_delay=10, jitter=0.2)
+    delays = _collect_delays(strategy, TypeReport.SERVICE_LEVEL, 100, clock)
+    assert all(8 <= delay <= 12 for delay in delays[:-1])
+
+
+def test_initial_delay_tuned_by_history():
+    strategy = PollingStrategy(first_delay=0.5, max_delay=30, jitter=0)
+    assert strategy.initial_delay(TypeReport.FLR_LEVEL) == 0.5
+    for found_at, missed_at in ((2.0, 1.0), (4.0, 2.0), (5.0, 3.0)):
+        strategy.record(TypeReport.FLR_LEVEL, found_at, missed_at)
+    assert strategy.initial_delay(TypeReport.FLR_LEVEL) == 3.0
+    assert strategy.initial_delay(TypeReport.AHT_LEVEL) == 0.5
+    strategy.record(TypeReport.AHT_LEVEL, 240.0, 120.0)
+    assert strategy.initial_delay(TypeReport.AHT_LEVEL) == 30
+
+
+@pytest.mark.parametrize('build_time', [0.2, 3.0, 7.0])
+def test_initial_delay_does_not_drift(monkeypatch, build_time):
+    clock = FakeClock()
+    monkeypatch.setattr(polling, 'monotonic', clock)
+    strategy = PollingStrategy(first_delay=1, factor=2, max_delay=30, jitter=0)
+    report = TypeReport.SERVICE_LEVEL
+    initial_delays = []
+    for _ in range(30):
+        initial_delays.append(strategy.initial_delay(report))
+        started, missed_at = clock.now, 0.0
+        for delay in strategy.delays(report, 60):
+            clock.now += delay
+            probed_at = clock.now - started
+            clock.now += 0.5
+            if probed_at >= build_time:
+                strategy.record(report, probed_at, missed_at)
+                break
+            missed_at = probed_at
+    recent = initial_delays[-10:]
+    assert sum(recent) / len(recent) <= max(1.5 * build_time, strategy.first_delay)
+
+
+if __name__ == '__main__':
+
+    pytest.main()
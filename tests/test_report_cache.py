@@ -0,0 +1,200 @@
+import os
+from datetime import date, timedelta
+
+from naumen_api.config.structures import ActiveConnect, Credentials, TypeReport
+from naumen_api.parser.flr import Flr
+from naumen_api.transceiver import report_cache, reports
+from naumen_api.transceiver.report_cache import (
+    MemoryBackend,
+    ReportCache,
+    SQLiteBackend,
+    account_key,
+)
+from naumen_api.transceiver.segments import SegmentStore
+from naumen_api.transceiver.session_pool import SessionPool
+
+import pytest
+
+CLOSED_PERIOD = (('start_date', '01.01.2022'), ('end_date', '01.02.2022'),
+                 ('deadline', 15))
+REPORT = (Flr(date='01.01.2022', flr_level=50.0,
+              num_issues_closed_independently=1, total_primary_issues=2),)
+
+
+def _open_period():
+    today = date.today()
+    return (('start_date', (today - timedelta(days=3)).strftime('%d.%m.%Y')),
+            ('end_date', (today + timedelta(days=1)).strftime('%d.%m.%Y')))
+
+
+class FakeTime:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeTime()
+    monkeypatch.setattr(report_cache, 'time', clock)
+    return clock
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def cache(request, tmp_path):
+    if request.param == 'memory':
+        backend = MemoryBackend()
+    else:
+        backend = SQLiteBackend(str(tmp_path / 'reports.sqlite3'))
+    return ReportCache(backend, ttl=60)
+
+
+def test_closed_period_cached_forever(cache, clock):
+    cache.put(TypeReport.FLR_LEVEL, CLOSED_PERIOD, REPORT)
+    clock.now += 10 ** 9
+    assert cache.get(TypeReport.FLR_LEVEL, CLOSED_PERIOD) == REPORT
+
+
+def test_open_period_ttl(cache, clock):
+    period = _open_period()
+    cache.put(TypeReport.FLR_LEVEL, period, REPORT)
+    clock.now += 59
+    assert cache.get(TypeReport.FLR_LEVEL, period) == REPORT
+    clock.now += 2
+    assert cache.get(TypeReport.FLR_LEVEL, period) is None
+
+
+def test_key_includes_all_data(cache, clock):
+    cache.put(TypeReport.SERVICE_LEVEL, CLOSED_PERIOD, REPORT)
+    other_deadline = CLOSED_PERIOD[:2] + (('deadline', 30),)
+    assert cache.get(TypeReport.SERVICE_LEVEL, other_deadline) is None
+    assert cache.get(TypeReport.FLR_LEVEL, CLOSED_PERIOD) is None
+    assert cache.get(TypeReport.SERVICE_LEVEL,
+                     tuple(reversed(CLOSED_PERIOD))) == REPORT
+
+
+def test_only_period_reports_cached(cache, clock):
+    cache.put(TypeReport.ISSUES_FIRST_LINE, CLOSED_PERIOD, REPORT)
+    assert cache.get(TypeReport.ISSUES_FIRST_LINE, CLOSED_PERIOD) is None
+
+
+def test_invalid_end_date_not_cached(cache, clock):
+    period = (('start_date', '01.01.2022'), ('end_date', '2022-02-01'))
+    cache.put(TypeReport.FLR_LEVEL, period, REPORT)
+    assert cache.get(TypeReport.FLR_LEVEL, period) is None
+
+
+def test_sqlite_survives_restart(tmp_path, clock):
+    path = str(tmp_path / 'reports.sqlite3')
+    ReportCache(SQLiteBackend(path)).put(TypeReport.FLR_LEVEL,
+                                         CLOSED_PERIOD, REPORT)
+    cache = ReportCache(SQLiteBackend(path))
+    assert cache.get(TypeReport.FLR_LEVEL, CLOSED_PERIOD) == REPORT
+
+
+def test_memory_backend_size():
+    backend = MemoryBackend(max_size=2)
+    for key in 'abc':
+        backend.set(key, key.encode(), None)
+    assert backend.get('a') is None
+    assert backend.get('c') == b'c'
+
+
+def test_get_report_uses_cache(monkeypatch):
+    calls = []
+
+    def _build_report(crm, report, *args, **kwargs):
+        calls.append(kwargs['mod_data'])
+        return REPORT
+
+    monkeypatch.setattr(reports, '_build_report', _build_report)
+    monkeypatch.setattr(reports, 'REPORT_CACHE', ReportCache(MemoryBackend()))
+    monkeypatch.setattr(reports, 'SEGMENT_STORE', SegmentStore(enabled=False))
+    for _ in range(3):
+        assert reports.get_report(None, TypeReport.FLR_LEVEL,
+                                  mod_data=CLOSED_PERIOD) == REPORT
+    assert calls == [CLOSED_PERIOD]
+    reports.get_report(None, TypeReport.FLR_LEVEL, naumen_uuid='uuid',
+                       mod_data=CLOSED_PERIOD)
+    assert len(calls) == 2
+
+
+
+def _connect(username, domain='corp'):
+    return ActiveConnect(None, Credentials(username, 'password', domain))
+
+
+def test_account_key():
+    assert account_key(_connect('ivanov')) == 'corp\\ivanov'
+    assert account_key(_connect('ivanov')) == account_key(_connect('ivanov'))
+    assert account_key(_connect('ivanov')) != account_key(_connect('ivanov', 'hq'))
+    pool = SessionPool([_connect('petrov'), _connect('ivanov'), _connect('ivanov')])
+    assert account_key(pool) == 'corp\\ivanov,corp\\petrov'
+    anonymous = ActiveConnect(None)
+    assert account_key(anonymous) == account_key(anonymous)
+    assert account_key(anonymous) != account_key(ActiveConnect(None))
+    assert account_key(anonymous) != account_key(_connect('ivanov'))
+
+
+def test_account_key_includes_crm_host(monkeypatch):
+    monkeypatch.setitem(
+        report_cache.CONFIG.config['url'], 'main', 'https://crm.local/main',
+    )
+    assert account_key(_connect('ivanov')) == 'corp\\ivanov@crm.local'
+
+
+def test_sqlite_max_size(tmp_path, clock):
+    backend = SQLiteBackend(str(tmp_path / 'reports.sqlite3'), max_size=2)
+    backend.set('expired', b'0', clock.now - 1)
+    backend.set('first', b'1', None)
+    backend.set('second', b'2', None)
+    backend.set('first', b'1', None)
+    backend.set('third', b'3', clock.now + 60)
+    assert backend.get('second') is None
+    assert backend.get('expired') is None
+    assert backend.get('first') == b'1'
+    assert backend.get('third') == b'3'
+
+
+@pytest.mark.skipif(os.name != 'posix', reason='POSIX file permissions')
+def test_sqlite_file_is_private(tmp_path):
+    path = tmp_path / 'reports.sqlite3'
+    SQLiteBackend(str(path))
+    assert path.stat().st_mode & 0o077 == 0
+
+
+def test_key_includes_account(cache, clock):
+    cache.put(TypeReport.FLR_LEVEL, CLOSED_PERIOD, REPORT, account='corp\\a')
+    assert cache.get(TypeReport.FLR_LEVEL, CLOSED_PERIOD, account='corp\\b') is None
+    assert cache.get(
+        TypeReport.FLR_LEVEL, CLOSED_PERIOD, account='corp\\a',
+    ) == REPORT
+
+
+@pytest.mark.parametrize('enabled', [True, False])
+def test_get_report_separates_accounts(monkeypatch, enabled):
+    calls = []
+
+    def _build_report(crm, report, *args, **kwargs):
+        calls.append(crm.credentials.username)
+        return REPORT if not enabled else (REPORT[0],) * 31
+
+    monkeypatch.setattr(reports, '_build_report', _build_report)
+    monkeypatch.setattr(reports, 'REPORT_CACHE', ReportCache(MemoryBackend()))
+    monkeypatch.setattr(reports, 'SEGMENT_STORE', SegmentStore(MemoryBackend(),
+                                                               enabled=enabled))
+    for crm in (_connect('ivanov'), _connect('petrov'), _connect('ivanov')):
+        reports.get_report(crm, TypeReport.FLR_LEVEL, mod_data=CLOSED_PERIOD)
+    assert calls == ['ivanov', 'petrov']
+    if enabled:
+        reports.REPORT_CACHE.clear()
+        reports.get_report(_connect('sidorov'), TypeReport.FLR_LEVEL,
+                           mod_data=CLOSED_PERIOD)
+        assert calls == ['ivanov', 'petrov', 'sidorov']
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,169 @@
+import os
+from types import SimpleNamespace
+
+from naumen_api.config.structures import TypeReport
+from naumen_api.exceptions import CantGetData
+from naumen_api.parser import parser
+from naumen_api.parser.executor import ParsingExecutor
+from naumen_api.parser.issues import Issue
+from naumen_api.transceiver import reports
+from naumen_api.transceiver.cache import ISSUE_CARD_CACHE
+from naumen_api.transceiver.coalescing import REPORT_COALESCER
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clear_card_cache():
+    ISSUE_CARD_CACHE.clear()
+    yield
+    ISSUE_CARD_CACHE.clear()
+
+
+def _fake_issue_card(crm, naumen_uuid):
+    if naumen_uuid == 'broken':
+        raise CantGetData
+    return f'card {naumen_uuid}'
+
+
+def _fake_parse_pages(pages, type_page, name_report='', return_exceptions=False):
+    return [[Issue(uuid=page.split()[1], description=page)] for page in pages]
+
+
+def _pid_card(page, type_page, name_report=''):
+    return [Issue(uuid=page.split()[1], description=str(os.getpid()))]
+
+
+@pytest.fixture(autouse=True)
+def fake_parse(monkeypatch):
+    monkeypatch.setattr(reports, 'parse_naumen_pages', _fake_parse_pages)
+
+
+def test_enrich_issue_cards_keeps_order(monkeypatch):
+    monkeypatch.setattr(reports, '_get_issue_card_page', _fake_issue_card)
+    issues = [Issue(uuid=str(num), step='new') for num in range(20)]
+    response = reports._enrich_issue_cards(None, issues)
+    assert [issue.uuid for issue in response] == [str(num) for num in range(20)]
+    for issue in response:
+        assert issue.description == f'card {issue.uuid}'
+        assert issue.step == 'new'
+        assert issue.card_error == ''
+
+
+def test_enrich_issue_cards_partial_failure(monkeypatch):
+    monkeypatch.setattr(reports, '_get_issue_card_page', _fake_issue_card)
+    issues = [Issue(uuid='1'), Issue(uuid='broken'), Issue(uuid='3')]
+    response = reports._enrich_issue_cards(None, issues)
+    assert response[0].description == 'card 1'
+    assert response[1].description == ''
+    assert response[1].card_error
+    assert response[2].description == 'card 3'
+
+
+def test_enrich_issue_cards_uses_cache(monkeypatch):
+    fetched = []
+
+    def _issue_card(crm, naumen_uuid):
+        fetched.append(naumen_uuid)
+        return _fake_issue_card(crm, naumen_uuid)
+
+    monkeypatch.setattr(reports, '_get_issue_card_page', _issue_card)
+    reports._enrich_issue_cards(None, [Issue(uuid='1'), Issue(uuid='2')])
+    response = reports._enrich_issue_cards(
+        None,
+        [Issue(uuid='1'), Issue(uuid='2', step='closed'), Issue(uuid='3')],
+    )
+    assert sorted(fetched) == ['1', '2', '2', '3']
+    assert [issue.description for issue in response] == [
+        'card 1', 'card 2', 'card 3',
+    ]
+
+
+def test_enrich_issue_cards_does_not_cache_errors(monkeypatch):
+    monkeypatch.setattr(reports, '_get_issue_card_page', _fake_issue_card)
+    reports._enrich_issue_cards(None, [Issue(uuid='broken')])
+    assert len(ISSUE_CARD_CACHE) == 0
+
+
+def test_enrich_issue_cards_empty():
+    assert reports._enrich_issue_cards(None, []) == []
+
+
+def test_issue_cards_parsed_in_worker_processes(monkeypatch):
+    executor = ParsingExecutor(
+        _pid_card, processes=2, min_page_size=10 ** 9, batch_size=2,
+    )
+    batches = []
+    submit = executor._submit
+
+    def _submit(pool, tasks, return_exceptions=False):
+        batches.append(len(tasks))
+        return submit(pool, tasks, return_exceptions)
+
+    monkeypatch.setattr(executor, '_submit', _submit)
+    monkeypatch.setattr(parser, 'PARSING_EXECUTOR', executor)
+    monkeypatch.setattr(reports, 'parse_naumen_pages', parser.parse_naumen_pages)
+    monkeypatch.setattr(reports, '_get_issue_card_page', _fake_issue_card)
+    try:
+        issues = [Issue(uuid=str(num)) for num in range(5)]
+        response = reports._enrich_issue_cards(None, issues)
+    finally:
+        executor.shutdown()
+    assert [issue.uuid for issue in response] == [str(num) for num in range(5)]
+    worker_pids = {int(issue.description) for issue in response}
+    assert os.getpid() not in worker_pids
+    assert sorted(batches) == [1, 2, 2]
+
+
+@pytest.fixture
+def fake_janitor(monkeypatch):
+    scheduled = []
+    monkeypatch.setattr(reports, 'get_report_name', lambda: 'ID0000001-1000')
+    monkeypatch.setattr(
+        reports,
+        'REPORT_JANITOR',
+        SimpleNamespace(
+            schedule=lambda crm, report, uuid, delay=None: scheduled.append(
+                ('uuid', uuid),
+            ),
+            schedule_by_name=lambda crm, report, name: scheduled.append(
+                ('name', name),
+            ),
+        ),
+    )
+    REPORT_COALESCER.clear()
+    yield scheduled
+    REPORT_COALESCER.clear()
+
+
+def _not_found(*args, **kwargs):
+    raise CantGetData
+
+
+def test_unfound_report_deleted_by_name(monkeypatch, fake_janitor):
+    monkeypatch.setattr(reports, '_create_report', lambda *args, **kwargs: None)
+    monkeypatch.setattr(reports, '_find_report_uuid', _not_found)
+    with pytest.raises(CantGetData):
+        reports._build_report(None, TypeReport.FLR_LEVEL)
+    assert fake_janitor == [('name', 'ID0000001-1000')]
+
+
+def test_failed_create_deleted_by_name(monkeypatch, fake_janitor):
+    monkeypatch.setattr(reports, '_create_report', _not_found)
+    with pytest.raises(CantGetData):
+        reports._build_report(None, TypeReport.FLR_LEVEL)
+    assert fake_janitor == [('name', 'ID0000001-1000')]
+
+
+def test_failed_report_page_deleted_by_uuid(monkeypatch, fake_janitor):
+    monkeypatch.setattr(reports, '_create_report', lambda *args, **kwargs: None)
+    monkeypatch.setattr(reports, '_find_report_uuid', lambda *args: 'report0')
+    monkeypatch.setattr(reports, '_get_report', _not_found)
+    with pytest.raises(CantGetData):
+        reports._build_report(None, TypeReport.FLR_LEVEL)
+    assert fake_janitor == [('uuid', 'report0')]
+
+
+if __name__ == '__main__':
+
+    pytest.main()
@@ -0,0 +1,191 @@
+import json
+from dataclasses import asdict, dataclass, is_dataclass
+from datetime import datetime, timedelta
+
+from naumen_api.config.structures import StatusType, TypeReport
+from naumen_api.naumen_api import Client
+from naumen_api.parser.issues import Issue
+from naumen_api.parser.parser import parse_naumen_page
+from naumen_api.parser.parser_base import PageType
+from naumen_api.transceiver.response_creator import (
+    JSONResponseFormatter,
+    NativeResponseFormatter,
+    NDJSONResponseFormatter,
+    ResponseTemplate,
+    make_response,
+)
+
+import pytest
+
+from . import naumen_pages
+
+
+class AsdictJSONEncoder(json.JSONEncoder):
+    def default(self, encoding_object):
+        if is_dataclass(encoding_object):
+            return asdict(encoding_object)
+        if isinstance(encoding_object, datetime):
+            return datetime.strftime(encoding_object, '%d.%m.%Y %H:%M:%S')
+        if isinstance(encoding_object, timedelta):
+            return encoding_object.total_seconds()
+        return super().default(encoding_object)
+
+
+@dataclass
+class Nested:
+    issue: Issue
+    issues: tuple
+    mapping: dict
+
+
+def _reference(api_response):
+    return json.dumps(
+        {
+            'status_code': api_response.status.code,
+            'status_message': api_response.status.message,
+            'description': api_response.status.description,
+            'content': api_response.content,
+        },
+        sort_keys=False,
+        ensure_ascii=False,
+        separators=(',', ': '),
+        cls=AsdictJSONEncoder,
+    )
+
+
+def _issue(num):
+    return Issue(
+        uuid=f'uuid{num}',
+        number=str(num),
+        name='Обращение',
+        step_time=timedelta(minutes=num, microseconds=5),
+        last_edit_time=datetime(2022, 9, 1, 12, 30, num % 60),
+        creation_date=datetime(2022, 9, 1),
+        info_service=(('Услуга', f'Сервис {num}'), ('Адрес', 'ул. Ленина, 1')),
+        diagnostics=(('Диагностика', 1.5, None, True),),
+        client_requisite=('ИНН', num),
+    )
+
+
+CONTENTS = [
+    (),
+    [_issue(num) for num in range(20)],
+    [Nested(_issue(1), (_issue(2), _issue(3)), {'ключ': [_issue(4)]})],
+    parse_naumen_page(
+        naumen_pages.service_level_page('01.09.2022', '05.09.2022'),
+        PageType.SERVICE_LEVEL_REPORT_PAGE,
+    ),
+    parse_naumen_page(
+        naumen_pages.aht_page('01.09.2022', '05.09.2022'),
+        PageType.AHT_LEVEL_REPORT_PAGE,
+    ),
+    parse_naumen_page(
+        naumen_pages.mttr_page('01.09.2022', '05.09.2022'),
+        PageType.MMTR_LEVEL_REPORT_PAGE,
+    ),
+]
+
+
+@pytest.mark.parametrize('content', CONTENTS)
+def test_output_matches_asdict_encoding(content):
+    api_response = ResponseTemplate(StatusType._SUCCESS, content)
+    assert JSONResponseFormatter.make(api_response) == _reference(api_response)
+
+
+def test_unsupported_type_raises():
+    api_response = ResponseTemplate(StatusType._SUCCESS, [object()])
+    with pytest.raises(TypeError):
+        JSONResponseFormatter.make(api_response)
+
+
+def test_dataclass_class_is_not_encoded():
+    api_response = ResponseTemplate(StatusType._SUCCESS, [Issue])
+    with pytest.raises(TypeError):
+        JSONResponseFormatter.make(api_response)
+
+
+def test_native_response_keeps_objects(monkeypatch):
+    from naumen_api import naumen_api
+
+    issues = [_issue(1), _issue(2)]
+    monkeypatch.setattr(naumen_api, 'get_report', lambda *args, **kwargs: issues)
+    client = Client(formatter=NativeResponseFormatter)
+    client._session = object()
+    response = client.get_issues()
+    assert isinstance(response, ResponseTemplate)
+    assert response.status.code == 200
+    assert response.content is issues
+    assert isinstance(response.content[0].last_edit_time, datetime)
+
+
+@pytest.mark.parametrize('call', [
+    lambda client: client.get_issues(),
+    lambda client: client.connect(),
+    lambda client: client.get_sl_report('01.09.2022', '05.09.2022', 'deadline'),
+])
+def test_native_status_matches_json(call):
+    native = call(Client(formatter=NativeResponseFormatter))
+    formatted = json.loads(call(Client()))
+    assert native.status.code == formatted['status_code']
+    assert native.status.message == formatted['status_message']
+    assert native.status.description == formatted['description']
+    assert list(native.content) == formatted['content']
+
+
+def test_native_response_type_report_name(monkeypatch):
+    from naumen_api import naumen_api
+
+    reports = []
+
+    def _get_report(crm, report, *args, **kwargs):
+        reports.append(report)
+        return []
+
+    monkeypatch.setattr(naumen_api, 'get_report', _get_report)
+    client = Client(formatter=NativeResponseFormatter)
+    client._session = object()
+    assert client.get_flr_report('01.09.2022', '05.09.2022').content == []
+    assert reports == [TypeReport.FLR_LEVEL]
+
+
+def test_ndjson_lines():
+    issues = [_issue(1), Issue(uuid='2', description='строка\nстрока')]
+    api_response = ResponseTemplate(StatusType._SUCCESS, issues)
+    lines = list(make_response(api_response, NDJSONResponseFormatter))
+    assert len(lines) == 3
+    assert all(line.endswith('\n') and line.count('\n') == 1 for line in lines)
+    formatted = json.loads(JSONResponseFormatter.make(api_response))
+    header = json.loads(lines[0])
+    assert header == {
+        'status_code': 200, 'status_message': 'OK', 'description': '',
+    }
+    assert [json.loads(line) for line in lines[1:]] == formatted['content']
+
+
+def test_ndjson_is_lazy():
+    pulled = []
+
+    def _content():
+        for num in range(3):
+            pulled.append(num)
+            yield _issue(num)
+
+    api_response = ResponseTemplate(StatusType._SUCCESS, _content())
+    lines = NDJSONResponseFormatter.make(api_response)
+    assert pulled == []
+    next(lines)
+    assert pulled == []
+    next(lines)
+    assert pulled == [0]
+    assert len(list(lines)) == 2
+
+
+def test_ndjson_error_response():
+    api_response = ResponseTemplate(StatusType._UNAUTHORIZED, ())
+    lines = list(NDJSONResponseFormatter.make(api_response))
+    assert len(lines) == 1
+    assert json.loads(lines[0])['status_code'] == 401
+
+
+if __name__ == '__main__':
+    pytest.main()
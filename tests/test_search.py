@@ -0,0 +1,84 @@
+from random import random
+from time import sleep
+from types import SimpleNamespace
+
+from naumen_api.config.structures import ActiveConnect, PageType, SearchType
+from naumen_api.transceiver import search
+from naumen_api.transceiver.session_pool import SessionPool
+
+import pytest
+
+
+PAGE_COUNT = 6
+
+
+def _fake_crm_response(crm, obj, request_type, *args, mod_params=(),
+                       mod_data=(), method='POST', **kwargs):
+    page = dict(mod_params).get('pagination', '0')
+    if page != '0':
+        sleep(random() / 50)
+    return SimpleNamespace(text=f'page {page}')
+
+
+def _fake_parse(text, type_page, name_report=''):
+    if type_page == PageType.PAGINATION_PAGE:
+        return PAGE_COUNT
+    return [f'{text} item {num}' for num in range(3)]
+
+
+def _fake_parse_pages(pages, type_page, name_report=''):
+    return [_fake_parse(page, type_page) for page in pages]
+
+
+@pytest.fixture
+def fake_search(monkeypatch):
+    monkeypatch.setattr(search, 'get_crm_response', _fake_crm_response)
+    monkeypatch.setattr(search, 'parse_naumen_page', _fake_parse)
+    monkeypatch.setattr(search, 'parse_naumen_pages', _fake_parse_pages)
+    monkeypatch.setattr(search, 'sleep', lambda delay: None)
+
+
+def test_search_keeps_page_order(fake_search):
+    response = search.search(None, SearchType.ISSUES_SEARCH)
+    assert response == [
+        f'page {page} item {num}'
+        for page in range(PAGE_COUNT) for num in range(3)
+    ]
+
+
+def test_iter_search_yields_first_page_first(fake_search):
+    results = search.iter_search(None, SearchType.ISSUES_SEARCH)
+    assert next(results) == 'page 0 item 0'
+    assert list(results)[-1] == f'page {PAGE_COUNT - 1} item 2'
+
+
+def test_iter_search_early_close(fake_search):
+    results = search.iter_search(None, SearchType.ISSUES_SEARCH)
+    assert next(results) == 'page 0 item 0'
+    results.close()
+
+
+def test_search_holds_one_pool_session(fake_search, monkeypatch):
+    used = []
+
+    def _crm_response(crm, *args, **kwargs):
+        used.append(crm)
+        return _fake_crm_response(crm, *args, **kwargs)
+
+    monkeypatch.setattr(search, 'get_crm_response', _crm_response)
+    pool = SessionPool(
+        [ActiveConnect(SimpleNamespace()) for _ in range(3)],
+        max_leases=1,
+        lease_timeout=1,
+    )
+    assert len(search.search(pool, SearchType.ISSUES_SEARCH)) == PAGE_COUNT * 3
+    assert len(used) == PAGE_COUNT + 2
+    assert len({id(connect) for connect in used}) == 1
+    assert used[0] in pool.connects
+    assert pool.metrics().leases == 1
+    assert pool.metrics().in_use == 0
+
+
+if __name__ == '__main__':
+
+    pytest.main()
@@ -0,0 +1,244 @@
+import asyncio
+from datetime import date, timedelta
+from threading import current_thread
+
+from naumen_api.config.structures import TypeReport
+from naumen_api.exceptions import CantGetData
+from naumen_api.parser import service_level
+from naumen_api.parser.parser import parse_naumen_page
+from naumen_api.parser.parser_base import PageType
+from naumen_api.transceiver.report_cache import MemoryBackend
+from naumen_api.transceiver.segments import SegmentStore
+
+import pytest
+
+from . import naumen_pages
+
+PAGES = {
+    TypeReport.FLR_LEVEL: (naumen_pages.flr_page,
+                           PageType.FLR_LEVEL_REPORT_PAGE),
+    TypeReport.AHT_LEVEL: (naumen_pages.aht_page,
+                           PageType.AHT_LEVEL_REPORT_PAGE),
+    TypeReport.SERVICE_LEVEL: (naumen_pages.service_level_page,
+                               PageType.SERVICE_LEVEL_REPORT_PAGE),
+    TypeReport.MTTR_LEVEL: (naumen_pages.mttr_page,
+                            PageType.MMTR_LEVEL_REPORT_PAGE),
+}
+
+
+class FakeCrm:
+
+    def __init__(self, report, skip_days=()):
+        self.make_page, self.page_type = PAGES[report]
+        self.skip_days = skip_days
+        self.periods = []
+        self.threads = set()
+
+    def __call__(self, mod_data):
+        period = dict(mod_data)
+        self.periods.append((period['start_date'], period['end_date']))
+        self.threads.add(current_thread().name)
+        page = self.make_page(period['start_date'], period['end_date'],
+                              self.skip_days)
+        return parse_naumen_page(page, self.page_type)
+
+
+def _period(start, end):
+    return (('start_date', start), ('end_date', end), ('deadline', 15))
+
+
+@pytest.fixture
+def store():
+    return SegmentStore(MemoryBackend(), enabled=True)
+
+
+@pytest.mark.parametrize('report', list(PAGES))
+def test_stitched_report_equals_full_report(store, report):
+    crm = FakeCrm(report)
+    store.assemble(report, _period('10.09.2022', '20.09.2022'), (), crm)
+    response = store.assemble(report, _period('05.09.2022', '25.09.2022'),
+                              (), crm)
+    assert response == FakeCrm(report)(_period('05.09.2022', '25.09.2022'))
+    assert crm.periods[0] == ('10.09.2022', '20.09.2022')
+    assert sorted(crm.periods[1:]) == [('05.09.2022', '10.09.2022'),
+                                       ('20.09.2022', '25.09.2022')]
+
+
+def test_held_period_served_from_store(store):
+    crm = FakeCrm(TypeReport.FLR_LEVEL)
+    first = store.assemble(TypeReport.FLR_LEVEL,
+                           _period('01.09.2022', '01.11.2022'), (), crm)
+    second = store.assemble(TypeReport.FLR_LEVEL,
+                            _period('01.10.2022', '15.10.2022'), (), crm)
+    assert len(crm.periods) == 1
+    assert second == first[30:44]
+
+
+def test_today_always_requested(store):
+    crm = FakeCrm(TypeReport.FLR_LEVEL)
+    today = date.today()
+    period = _period((today - timedelta(days=3)).strftime('%d.%m.%Y'),
+                     (today + timedelta(days=1)).strftime('%d.%m.%Y'))
+    store.assemble(TypeReport.FLR_LEVEL, period, (), crm)
+    store.assemble(TypeReport.FLR_LEVEL, period, (), crm)
+    today = today.strftime('%d.%m.%Y')
+    assert crm.periods[-1][0] == today
+
+
+def test_other_request_data_not_shared(store):
+    crm = FakeCrm(TypeReport.FLR_LEVEL)
+    store.assemble(TypeReport.FLR_LEVEL, _period('01.09.2022', '05.09.2022'),
+                   (), crm)
+    other = (('start_date', '01.09.2022'), ('end_date', '05.09.2022'),
+             ('deadline', 30))
+    store.assemble(TypeReport.FLR_LEVEL, other, (), crm)
+    assert len(crm.periods) == 2
+
+
+def test_multi_month_sl_not_segmented(store):
+    crm = FakeCrm(TypeReport.SERVICE_LEVEL)
+    period = _period('25.08.2022', '05.09.2022')
+    store.assemble(TypeReport.SERVICE_LEVEL, period, (), crm)
+    store.assemble(TypeReport.SERVICE_LEVEL, period, (), crm)
+    assert crm.periods == [('25.08.2022', '05.09.2022')] * 2
+
+
+def test_unexpected_shape_falls_back_to_full_report(store):
+    calls = []
+
+    def build(mod_data):
+        calls.append(mod_data)
+        if len(calls) == 1:
+            return ()
+        return ('full',)
+
+    period = _period('01.09.2022', '05.09.2022')
+    assert store.assemble(TypeReport.FLR_LEVEL, period, (), build) == ('full',)
+    assert calls == [period, period]
+
+
+def test_failed_segment_falls_back_to_full_report(store):
+    crm = FakeCrm(TypeReport.FLR_LEVEL)
+    calls = []
+
+    def build(mod_data):
+        calls.append(mod_data)
+        if len(calls) == 1:
+            raise CantGetData
+        return crm(mod_data)
+
+    period = _period('01.09.2022', '04.09.2022')
+    assert store.assemble(TypeReport.FLR_LEVEL, period, (), build) == (
+        crm(period)
+    )
+    assert calls == [period, period]
+
+
+def test_disabled():
+    crm = FakeCrm(TypeReport.FLR_LEVEL)
+    store = SegmentStore(MemoryBackend(), enabled=False)
+    period = _period('01.09.2022', '05.09.2022')
+    store.assemble(TypeReport.FLR_LEVEL, period, (), crm)
+    store.assemble(TypeReport.FLR_LEVEL, period, (), crm)
+    assert len(crm.periods) == 2
+
+
+def test_issues_not_segmented(store):
+    calls = []
+    store.assemble(TypeReport.ISSUES_FIRST_LINE, (), (),
+                   lambda mod_data: calls.append(mod_data) or ())
+    assert calls == [()]
+
+
+@pytest.mark.parametrize('report', list(PAGES))
+def test_sharded_report_equals_full_report(report):
+    store = SegmentStore(MemoryBackend(), enabled=False, shard_days=4,
+                         workers=3)
+    crm = FakeCrm(report)
+    period = _period('01.09.2022', '15.09.2022')
+    response = store.assemble(report, period, (), crm)
+    assert current_thread().name not in crm.threads
+    assert sorted(crm.periods) == [('01.09.2022', '05.09.2022'),
+                                   ('05.09.2022', '09.09.2022'),
+                                   ('09.09.2022', '13.09.2022'),
+                                   ('13.09.2022', '15.09.2022')]
+    assert response == crm(period)
+
+
+def test_sharded_aht_completes_empty_shard():
+    store = SegmentStore(MemoryBackend(), enabled=False, shard_days=3)
+    crm = FakeCrm(TypeReport.AHT_LEVEL, skip_days=(4, 5, 6))
+    period = _period('01.09.2022', '10.09.2022')
+    response = store.assemble(TypeReport.AHT_LEVEL, period, (), crm)
+    full = crm(period)
+    assert [sorted(day, key=lambda aht: aht.segment) for day in response] == [
+        sorted(day, key=lambda aht: aht.segment) for day in full
+    ]
+    assert [aht.segment for aht in response[4]]
+
+
+def test_sharding_and_store():
+    store = SegmentStore(MemoryBackend(), enabled=True, shard_days=10)
+    crm = FakeCrm(TypeReport.FLR_LEVEL)
+    store.assemble(TypeReport.FLR_LEVEL, _period('01.09.2022', '11.09.2022'),
+                   (), crm)
+    store.assemble(TypeReport.FLR_LEVEL, _period('01.09.2022', '01.10.2022'),
+                   (), crm)
+    assert crm.periods[0] == ('01.09.2022', '11.09.2022')
+    assert sorted(crm.periods[1:]) == [('11.09.2022', '21.09.2022'),
+                                       ('21.09.2022', '01.10.2022')]
+
+
+def test_sharded_assemble_async():
+    store = SegmentStore(MemoryBackend(), enabled=False, shard_days=2)
+    crm = FakeCrm(TypeReport.FLR_LEVEL)
+
+    async def build(mod_data):
+        await asyncio.sleep(0)
+        return crm(mod_data)
+
+    period = _period('01.09.2022', '08.09.2022')
+    response = asyncio.run(
+        store.assemble_async(TypeReport.FLR_LEVEL, period, (), build),
+    )
+    assert response == crm(period)
+    assert len(crm.periods) == 5
+
+
+def _by_group(collection):
+    return [sorted(day, key=lambda row: row.group) for day in collection]
+
+
+@pytest.mark.parametrize(
+    'report', [TypeReport.SERVICE_LEVEL, TypeReport.MTTR_LEVEL],
+)
+def test_empty_today_is_empty_segment(store, report):
+    today = date.today()
+    start = today.replace(day=1).strftime('%d.%m.%Y')
+    end = (today + timedelta(days=1)).strftime('%d.%m.%Y')
+    crm = FakeCrm(report, skip_days=(today.day,))
+    period = _period(start, end)
+    store.assemble(report, period, (), crm)
+    response = store.assemble(report, period, (), crm)
+    assert crm.periods == [(start, end), (today.strftime('%d.%m.%Y'), end)]
+    full = crm(period)
+    if report == TypeReport.SERVICE_LEVEL:
+        assert _by_group(response) == _by_group(full)
+    else:
+        assert response == full
+
+
+def test_sl_day_with_one_group_is_completed():
+    full = FakeCrm(TypeReport.SERVICE_LEVEL)(_period('01.09.2022', '03.09.2022'))
+    first_group, second_group, total = full[1]
+    partial = (full[0], [first_group, total])
+    completed = service_level._merged_data_completion(partial)
+    assert completed[0] == full[0]
+    assert completed[1][0] == first_group
+    assert completed[1][-1] == total
+    assert completed[1][1].group == second_group.group
+    assert completed[1][1].total_issues == 0
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,224 @@
+import asyncio
+from threading import Thread
+from time import sleep
+from types import SimpleNamespace
+
+from naumen_api.config.structures import (
+    ActiveConnect,
+    NaumenRequest,
+    NaumenRequestType,
+    TypeReport,
+)
+from naumen_api.exceptions import CantGetData
+from naumen_api.transceiver import crm, session_pool
+from naumen_api.transceiver.session_pool import SessionPool, leased
+
+import pytest
+
+
+class FakeSession:
+
+    def __init__(self):
+        self.requests = 0
+
+    def get(self, url, **kwargs):
+        self.requests += 1
+        return SimpleNamespace(
+            status_code=200, url=url, history=[], content=b'page',
+        )
+
+    def close(self):
+        pass
+
+
+def _pool(size=2, **kwargs):
+    options = dict(
+        max_leases=1, retry_delay=30, lease_timeout=1, health_check_interval=0,
+    )
+    options.update(kwargs)
+    return SessionPool(
+        [ActiveConnect(FakeSession()) for _ in range(size)], **options,
+    )
+
+
+def test_lease_picks_free_sessions():
+    pool = _pool(size=2)
+    with pool.lease() as first, pool.lease() as second:
+        assert first is not second
+        metrics = pool.metrics()
+        assert metrics.in_use == 2
+    metrics = pool.metrics()
+    assert metrics.size == 2
+    assert metrics.in_use == 0
+    assert metrics.leases == 2
+
+
+def test_lease_waits_for_release():
+    pool = _pool(size=1)
+    leases = []
+
+    def _hold():
+        with pool.lease() as connect:
+            leases.append(connect)
+            sleep(0.1)
+
+    thread = Thread(target=_hold)
+    thread.start()
+    sleep(0.02)
+    with pool.lease() as connect:
+        assert connect is pool.connects[0]
+    thread.join()
+    metrics = pool.metrics()
+    assert metrics.leases == 2
+    assert metrics.wait_time_max >= 0.05
+    assert metrics.wait_time_avg > 0
+
+
+def test_lease_timeout():
+    pool = _pool(size=1, lease_timeout=0.05)
+    with pool.lease():
+        with pytest.raises(CantGetData):
+            with pool.lease():
+                pass
+
+
+def test_unhealthy_session_is_skipped_and_repaired(monkeypatch):
+    relogins = []
+
+    def _relogin(connect, generation=None):
+        relogins.append(connect)
+        connect.state.healthy = True
+        return True
+
+    monkeypatch.setattr(session_pool, 'relogin', _relogin)
+    pool = _pool(size=2, retry_delay=0)
+    broken = pool.connects[0]
+    broken.state.healthy = False
+    with pool.lease() as connect:
+        assert connect is pool.connects[1]
+        with pool.lease() as repaired:
+            assert repaired is broken
+    assert relogins == [broken]
+
+
+def test_health_check(monkeypatch):
+    monkeypatch.setattr(
+        session_pool, 'ping', lambda connect: connect is not pool.connects[0],
+    )
+    pool = _pool(size=3)
+    assert pool.health_check() == 2
+    assert not pool.connects[0].state.healthy
+
+
+def test_health_check_runs_periodically(monkeypatch):
+    pinged = []
+
+    def _ping(connect):
+        pinged.append(connect)
+        return True
+
+    monkeypatch.setattr(session_pool, 'ping', _ping)
+    monkeypatch.setattr(session_pool, 'close_session', lambda connect: None)
+    pool = _pool(size=2, health_check_interval=0.01)
+    for _ in range(100):
+        if len(pinged) >= 4:
+            break
+        sleep(0.01)
+    pool.close()
+    assert len(pinged) >= 4
+    pool._health_checks.join(timeout=1)
+    assert not pool._health_checks.is_alive()
+
+
+def test_leased_without_pool():
+    connect = ActiveConnect(FakeSession())
+    with leased(connect) as leased_connect:
+        assert leased_connect is connect
+
+
+def test_get_crm_response_leases_from_pool(monkeypatch):
+    monkeypatch.setattr(
+        crm,
+        'create_naumen_request',
+        lambda *args, **kwargs: NaumenRequest(
+            'https://crm.local/report', {}, {}, {}, False,
+        ),
+    )
+    pool = _pool(size=2, max_leases=2)
+    for _ in range(4):
+        crm.get_crm_response(
+            pool,
+            TypeReport.FLR_LEVEL,
+            NaumenRequestType.SEARCH_REPORT,
+            method='GET',
+        )
+    assert pool.metrics().leases == 4
+    assert sum(connect.session.requests for connect in pool.connects) == 4
+
+
+def test_async_pool_lease():
+    pytest.importorskip('aiohttp')
+    from naumen_api.transceiver.async_crm import AsyncSessionState
+    from naumen_api.transceiver.async_session_pool import AsyncSessionPool
+
+    async def _main():
+        pool = AsyncSessionPool(
+            [SimpleNamespace(state=AsyncSessionState())],
+            max_leases=1,
+            lease_timeout=1,
+        )
+        order = []
+
+        async def _use(num):
+            async with pool.lease():
+                order.append(num)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*[_use(num) for num in range(3)])
+        return pool.metrics(), order
+
+    metrics, order = asyncio.run(_main())
+    assert metrics.leases == 3
+    assert metrics.in_use == 0
+    assert sorted(order) == [0, 1, 2]
+
+
+
+def test_async_pool_health_check_runs_periodically(monkeypatch):
+    pytest.importorskip('aiohttp')
+    from naumen_api.transceiver import async_session_pool
+    from naumen_api.transceiver.async_crm import AsyncSessionState
+
+    pinged = []
+
+    async def _ping(connect):
+        pinged.append(connect)
+        return True
+
+    async def _close_session(connect):
+        pass
+
+    monkeypatch.setattr(async_session_pool, 'ping', _ping)
+    monkeypatch.setattr(async_session_pool, 'close_session', _close_session)
+
+    async def _main():
+        pool = async_session_pool.AsyncSessionPool(
+            [SimpleNamespace(state=AsyncSessionState())],
+            health_check_interval=0.01,
+        )
+        async with pool.lease():
+            pass
+        await asyncio.sleep(0.1)
+        await pool.close()
+        checks = len(pinged)
+        await asyncio.sleep(0.05)
+        return checks, pool._health_checks
+
+    checks, task = asyncio.run(_main())
+    assert checks >= 2
+    assert len(pinged) == checks
+    assert task.cancelled()
+
+
+if __name__ == '__main__':
+    pytest.main()
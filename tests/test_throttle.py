@@ -0,0 +1,145 @@
+from json import loads
+from time import sleep
+from types import SimpleNamespace
+
+from naumen_api.config.structures import (
+    ActiveConnect,
+    NaumenRequest,
+    NaumenRequestType,
+    StatusType,
+    TypeReport,
+)
+from naumen_api.exceptions import CantGetData, CrmUnavailable
+from naumen_api.naumen_api import Client
+from naumen_api.transceiver import crm
+from naumen_api.transceiver.throttle import CLOSED, HALF_OPEN, OPEN, CrmThrottle
+
+import pytest
+
+
+def _breaker(**kwargs):
+    options = dict(rate=0, failure_threshold=3, cooldown=0.05)
+    options.update(kwargs)
+    return CrmThrottle(**options)
+
+
+def test_token_bucket_delays():
+    throttle = CrmThrottle(rate=10, burst=2, max_wait=1, failure_threshold=0)
+    delays = [throttle.reserve() for _ in range(4)]
+    assert delays[:2] == [0, 0]
+    assert delays[2] == pytest.approx(0.1, abs=0.02)
+    assert delays[3] == pytest.approx(0.2, abs=0.02)
+
+
+def test_token_bucket_max_wait():
+    throttle = CrmThrottle(rate=10, burst=1, max_wait=0.15, failure_threshold=0)
+    throttle.reserve()
+    throttle.reserve()
+    with pytest.raises(CrmUnavailable):
+        throttle.reserve()
+
+
+def test_token_bucket_shared_file(tmp_path):
+    pytest.importorskip('fcntl')
+    state_file = str(tmp_path / 'bucket')
+    first, second = (
+        CrmThrottle(rate=10, burst=1, state_file=state_file, failure_threshold=0)
+        for _ in range(2)
+    )
+    assert first.reserve() == 0
+    assert second.reserve() == pytest.approx(0.1, abs=0.02)
+
+
+def test_breaker_opens_and_half_opens():
+    throttle = _breaker()
+    for _ in range(3):
+        throttle.reserve()
+        throttle.record(False)
+    assert throttle.state == OPEN
+    with pytest.raises(CrmUnavailable):
+        throttle.reserve()
+
+    sleep(0.06)
+    assert throttle.state == HALF_OPEN
+    throttle.reserve()
+    with pytest.raises(CrmUnavailable):
+        throttle.reserve()
+    throttle.record(True)
+    assert throttle.state == CLOSED
+    throttle.reserve()
+
+
+def test_failed_probe_reopens():
+    throttle = _breaker(failure_threshold=1)
+    throttle.record(False)
+    sleep(0.06)
+    throttle.reserve()
+    throttle.record(False)
+    with pytest.raises(CrmUnavailable):
+        throttle.reserve()
+
+
+def test_success_resets_failures():
+    throttle = _breaker()
+    for success in (False, False, True, False, False):
+        throttle.record(success)
+    assert throttle.state == CLOSED
+
+
+def test_get_crm_response_fast_fails(monkeypatch):
+    sent = []
+
+    class FakeSession:
+
+        def get(self, url, **kwargs):
+            sent.append(url)
+            return SimpleNamespace(
+                status_code=503, url=url, history=[], content=b'',
+            )
+
+    monkeypatch.setattr(crm, 'CRM_THROTTLE', _breaker(cooldown=60))
+    monkeypatch.setattr(
+        crm,
+        'create_naumen_request',
+        lambda *args, **kwargs: NaumenRequest(
+            'https://crm.local/report', {}, {}, {}, False,
+        ),
+    )
+    connect = ActiveConnect(FakeSession())
+    for _ in range(3):
+        with pytest.raises(CantGetData):
+            crm.get_crm_response(
+                connect,
+                TypeReport.FLR_LEVEL,
+                NaumenRequestType.SEARCH_REPORT,
+                method='GET',
+            )
+    with pytest.raises(CrmUnavailable):
+        crm.get_crm_response(
+            connect,
+            TypeReport.FLR_LEVEL,
+            NaumenRequestType.SEARCH_REPORT,
+            method='GET',
+        )
+    assert len(sent) == 3
+
+
+def test_client_maps_open_circuit_to_gateway_timeout(monkeypatch):
+    from naumen_api import naumen_api
+
+    def _get_report(*args, **kwargs):
+        raise CrmUnavailable
+
+    monkeypatch.setattr(naumen_api, 'get_report', _get_report)
+    client = Client()
+    client._session = object()
+    responce = loads(client._get_response(TypeReport.FLR_LEVEL))
+    assert responce.get('status_code') == 504
+    assert responce.get('description') == 'Naumen is temporarily unavailable.'
+    assert StatusType._GATEWAY_TIMEOUT.description == (
+        'Remote end closed connection without response'
+    )
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,152 @@
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from json import loads
+from threading import Thread
+from types import SimpleNamespace
+
+from requests import Request, Session, exceptions
+from requests.adapters import HTTPAdapter
+
+from naumen_api.config.config import CONFIG
+from naumen_api.config.structures import (
+    ActiveConnect,
+    NaumenRequest,
+    NaumenRequestType,
+    TypeReport,
+)
+from naumen_api.exceptions import CrmUnavailable
+from naumen_api.naumen_api import Client
+from naumen_api.transceiver import crm, transport
+from naumen_api.transceiver.throttle import OPEN, CrmThrottle
+from naumen_api.transceiver.transport import (
+    NaumenAdapter,
+    ThrottledRetry,
+    get_timeout,
+    make_retry,
+    mount_adapters,
+)
+
+import pytest
+
+
+def test_timeout_per_request_type(monkeypatch):
+    monkeypatch.setitem(CONFIG.config, 'transport', {
+        'connect_timeout': {'value': 3},
+        'read_timeout': {
+            'default': {'value': 20},
+            'search_report': {'value': 0},
+        },
+    })
+    assert get_timeout() == (3, 20)
+    assert get_timeout(NaumenRequestType.CREATE_REPORT) == (3, 20)
+    assert get_timeout(NaumenRequestType.SEARCH_REPORT) == (3, None)
+
+
+def test_retry_per_method(monkeypatch):
+    monkeypatch.setitem(CONFIG.config, 'transport', {
+        'retries': {'POST': {'total': {'value': 0}}},
+    })
+    get_retry, post_retry = make_retry('GET'), make_retry('POST')
+    assert get_retry.total == 5
+    assert 503 in get_retry.status_forcelist
+    assert post_retry.total == 0
+    assert not post_retry.raise_on_status
+    assert isinstance(get_retry, ThrottledRetry)
+
+
+def test_adapter_selects_retry_by_method(monkeypatch):
+    used = []
+
+    def _send(self, request, *args, **kwargs):
+        used.append(self.max_retries)
+        return SimpleNamespace(status_code=200)
+
+    monkeypatch.setattr(HTTPAdapter, 'send', _send)
+    get_retry, post_retry = make_retry('GET'), make_retry('POST')
+    adapter = NaumenAdapter({'GET': get_retry, 'POST': post_retry})
+    for method in ('GET', 'POST', 'PUT'):
+        adapter.send(Request(method, 'https://crm.local/').prepare())
+    assert used[0] is get_retry
+    assert used[1] is post_retry
+    assert used[2] is adapter.max_retries
+
+
+def test_mount_adapters():
+    session = Session()
+    mount_adapters(session)
+    assert isinstance(session.get_adapter('https://crm.local/'), NaumenAdapter)
+    assert session.headers['Accept-Encoding'] == transport.get_accept_encoding()
+
+
+def test_get_crm_response_sets_timeout(monkeypatch):
+    calls = []
+
+    class FakeSession:
+
+        def post(self, **kwargs):
+            calls.append(kwargs['timeout'])
+            return SimpleNamespace(
+                status_code=200, url='', history=[], content=b'',
+            )
+
+    monkeypatch.setattr(
+        crm,
+        'create_naumen_request',
+        lambda *args, **kwargs: NaumenRequest('', {}, {}, {}, False),
+    )
+    crm.get_crm_response(
+        ActiveConnect(FakeSession()),
+        TypeReport.FLR_LEVEL,
+        NaumenRequestType.CREATE_REPORT,
+    )
+    assert calls == [get_timeout(NaumenRequestType.CREATE_REPORT)]
+
+
+def test_timeout_is_gateway_timeout(monkeypatch):
+    from naumen_api import naumen_api
+
+    def _get_report(*args, **kwargs):
+        raise exceptions.ReadTimeout
+
+    monkeypatch.setattr(naumen_api, 'get_report', _get_report)
+    client = Client()
+    client._session = object()
+    responce = loads(client._get_response(TypeReport.FLR_LEVEL))
+    assert responce.get('status_code') == 504
+
+
+class UnavailableHandler(BaseHTTPRequestHandler):
+
+    hits = 0
+
+    def do_GET(self):
+        type(self).hits += 1
+        self.send_response(503)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def test_adapter_retries_count_against_breaker(monkeypatch):
+    monkeypatch.setitem(CONFIG.config, 'transport', {
+        'retries': {'GET': {'backoff_factor': {'value': 0}}},
+    })
+    throttle = CrmThrottle(rate=0, failure_threshold=3, cooldown=30)
+    monkeypatch.setattr(transport, 'CRM_THROTTLE', throttle)
+    server = HTTPServer(('127.0.0.1', 0), UnavailableHandler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    session = Session()
+    mount_adapters(session)
+    try:
+        with pytest.raises(CrmUnavailable):
+            session.get(f'http://127.0.0.1:{server.server_port}/', timeout=5)
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert UnavailableHandler.hits == 3
+    assert throttle.state == OPEN
+
+
+if __name__ == '__main__':
+    pytest.main()